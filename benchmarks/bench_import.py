@@ -0,0 +1,93 @@
+"""
+Import time of getpaid_elavon during Django startup.
+
+Run from the repository root::
+
+    python benchmarks/bench_import.py [--runs 10]
+
+Starts ``--runs`` fresh interpreters with ``python -X importtime`` that run
+``django.setup()`` with the test settings, and reports the median time
+spent importing ``getpaid_elavon`` modules and everything they pulled in,
+the heaviest of those modules, and whether the HTTP stack and optional
+dependencies were loaded. The same measurement backs the import budget
+test in ``getpaid_elavon/tests/test_imports.py``.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETUP = "import django; django.setup()"
+REPORT = "import sys; print(','.join(sorted(m for m in {modules!r} if m in sys.modules)))"
+DEFERRED_MODULES = ("requests", "urllib3", "httpx", "orjson")
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Return ``(name, self_us, cumulative_us, ancestors)`` per import, ``ancestors`` as names of the importing modules.
+    """
+    lines = [line for line in stderr.splitlines() if line.startswith("import time:") and "[us]" not in line]
+    imports = []
+    stack = []
+    # children are printed before their parent, walk backwards to see the parents first
+    for line in reversed(lines):
+        self_us, cumulative_us, name_field = line[len("import time:") :].split("|")
+        depth = (len(name_field) - len(name_field.lstrip()) - 1) // 2
+        name = name_field.strip()
+        del stack[depth:]
+        imports.append((name, int(self_us), int(cumulative_us), tuple(stack)))
+        stack.append(name)
+    return imports
+
+
+def package_import_time(imports: list) -> int:
+    """
+    Microseconds spent in imports started by the package, without counting nested package imports twice.
+    """
+    return sum(
+        cumulative
+        for name, _, cumulative, ancestors in imports
+        if name.startswith("getpaid_elavon") and not any(a.startswith("getpaid_elavon") for a in ancestors)
+    )
+
+
+def run(code: str) -> tuple:
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "tests.settings", "PYTHONPATH": ROOT}
+    # measure loading cached bytecode, as in production, not compiling the sources
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, cwd=ROOT, env=env, check=True
+    )
+    return parse_importtime(result.stderr), result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    totals = []
+    heaviest = defaultdict(list)
+    loaded = ""
+    run(SETUP)  # writes the bytecode caches
+    for _ in range(args.runs):
+        imports, loaded = run(f"{SETUP}; {REPORT.format(modules=DEFERRED_MODULES)}")
+        totals.append(package_import_time(imports))
+        for name, self_us, _, ancestors in imports:
+            if name.startswith("getpaid_elavon") or any(a.startswith("getpaid_elavon") for a in ancestors):
+                heaviest[name].append(self_us)
+
+    print(f"getpaid_elavon imports during django.setup(): median {statistics.median(totals) / 1000:.1f}ms")
+    print("heaviest modules (median self time):")
+    medians = sorted(((statistics.median(times), name) for name, times in heaviest.items()), reverse=True)
+    for self_us, name in medians[:10]:
+        print(f"  {self_us / 1000:6.2f}ms  {name}")
+    print(f"loaded after django.setup(): {loaded or 'none'} of {', '.join(DEFERRED_MODULES)}")
+
+
+if __name__ == "__main__":
+    main()
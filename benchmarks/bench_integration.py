@@ -0,0 +1,166 @@
+"""
+Throughput and tail latency of the whole integration against the fake Elavon server.
+
+Run from the repository root::
+
+    python benchmarks/bench_integration.py [--payments 500] [--concurrency 8]
+        [--latency 0.02] [--jitter 0.05] [--error-rate 0.01]
+        [--decline-rate 0.1] [--redeliveries 1] [--out-of-order]
+        [--checkout-mode pipelined] [--webhook-processing batch]
+
+Serves the callback view on a local WSGI server, points the backend at a
+``getpaid_elavon.fake_server.FakeElavonServer`` with the given latency and
+error rate (``base_url``), then checks out ``--payments`` payments from
+``--concurrency`` threads. The fake server pays every session and delivers
+the signed notifications back to the callback view, redelivering and
+reordering them as requested. Reports checkout throughput and latency
+percentiles, and how long it took until every payment reached its final
+status.
+
+The test database is an SQLite file, which serializes writers: with
+``--checkout-mode atomic`` the write lock is held during the Elavon calls,
+so the tail latency mostly shows lock waits.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from common import SHARED_SECRET, SIGNER_ID, configure
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.db import connection, connections
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment
+from getpaid.types import PaymentStatus as ps
+
+from getpaid_elavon.fake_server import FakeElavonServer
+from getpaid_elavon.metrics import get_metrics
+
+FINAL_STATUSES = (ps.PAID, ps.FAILED)
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def serve_callbacks() -> ThreadedWSGIServer:
+    """
+    Serve the project on a local threaded WSGI server, the way ``runserver`` does.
+    """
+    server = ThreadedWSGIServer(("127.0.0.1", 0), WSGIRequestHandler)
+    server.set_app(get_internal_wsgi_application())
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--payments", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every Elavon response")
+    parser.add_argument("--jitter", type=float, default=0.05, help="up to this many random extra seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--decline-rate", type=float, default=0.1)
+    parser.add_argument("--webhook-delay", type=float, default=0.5, help="seconds until a session is paid")
+    parser.add_argument("--redeliveries", type=int, default=0)
+    parser.add_argument("--out-of-order", action="store_true")
+    parser.add_argument("--checkout-mode", choices=["atomic", "pipelined"], default="atomic")
+    parser.add_argument("--webhook-processing", choices=["inline", "batch"], default="inline")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    from factories import PaymentFactory
+
+    logging.disable(logging.CRITICAL)
+    setup_test_environment()
+    # a database file, so the checkout threads and the callback server share it
+    database_dir = tempfile.mkdtemp()
+    connection.settings_dict["TEST"]["NAME"] = os.path.join(database_dir, "bench.sqlite3")
+    # take the write lock when a transaction starts, instead of failing with "database is locked" on upgrade
+    connection.settings_dict["OPTIONS"] = {"transaction_mode": "IMMEDIATE", "timeout": 30}
+    connection.creation.create_test_db(verbosity=0)
+
+    settings.ALLOWED_HOSTS = ["127.0.0.1", "testserver"]
+    callbacks = serve_callbacks()
+    fake = FakeElavonServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        webhook_url=f"http://127.0.0.1:{callbacks.server_port}/callback/",
+        webhook_shared_secret=SHARED_SECRET,
+        webhook_signer_id=SIGNER_ID,
+        webhook_delay=args.webhook_delay,
+        decline_rate=args.decline_rate,
+        out_of_order=args.out_of_order,
+        redeliveries=args.redeliveries,
+        redelivery_delay=0.1,
+        webhook_workers=args.concurrency,
+        seed=args.seed,
+    ).start()
+    configure(
+        base_url=fake.url,
+        checkout_mode=args.checkout_mode,
+        webhook_processing=args.webhook_processing,
+        pool_maxsize=args.concurrency,
+        metrics_enabled=True,
+    )
+
+    payments = PaymentFactory.create_batch(args.payments)
+    Payment = type(payments[0])
+    factory = RequestFactory()
+    latencies = []
+    errors = Counter()
+
+    def checkout(payment):
+        started = time.perf_counter()
+        try:
+            payment.processor.prepare_transaction(request=factory.post("/"))
+        except Exception as e:
+            errors[type(e).__name__] += 1
+        else:
+            latencies.append(time.perf_counter() - started)
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(checkout, payments))
+    checkout_time = time.perf_counter() - started
+    fake.wait_idle()
+    settled_time = time.perf_counter() - started
+
+    statuses = Counter(Payment.objects.values_list("status", flat=True))
+    outcomes = Counter()
+    for labels, count in get_metrics().counters.get("elavon_webhooks_total", {}).items():
+        outcomes[dict(labels)["outcome"]] += int(count)
+    fake.stop()
+    callbacks.shutdown()
+    shutil.rmtree(database_dir)
+
+    print(f"checkouts: {len(latencies)} ok, {sum(errors.values())} failed {dict(errors) or ''}")
+    print(f"throughput: {len(latencies) / checkout_time:.1f} checkouts/s")
+    if latencies:
+        cells = (
+            f"{name} {percentile(latencies, fraction) * 1000:.1f}ms"
+            for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        )
+        print("checkout latency: " + ", ".join(cells))
+    print(f"webhooks: {fake.stats['webhooks_delivered']} delivered, {fake.stats['webhooks_failed']} failed")
+    print("webhook outcomes: " + ", ".join(f"{outcome}: {count}" for outcome, count in sorted(outcomes.items())))
+    print(f"settled after: {settled_time:.2f}s")
+    print("final statuses: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+    unfinished = sum(count for status, count in statuses.items() if status not in FINAL_STATUSES)
+    if unfinished:
+        print(f"unfinished payments: {unfinished}")
+
+
+if __name__ == "__main__":
+    main()
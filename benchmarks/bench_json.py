@@ -0,0 +1,96 @@
+"""
+JSON codecs on Elavon payloads.
+
+Run from the repository root::
+
+    python benchmarks/bench_json.py [--number 50000]
+
+Reports the time to encode an order with 20 items to bytes and to decode
+a payment session response and a webhook notification, for the stdlib
+``json`` module (encoded the way ``requests``' ``json=`` does) and for
+every available codec.
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from functools import partial
+from importlib.util import find_spec
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from getpaid_elavon.codec import OrjsonCodec, StdlibJSONCodec  # noqa: E402
+
+ORDER = {
+    "orderReference": "100234",
+    "total": {"currencyCode": "EUR", "amount": "199.80"},
+    "description": "Order 100234 for Jan Kowalski",
+    "items": [
+        {"total": {"amount": "9.99", "currencyCode": "EUR"}, "description": f"Product {i}, size M, colour navy"}
+        for i in range(20)
+    ],
+    "customReference": str(uuid.uuid4()),
+}
+SESSION = json.dumps(
+    {
+        "id": "7p7rmqwgrcyytp7jdy4tgtfbfcpy",
+        "href": "https://uat.api.converge.eu.elavonaws.com/payment-sessions/7p7rmqwgrcyytp7jdy4tgtfbfcpy",
+        "url": "https://uat.hpp.converge.eu.elavonaws.com/?sessionId=7p7rmqwgrcyytp7jdy4tgtfbfcpy",
+        "order": "https://uat.api.converge.eu.elavonaws.com/orders/txdjjwg49k4pdkcyyhbpb9tffmbg",
+        "createdAt": "2026-01-01T12:00:00.000Z",
+        "modifiedAt": "2026-01-01T12:00:00.000Z",
+        "expiresAt": "2026-01-01T12:15:00.000Z",
+        "returnUrl": "https://shop.example.com/payment/success/",
+        "cancelUrl": "https://shop.example.com/payments/failure/1/",
+        "doCreateTransaction": True,
+        "hppType": "fullPageRedirect",
+        "customReference": str(uuid.uuid4()),
+        "shopperEmailAddress": "jan.kowalski@example.com",
+        "billTo": {"countryCode": "POL", "street1": "ul. Długa 1", "city": "Warszawa", "postalCode": "00-001"},
+        "transaction": None,
+    }
+).encode()
+WEBHOOK = json.dumps(
+    {
+        "id": "notification-1",
+        "href": "https://uat.api.converge.eu.elavonaws.com/notifications/notification-1",
+        "createdAt": "2026-01-01T12:03:00.000Z",
+        "resourceType": "paymentSession",
+        "resource": "https://uat.api.converge.eu.elavonaws.com/payment-sessions/7p7rmqwgrcyytp7jdy4tgtfbfcpy",
+        "eventType": "saleAuthorized",
+        "customReference": str(uuid.uuid4()),
+    }
+).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=50000)
+    args = parser.parse_args()
+
+    candidates = [("json (requests json=)", lambda obj: json.dumps(obj).encode("utf-8"), json.loads)]
+    candidates.append(("StdlibJSONCodec", StdlibJSONCodec().dumps, StdlibJSONCodec().loads))
+    if find_spec("orjson") is not None:
+        candidates.append(("OrjsonCodec", OrjsonCodec().dumps, OrjsonCodec().loads))
+
+    print(f"{'':>22} {'encode order':>14} {'decode session':>16} {'decode webhook':>16}")
+    for name, dumps, loads in candidates:
+        timings = [
+            timeit.timeit(partial(dumps, ORDER), number=args.number),
+            timeit.timeit(partial(loads, SESSION), number=args.number),
+            timeit.timeit(partial(loads, WEBHOOK), number=args.number),
+        ]
+        cells = (f"{t / args.number * 1e6:.2f}us" for t in timings)
+        print(f"{name:>22}" + "".join(f"{cell:>{width}}" for cell, width in zip(cells, (15, 17, 17))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Cost of webhook logging on the success path.
+
+Run from the repository root::
+
+    python benchmarks/bench_logging.py [--seconds 1]
+
+Compares the former eager ``INFO`` log of the full headers and body with
+the structured logger, with the record filtered out by level, emitted in
+full and sampled at 1%.
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from getpaid_elavon.utils import StructuredLogger  # noqa: E402
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "Content-Length": "1843",
+    "User-Agent": "Elavon-Notifications/1.0",
+    "Signature-bench": "c2lnbmF0dXJl" * 8,
+    "X-Forwarded-For": "203.0.113.7",
+    "X-Request-Id": "5d1f7c0e-0a4b-4bb6-9d5e-2f07a4f5f0a1",
+}
+DATA = {
+    "id": "notification-1",
+    "resourceType": "paymentSession",
+    "resource": "https://uat.api.converge.eu.elavonaws.com/payment-sessions/benchsession",
+    "eventType": "saleAuthorized",
+    "billTo": {"fullName": "Jan Kowalski", "email": "jan@example.com", "city": "Warszawa"},
+    "items": [{"description": f"Item {i}", "total": {"amount": "9.99", "currencyCode": "EUR"}} for i in range(20)],
+}
+
+
+def measure(func, seconds: float) -> float:
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        func()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("getpaid_elavon.bench")
+    logger.propagate = False
+    logger.addHandler(logging.StreamHandler(io.StringIO()))
+    structured = StructuredLogger(logger, sample_rate=1.0)
+    sampled = StructuredLogger(logger, sample_rate=0.01)
+
+    def eager():
+        logger.info("Webhook received | headers: %s | body: %s", str(dict(HEADERS)), str(DATA))
+
+    def structured_success():
+        structured.success("Webhook received", resource_type=DATA["resourceType"], event_type=DATA["eventType"])
+        structured.debug("Webhook payload", headers=HEADERS, body=DATA)
+
+    def sampled_success():
+        sampled.success("Webhook received", resource_type=DATA["resourceType"], event_type=DATA["eventType"])
+        sampled.debug("Webhook payload", headers=HEADERS, body=DATA)
+
+    scenarios = [
+        ("eager, WARNING", logging.WARNING, eager),
+        ("eager, INFO", logging.INFO, eager),
+        ("structured, WARNING", logging.WARNING, structured_success),
+        ("structured, INFO", logging.INFO, structured_success),
+        ("structured, DEBUG", logging.DEBUG, structured_success),
+        ("sampled 1%, INFO", logging.INFO, sampled_success),
+    ]
+    for name, level, func in scenarios:
+        logger.setLevel(level)
+        rate = measure(func, args.seconds)
+        print(f"{name:>20}: {rate:12.0f} webhooks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Peak memory of building and encoding the order body of large carts.
+
+Run from the repository root::
+
+    python benchmarks/bench_memory.py [--items 10000 50000 100000]
+
+Every cart comes from a lazy ``order.get_items()``. Compares the peak
+memory allocated (``tracemalloc``) while encoding the ``POST /orders``
+body the way it was done before items were streamed (a list of item dicts,
+then the payload dict, then the body) with :meth:`OrderRequest.iter_encode`
+joined into one body (the default) and with the fragments written straight
+into the request (``stream_order_body``).
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from getpaid_elavon import codec  # noqa: E402
+from getpaid_elavon.client import join_chunks  # noqa: E402
+from getpaid_elavon.types import OrderRequest  # noqa: E402
+
+
+def cart(count: int):
+    return ({"name": f"Product {index}, size M, colour navy", "quantity": 1} for index in range(count))
+
+
+def materialized(processor) -> int:
+    order = processor.payment.order
+    items = [
+        {
+            "total": {"amount": item.get("quantity", 1), "currencyCode": order.get_currency()},
+            "description": item.get("name", ""),
+        }
+        for item in order.get_items()
+    ]
+    context = {**processor.get_paywall_context(), "items": items}
+    return len(codec.dumps(OrderRequest(**context).to_dict()))
+
+
+def buffered(processor) -> int:
+    return len(join_chunks(OrderRequest(**processor.get_paywall_context()).iter_encode()))
+
+
+def streamed(processor) -> int:
+    return sum(len(chunk) for chunk in OrderRequest(**processor.get_paywall_context()).iter_encode())
+
+
+def measure(func, processor) -> tuple:
+    """
+    Return ``(body size, peak bytes allocated)`` of one call.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        size = func(processor)
+        return size, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    args = parser.parse_args()
+
+    from factories import PaymentFactory
+
+    payment = PaymentFactory.build()
+    processor = payment.processor
+    print(f"codec: {type(codec.get_codec()).__name__}")
+    for count in args.items:
+        payment.order.get_items = lambda count=count: cart(count)
+        for name, func in (("materialized (before)", materialized), ("buffered", buffered), ("streamed", streamed)):
+            size, peak = measure(func, processor)
+            print(
+                f"{count:>7} items  {name:<22} body {size / 2**20:6.2f} MiB  peak {peak / 2**20:7.2f} MiB "
+                f"({peak / size:.1f}x body)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Request/response models against plain dicts.
+
+Run from the repository root::
+
+    python benchmarks/bench_models.py [--number 100000]
+
+Reports the time per operation for building the order and payment session
+payloads, reading a payment session response and a webhook notification,
+and the size of a 20 item order held as models and as dicts.
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils.dateparse import parse_datetime  # noqa: E402
+
+from getpaid_elavon.types import (  # noqa: E402
+    OrderItem,
+    OrderRequest,
+    PaymentSessionRequest,
+    PaymentSessionResponse,
+    WebhookNotification,
+)
+
+REFERENCE = uuid.uuid4()
+ITEMS = [{"total": {"amount": "9.99", "currencyCode": "EUR"}, "description": f"Item {i}"} for i in range(20)]
+MODEL_ITEMS = [OrderItem(f"Item {i}", "9.99", "EUR") for i in range(20)]
+SESSION_BODY = json.dumps(
+    {
+        "id": "7p7rmqwgrcyytp7jdy4tgtfbfcpy",
+        "href": "https://uat.api.converge.eu.elavonaws.com/payment-sessions/7p7rmqwgrcyytp7jdy4tgtfbfcpy",
+        "url": "https://uat.hpp.converge.eu.elavonaws.com/?sessionId=7p7rmqwgrcyytp7jdy4tgtfbfcpy",
+        "order": "https://uat.api.converge.eu.elavonaws.com/orders/txdjjwg49k4pdkcyyhbpb9tffmbg",
+        "expiresAt": "2026-01-01T12:15:00.000Z",
+        "transaction": None,
+        "hppType": "fullPageRedirect",
+        "customReference": str(REFERENCE),
+    }
+).encode()
+WEBHOOK = {
+    "id": "notification-1",
+    "resourceType": "paymentSession",
+    "resource": "https://uat.api.converge.eu.elavonaws.com/payment-sessions/7p7rmqwgrcyytp7jdy4tgtfbfcpy",
+    "eventType": "saleAuthorized",
+}
+
+
+def order_dict():
+    return {
+        "orderReference": "123",
+        "total": {"currencyCode": "EUR", "amount": "199.80"},
+        "description": "Order 123",
+        "items": ITEMS,
+        "customReference": str(REFERENCE),
+    }
+
+
+def order_model():
+    return OrderRequest("123", "199.80", "EUR", "Order 123", ITEMS, REFERENCE).to_dict()
+
+
+def order_model_items():
+    return OrderRequest("123", "199.80", "EUR", "Order 123", MODEL_ITEMS, REFERENCE).to_dict()
+
+
+def session_dict():
+    payload = {
+        "order": "https://uat.api.converge.eu.elavonaws.com/orders/txdjjwg49k4pdkcyyhbpb9tffmbg",
+        "returnUrl": "https://example.com/success/",
+        "cancelUrl": "https://example.com/failure/",
+        "doCreateTransaction": True,
+        "hppType": "fullPageRedirect",
+        "customReference": str(REFERENCE),
+        "shopperEmailAddress": "buyer@example.com",
+    }
+    return payload
+
+
+def session_model():
+    return PaymentSessionRequest(
+        "https://uat.api.converge.eu.elavonaws.com/orders/txdjjwg49k4pdkcyyhbpb9tffmbg",
+        "https://example.com/success/",
+        "https://example.com/failure/",
+        REFERENCE,
+        email="buyer@example.com",
+    ).to_dict()
+
+
+def read_session_dict():
+    session = json.loads(SESSION_BODY)
+    return session.get("url"), parse_datetime(session.get("expiresAt") or "")
+
+
+def read_session_model():
+    session = PaymentSessionResponse(SESSION_BODY)
+    return session.url, session.expires_at
+
+
+def read_webhook_dict():
+    if WEBHOOK.get("resourceType") != "paymentSession":
+        return None
+    return WEBHOOK.get("resource", "").rstrip("/").split("/")[-1], WEBHOOK.get("eventType")
+
+
+def read_webhook_model():
+    notification = WebhookNotification(WEBHOOK)
+    return notification.payment_session_id, notification.event_type
+
+
+def allocated(build) -> int:
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert value
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    pairs = [
+        ("order payload", order_dict, order_model),
+        ("order payload, OrderItem", order_dict, order_model_items),
+        ("session payload", session_dict, session_model),
+        ("read session response", read_session_dict, read_session_model),
+        ("read webhook", read_webhook_dict, read_webhook_model),
+    ]
+    print(f"{'':>26} {'dict':>10} {'model':>10}")
+    for name, with_dicts, with_models in pairs:
+        assert with_dicts() == with_models()
+        dict_time = timeit.timeit(with_dicts, number=args.number) / args.number * 1e6
+        model_time = timeit.timeit(with_models, number=args.number) / args.number * 1e6
+        print(f"{name:>26} {dict_time:8.2f}us {model_time:8.2f}us")
+
+    dict_items = allocated(lambda: [dict(item, total=dict(item["total"])) for item in ITEMS])
+    model_items = allocated(lambda: [OrderItem(f"Item {i}", "9.99", "EUR") for i in range(20)])
+    print(f"{'20 order items held':>26} {dict_items:9d}B {model_items:9d}B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Webhook ingestion throughput of ``CallbackView``.
+
+Run from the repository root::
+
+    python benchmarks/bench_webhooks.py [--seconds 2] [--metrics]
+
+Reports webhooks/second for a signed notification of an existing payment,
+a forged signature and a request without any signature header.
+``--metrics`` enables the in-memory metrics exporter.
+"""
+
+import argparse
+import json
+
+from common import SIGNATURE_HEADER, measure, setup_database, sign
+from django.test import RequestFactory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--metrics", action="store_true", help="enable metrics")
+    args = parser.parse_args()
+
+    setup_database(metrics_enabled=args.metrics)
+
+    from factories import PaymentFactory
+    from getpaid_elavon.views import CallbackView
+
+    payment = PaymentFactory(external_id="benchsession")
+    body = json.dumps(
+        {
+            "id": "notification-1",
+            "resourceType": "paymentSession",
+            "resource": "https://uat.api.converge.eu.elavonaws.com/payment-sessions/benchsession",
+            "eventType": "saleAuthorizationPending",
+        }
+    ).encode()
+    factory = RequestFactory()
+    view = CallbackView.as_view()
+
+    def post(**headers):
+        return lambda: factory.post("/callback/", data=body, content_type="application/json", **headers)
+
+    scenarios = {
+        "signed": post(**{SIGNATURE_HEADER: sign(body)}),
+        "forged": post(**{SIGNATURE_HEADER: sign(b"something else")}),
+        "unsigned": post(),
+    }
+    for name, request_factory in scenarios.items():
+        rate = measure(lambda request_factory=request_factory: view(request_factory()), 1, args.seconds)["ops_per_sec"]
+        print(f"{name:>10}: {rate:10.0f} webhooks/s")
+    assert payment.pk
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Setup shared by the benchmark scripts that run against a test database.
+
+Importing it puts the repository on ``sys.path`` and sets up Django with
+the test settings, so scripts import it before any ``getpaid_elavon`` module.
+"""
+
+import base64
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from getpaid_elavon.webhooks import compute_signature  # noqa: E402
+
+SHARED_SECRET = base64.b64encode(b"benchmark-shared-secret").decode()
+SIGNER_ID = "bench"
+SIGNATURE_HEADER = f"HTTP_SIGNATURE_{SIGNER_ID.upper()}"
+
+
+def sign(body: bytes) -> str:
+    return compute_signature(body, SHARED_SECRET)
+
+
+def configure(**values) -> None:
+    """
+    Set the backend settings, with webhooks signed by :func:`sign`.
+    """
+    settings.GETPAID_BACKEND_SETTINGS = {
+        "getpaid_elavon": {
+            **settings.GETPAID_BACKEND_SETTINGS["getpaid_elavon"],
+            "webhook_shared_secret": SHARED_SECRET,
+            "webhook_signer_id": SIGNER_ID,
+            **values,
+        }
+    }
+
+
+def setup_database(**values) -> None:
+    """
+    Create the in-memory test database with logging silenced, and :func:`configure` the backend.
+    """
+    logging.disable(logging.CRITICAL)
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    configure(**values)
+
+
+def measure(func, rounds: int, min_time: float) -> dict:
+    """
+    Run ``func`` in ``rounds`` rounds of at least ``min_time`` seconds, return throughput statistics.
+    """
+    func()  # warm up connections and caches
+    rates = []
+    for _ in range(rounds):
+        count = 0
+        started = time.perf_counter()
+        while True:
+            func()
+            count += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+        rates.append(count / elapsed)
+    median = statistics.median(rates)
+    return {
+        "ops_per_sec": round(median, 1),
+        "mean_us": round(1e6 / median, 2),
+        "min_ops_per_sec": round(min(rates), 1),
+        "max_ops_per_sec": round(max(rates), 1),
+        "rounds": rounds,
+    }
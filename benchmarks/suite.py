@@ -0,0 +1,169 @@
+"""
+Benchmark suite of the checkout and webhook paths.
+
+Run from the repository root::
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline results.json [--threshold 10]
+
+Every scenario runs ``--rounds`` rounds of at least ``--min-time`` seconds
+and reports the median throughput. Results are written as JSON (to stdout
+without ``--output``). With ``--baseline`` each scenario is compared with a
+previous run and the exit status is 1 when any of them got slower by more
+than ``--threshold`` percent. ``-k`` selects scenarios by substring.
+
+Elavon API calls go to the bundled fake Elavon server on localhost
+(``getpaid_elavon.fake_server``, selected with the ``base_url`` setting),
+so the numbers cover request building, the HTTP stack and the database,
+but not the network.
+"""
+
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+
+import django
+from common import SIGNATURE_HEADER, measure, setup_database, sign
+from django.conf import settings
+from django.test import RequestFactory
+
+from getpaid_elavon.fake_server import FakeElavonServer
+
+BODY_SIZES = (1_000, 10_000, 100_000)
+ITEM_COUNTS = (1, 10, 100, 1000)
+
+
+def get_scenarios(api_url: str) -> dict:
+    from factories import PaymentFactory
+    from getpaid_elavon.views import CallbackView
+
+    factory = RequestFactory()
+    view = CallbackView.as_view()
+    scenarios = {}
+
+    def prepare_transaction(checkout_mode):
+        settings.GETPAID_BACKEND_SETTINGS["getpaid_elavon"]["checkout_mode"] = checkout_mode
+        payment = PaymentFactory()
+        return lambda: payment.processor.prepare_transaction(request=factory.post("/"))
+
+    scenarios["prepare_transaction[atomic]"] = lambda: prepare_transaction("atomic")
+    scenarios["prepare_transaction[pipelined]"] = lambda: prepare_transaction("pipelined")
+
+    def callback_view(signed):
+        PaymentFactory(external_id="benchsession")
+        body = json.dumps(
+            {
+                "id": "notification-1",
+                "resourceType": "paymentSession",
+                "resource": f"{api_url}/payment-sessions/benchsession",
+                "eventType": "saleAuthorizationPending",
+            }
+        ).encode()
+        headers = {SIGNATURE_HEADER: sign(body if signed else b"forged")}
+        return lambda: view(factory.post("/callback/", data=body, content_type="application/json", **headers))
+
+    scenarios["callback_view[valid]"] = lambda: callback_view(True)
+    scenarios["callback_view[invalid]"] = lambda: callback_view(False)
+
+    def validate_signature(size):
+        processor = PaymentFactory.build().processor
+        body = b"x" * size
+        request = factory.post(
+            "/callback/",
+            data=body,
+            content_type="application/json",
+            **{SIGNATURE_HEADER: sign(body)},
+        )
+        return lambda: processor._validate_signature(request, body)
+
+    for size in BODY_SIZES:
+        scenarios[f"validate_signature[{size}B]"] = lambda size=size: validate_signature(size)
+
+    def paywall_context(count):
+        payment = PaymentFactory.build()
+        items = [{"name": f"Item {i}", "quantity": 1} for i in range(count)]
+        payment.order.get_items = lambda: items
+        processor = payment.processor
+        return lambda: list(processor.get_paywall_context()["items"])
+
+    for count in ITEM_COUNTS:
+        scenarios[f"get_paywall_context[{count} items]"] = lambda count=count: paywall_context(count)
+
+    return scenarios
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """
+    Print the change against ``baseline`` per scenario, return whether any regressed beyond ``threshold`` percent.
+    """
+    regressed = False
+    print(f"{'scenario':<36} {'baseline':>12} {'current':>12} {'change':>9}", file=sys.stderr)
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<36} {'-':>12} {result['ops_per_sec']:>12.1f} {'new':>9}", file=sys.stderr)
+            continue
+        change = (result["ops_per_sec"] / previous["ops_per_sec"] - 1) * 100
+        flag = ""
+        if change < -threshold:
+            regressed = True
+            flag = "  REGRESSION"
+        print(
+            f"{name:<36} {previous['ops_per_sec']:>12.1f} {result['ops_per_sec']:>12.1f} {change:>+8.1f}%{flag}",
+            file=sys.stderr,
+        )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per round")
+    parser.add_argument("-k", dest="select", help="run only scenarios containing this string")
+    parser.add_argument("--output", help="write the results to this JSON file instead of stdout")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+    args = parser.parse_args()
+
+    # sessions are never paid, the scenarios only measure the checkout and webhook handling paths
+    server = FakeElavonServer(auto_pay=False).start()
+    setup_database(base_url=server.url)
+
+    results = {}
+    for name, setup in get_scenarios(server.url).items():
+        if args.select and args.select not in name:
+            continue
+        results[name] = measure(setup(), args.rounds, args.min_time)
+        print(f"{name:<36} {results[name]['ops_per_sec']:>12.1f} ops/s", file=sys.stderr)
+    server.stop()
+
+    output = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "django": django.get_version(),
+            "rounds": args.rounds,
+            "min_time": args.min_time,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
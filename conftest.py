@@ -1,3 +1,6 @@
+import base64
+import hashlib
+import json
 from decimal import Decimal
 
 import pytest
@@ -24,6 +27,17 @@ def client():
     )
 
 
+@pytest.fixture
+def payment(db):
+    from factories import PaymentFactory
+
+    return PaymentFactory(
+        order__total=Decimal("100.50"),
+        order__currency="EUR",
+        order__description="Test order for payment",
+    )
+
+
 @pytest.fixture
 def order():
     from factories import OrderFactory
@@ -69,3 +83,74 @@ def mock_order_response():
         },
         "status": "created",
     }
+
+
+@pytest.fixture
+def webhook_secret(settings):
+    secret = base64.b64encode(b"test-webhook-shared-secret").decode()
+    settings.GETPAID_BACKEND_SETTINGS = {
+        "getpaid_elavon": {
+            **settings.GETPAID_BACKEND_SETTINGS["getpaid_elavon"],
+            "webhook_shared_secret": secret,
+            "webhook_signer_id": "test",
+        }
+    }
+    return secret
+
+
+@pytest.fixture
+def backend_settings(settings, webhook_secret):
+    """Update the getpaid_elavon backend settings of the test, on top of the webhook secret."""
+
+    def update(**values):
+        settings.GETPAID_BACKEND_SETTINGS = {
+            "getpaid_elavon": {**settings.GETPAID_BACKEND_SETTINGS["getpaid_elavon"], **values}
+        }
+
+    return update
+
+
+@pytest.fixture
+def callback_view():
+    from getpaid_elavon.views import CallbackView
+
+    return CallbackView.as_view()
+
+
+@pytest.fixture
+def get_status():
+    """Read the current status of a payment from the database."""
+
+    def get(payment):
+        return type(payment).objects.get(pk=payment.pk).status
+
+    return get
+
+
+@pytest.fixture
+def signed_webhook(rf, webhook_secret):
+    """Build a webhook request signed the way Elavon does."""
+
+    def build(payload, secret=None, signed=True):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        headers = {}
+        if signed:
+            key = base64.b64decode(secret or webhook_secret)
+            signature = base64.b64encode(hashlib.sha512(key + body).digest()).decode()
+            headers["HTTP_SIGNATURE_TEST"] = signature
+        return rf.post("/callback/", data=body, content_type="application/json", **headers)
+
+    return build
+
+
+@pytest.fixture
+def webhook_payload():
+    def build(session_id, event_type="saleAuthorized"):
+        return {
+            "id": f"notification-{session_id}-{event_type}",
+            "resourceType": "paymentSession",
+            "resource": f"https://uat.api.converge.eu.elavonaws.com/payment-sessions/{session_id}",
+            "eventType": event_type,
+        }
+
+    return build
@@ -1,3 +1,10 @@
-from .processor import PaymentProcessor  # noqa
-
 default_app_config = "getpaid_elavon.apps.GetpaidElavonAppConfig"
+
+
+def __getattr__(name):
+    # the processor pulls in Django models and the HTTP client, so it is loaded on first access only
+    if name == "PaymentProcessor":
+        from getpaid_elavon.processor import PaymentProcessor
+
+        return PaymentProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,9 +4,18 @@ from django.utils.translation import gettext_lazy as _
 
 class GetpaidElavonAppConfig(AppConfig):
     name = "getpaid_elavon"
+    default_auto_field = "django.db.models.BigAutoField"
     verbose_name = _("Elavon")
 
     def ready(self):
         from getpaid.registry import registry
 
+        from getpaid_elavon import processor, signals  # noqa
+        from getpaid_elavon.utils import get_setting
+
         registry.register(self.module)
+
+        if get_setting("warmup", False):
+            from getpaid_elavon.warmup import warm_up
+
+            warm_up()
@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import Future
+
+from django.db import close_old_connections, transaction
+
+from getpaid_elavon.types import WebhookResult
+from getpaid_elavon.utils import get_setting, get_structured_logger
+from getpaid_elavon.webhooks import get_event_rank, get_payment_session_id
+
+logger = get_structured_logger()
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_BATCH_WINDOW = 0.01
+DEFAULT_BATCH_TIMEOUT = 10.0
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def apply_webhook_batch(events: Sequence[dict]) -> list[WebhookResult]:
+    """
+    Apply verified, decoded notifications in one transaction.
+
+    Session mappings and payments of the whole batch are loaded and locked
+    with one ``in_bulk`` query each, falling back to ``Payment.external_id``
+    for unmapped sessions. Events are applied in the given order, each in
+    its own savepoint, so a failing event is rolled back alone. With
+    ``webhook_sequencing``, stale events are dropped in memory and the
+    ledger of every advanced session is written with one ``bulk_update``.
+
+    Returns:
+        Result per event, its ``outcome`` is ``processed``, ``stale``,
+        ``payment_not_found``, ``failed`` (with the ``error``) or ``ignored``
+        (not about a payment session)
+    """
+    import swapper
+
+    from getpaid_elavon.models import PaymentSession
+
+    Payment = swapper.load_model("getpaid", "Payment")
+    sequencing = get_setting("webhook_sequencing", True)
+    session_ids = [get_payment_session_id(data) for data in events]
+    results = [WebhookResult(outcome="ignored", error=None) for _ in events]
+
+    with transaction.atomic():
+        wanted = {session_id for session_id in session_ids if session_id}
+        # same lock order as CallbackView: session rows first, then payments; each sorted by key, so
+        # concurrent batches take overlapping row locks in one order and cannot deadlock
+        sessions = (
+            PaymentSession.objects.select_for_update().order_by("session_id").in_bulk(wanted, field_name="session_id")
+        )
+        payments_queryset = Payment.objects.select_for_update().filter(backend="getpaid_elavon")
+        payments = payments_queryset.order_by("pk").in_bulk({session.payment_id for session in sessions.values()})
+        payment_pks = {session_id: session.payment_id for session_id, session in sessions.items()}
+        unmapped = wanted - sessions.keys()
+        if unmapped:
+            for payment in payments_queryset.filter(external_id__in=unmapped).order_by("pk"):
+                payments.setdefault(payment.pk, payment)
+                payment_pks[payment.external_id] = payment.pk
+
+        advanced = {}
+        for index, (data, session_id) in enumerate(zip(events, session_ids)):
+            if session_id is None:
+                continue
+            payment = payments.get(payment_pks.get(session_id))
+            if payment is None:
+                results[index]["outcome"] = "payment_not_found"
+                continue
+            event_type = data.get("eventType")
+            session = sessions.get(session_id) if sequencing else None
+            rank = get_event_rank(event_type)
+            if session is not None and rank is not None and rank <= session.event_rank:
+                results[index]["outcome"] = "stale"
+                continue
+            try:
+                with transaction.atomic():
+                    payment.processor.apply_webhook_event(data)
+            except Exception as e:
+                logger.exception("Error applying batched webhook", error=str(e), payment_id=payment.pk)
+                results[index] = WebhookResult(outcome="failed", error=e)
+                # the savepoint undid the event in the database, drop the half-transitioned instance too
+                payments[payment.pk] = payments_queryset.get(pk=payment.pk)
+                continue
+            results[index]["outcome"] = "processed"
+            if session is not None and rank is not None:
+                session.event_type = event_type
+                session.event_rank = rank
+                advanced[session_id] = session
+
+        if advanced:
+            PaymentSession.objects.bulk_update(advanced.values(), ["event_type", "event_rank"])
+    return results
+
+
+class WebhookBatcher:
+    """
+    Group commit of webhooks, used when ``webhook_processing`` is ``"batch"``.
+
+    Request threads :meth:`submit` verified notifications and wait for their
+    outcome. A background thread gathers them into windows of at most
+    ``webhook_batch_size`` events or ``webhook_batch_window`` seconds and
+    applies each window with :func:`apply_webhook_batch`, so a burst of
+    webhooks costs one transaction and one payment lookup per window
+    instead of per event.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, data: dict) -> Future:
+        future = Future()
+        self._queue.put((data, future))
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="elavon-webhook-batcher", daemon=True)
+                    self._thread.start()
+        return future
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            batch_size = get_setting("webhook_batch_size", DEFAULT_BATCH_SIZE)
+            deadline = time.monotonic() + get_setting("webhook_batch_window", DEFAULT_BATCH_WINDOW)
+            while len(items) < batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.flush(items)
+
+    def flush(self, items: list) -> None:
+        close_old_connections()
+        try:
+            results = apply_webhook_batch([data for data, _ in items])
+        except Exception as e:
+            logger.exception("Error applying webhook batch", error=str(e), batch_size=len(items))
+            for _, future in items:
+                future.set_exception(e)
+        else:
+            for (_, future), result in zip(items, results):
+                future.set_result(result)
+
+
+def get_webhook_batcher() -> WebhookBatcher:
+    """
+    Return the process-wide batcher, its thread is started by the first submitted event.
+    """
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = WebhookBatcher()
+    return _batcher
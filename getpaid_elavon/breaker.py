@@ -0,0 +1,125 @@
+import threading
+import time
+from typing import Optional
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIMEOUT = 30.0
+DEFAULT_MIN_READ_TIMEOUT = 5.0
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an Elavon endpoint whose circuit is open.
+    """
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit open for Elavon endpoint {endpoint}, retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    After ``failure_threshold`` consecutive failures (connection errors,
+    timeouts and 5xx responses) the endpoint's circuit opens and calls fail
+    fast with :class:`CircuitOpenError`. Once ``recovery_timeout`` seconds
+    passed, a single probe call is let through (half-open): its success
+    closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+        # endpoint -> [state, consecutive failures, opened at, probe in flight]
+        self._circuits: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def get_state(self, endpoint: str) -> str:
+        circuit = self._circuits.get(endpoint)
+        return circuit[0] if circuit is not None else self.CLOSED
+
+    def before_call(self, endpoint: str) -> None:
+        """
+        Raise :class:`CircuitOpenError` unless a call to ``endpoint`` may go out.
+        """
+        circuit = self._circuits.get(endpoint)
+        if circuit is None or circuit[0] == self.CLOSED:
+            return
+        with self._lock:
+            state, _, opened_at, probing = circuit
+            if state == self.CLOSED:
+                return
+            retry_after = opened_at + self.recovery_timeout - self.clock()
+            if state == self.OPEN and retry_after <= 0:
+                circuit[0] = self.HALF_OPEN
+                circuit[3] = True
+                return
+            if state == self.HALF_OPEN and not probing:
+                circuit[3] = True
+                return
+        raise CircuitOpenError(endpoint, max(retry_after, 0))
+
+    def record(self, endpoint: str, failed: bool) -> None:
+        circuit = self._circuits.get(endpoint)
+        if not failed and (circuit is None or (circuit[0] == self.CLOSED and circuit[1] == 0)):
+            return
+        with self._lock:
+            circuit = self._circuits.setdefault(endpoint, [self.CLOSED, 0, 0.0, False])
+            circuit[3] = False
+            if not failed:
+                circuit[0], circuit[1] = self.CLOSED, 0
+                return
+            circuit[1] += 1
+            if circuit[0] == self.HALF_OPEN or circuit[1] >= self.failure_threshold:
+                circuit[0], circuit[2] = self.OPEN, self.clock()
+
+
+class AdaptiveTimeout:
+    """
+    Per-endpoint read timeout following the observed latency.
+
+    Keeps a smoothed latency and its mean deviation the way TCP estimates its
+    retransmission timeout, and proposes ``latency + 4 * deviation`` clamped
+    to ``[min_timeout, max_timeout]``. Until ``min_samples`` responses were
+    seen, ``max_timeout`` is used.
+    """
+
+    def __init__(
+        self, max_timeout: Optional[float], min_timeout: float = DEFAULT_MIN_READ_TIMEOUT, min_samples: int = 20
+    ):
+        self.max_timeout = max_timeout
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        # endpoint -> [smoothed latency, mean deviation, samples]
+        self._estimates: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, latency: float) -> None:
+        with self._lock:
+            estimate = self._estimates.get(endpoint)
+            if estimate is None:
+                self._estimates[endpoint] = [latency, latency / 2, 1]
+                return
+            smoothed, deviation, samples = estimate
+            estimate[1] = 0.75 * deviation + 0.25 * abs(latency - smoothed)
+            estimate[0] = 0.875 * smoothed + 0.125 * latency
+            estimate[2] = samples + 1
+
+    def get_timeout(self, endpoint: str) -> Optional[float]:
+        estimate = self._estimates.get(endpoint)
+        if estimate is None or estimate[2] < self.min_samples:
+            return self.max_timeout
+        timeout = max(self.min_timeout, estimate[0] + 4 * estimate[1])
+        return timeout if self.max_timeout is None else min(timeout, self.max_timeout)
@@ -1,30 +1,378 @@
 import base64
+import io
+import os
+import threading
 import uuid
-from typing import Optional
+import weakref
+from collections.abc import Iterable, Iterator
+from time import perf_counter
+from typing import TYPE_CHECKING, Optional
 
-import requests
+from getpaid_elavon import codec
+from getpaid_elavon.breaker import (
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_MIN_READ_TIMEOUT,
+    DEFAULT_RECOVERY_TIMEOUT,
+    AdaptiveTimeout,
+    CircuitBreaker,
+)
+from getpaid_elavon.metrics import get_endpoint, get_metrics
+from getpaid_elavon.types import BillingData, BuyerData, OrderRequest, PaymentSessionRequest
 
-from getpaid_elavon.types import BillingData, BuyerData
+if TYPE_CHECKING:
+    import asyncio
 
+    import httpx
+    import requests
 
-class Client:
-    def __init__(self, merchant_alias_id: str, secret_key: str, sandbox: bool = True):
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_ASYNC_POOL_MAXSIZE = 200
+DEFAULT_RETRY_STATUS_FORCELIST = (502, 503, 504)
+
+_sessions: "dict[tuple, requests.Session]" = {}
+_async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+_clients: dict[tuple, tuple] = {}
+_clients_lock = threading.Lock()
+_sessions_lock = threading.Lock()
+
+
+def import_httpx():
+    """
+    Import ``httpx`` on first use of the async client, it is an optional dependency.
+    """
+    try:
+        import httpx
+    except ImportError:  # pragma: no cover
+        raise ImportError("AsyncClient requires httpx, install django-getpaid-elavon[async]") from None
+    return httpx
+
+
+def get_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    max_retries: int = 0,
+    retry_backoff_factor: float = 0,
+    retry_status_forcelist: tuple = DEFAULT_RETRY_STATUS_FORCELIST,
+) -> "requests.Session":
+    """
+    Return the process-wide keep-alive session for the given pool configuration.
+
+    Sessions are shared between all clients using the same configuration,
+    so connections to the Elavon API are reused across payments.
+    """
+    key = (pool_connections, pool_maxsize, max_retries, retry_backoff_factor, tuple(retry_status_forcelist))
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+    # the HTTP stack is imported with the first client, not with the package
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            # Connect errors are retried for every method, as the request never
+            # reached Elavon. Read errors and status codes are retried only for
+            # idempotent GETs: a 502/504 may arrive after an order or payment
+            # session was already created, and retrying the POST would duplicate it.
+            retries = Retry(
+                total=max_retries,
+                read=0,
+                backoff_factor=retry_backoff_factor,
+                status_forcelist=retry_status_forcelist,
+                allowed_methods=frozenset({"GET"}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                max_retries=retries,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[key] = session
+    return session
+
+
+def get_async_session(
+    pool_maxsize: int = DEFAULT_ASYNC_POOL_MAXSIZE,
+    max_retries: int = 0,
+) -> "httpx.AsyncClient":
+    """
+    Return the keep-alive ``httpx.AsyncClient`` for the running event loop and pool configuration.
+
+    Async connections are bound to the loop they were opened in, so pools are
+    kept per loop and dropped together with it. ``pool_maxsize`` caps the
+    number of Elavon requests in flight per loop; further calls wait for a
+    free connection.
+    """
+    import asyncio
+
+    httpx = import_httpx()
+    loop = asyncio.get_running_loop()
+    key = (pool_maxsize, max_retries)
+    with _sessions_lock:
+        loop_sessions = _async_sessions.setdefault(loop, {})
+        session = loop_sessions.get(key)
+        if session is None:
+            session = loop_sessions[key] = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(
+                    limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+                    retries=max_retries,
+                ),
+            )
+    return session
+
+
+def get_client(client_class: type, **params) -> "BaseClient":
+    """
+    Return the process-wide client for ``(client_class, merchant_alias_id, sandbox)``.
+
+    The cached client is rebuilt whenever any of its parameters differ from
+    ``params``, so rotated credentials or changed settings take effect on the
+    next lookup.
+    """
+    key = (client_class, params.get("merchant_alias_id"), params.get("sandbox", True))
+    entry = _clients.get(key)
+    if entry is not None and entry[0] == params:
+        return entry[1]
+    with _clients_lock:
+        entry = _clients.get(key)
+        if entry is None or entry[0] != params:
+            entry = _clients[key] = (params, client_class(**params))
+    return entry[1]
+
+
+def clear_clients() -> None:
+    """
+    Forget all cached clients, e.g. when backend settings change.
+    """
+    with _clients_lock:
+        _clients.clear()
+
+
+def close_sessions() -> None:
+    """
+    Close and forget all blocking pooled sessions (e.g. after fork or in tests).
+
+    Async sessions have to be closed from their own event loop with :func:`aclose_sessions`.
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _reset_after_fork() -> None:
+    global _clients_lock, _sessions_lock
+    # another thread of the parent may have held a lock while forking
+    _clients_lock = threading.Lock()
+    _sessions_lock = threading.Lock()
+    close_sessions()
+
+
+if hasattr(os, "register_at_fork"):
+    # workers forked after warm-up (e.g. gunicorn --preload) must not share the pooled sockets of their parent
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+async def aclose_sessions() -> None:
+    """
+    Close and forget the async pooled sessions of the running event loop (e.g. on ASGI shutdown).
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    with _sessions_lock:
+        loop_sessions = _async_sessions.pop(loop, {})
+    for session in loop_sessions.values():
+        await session.aclose()
+
+
+def join_chunks(chunks: Iterator[bytes]) -> bytes:
+    """
+    Join encoded body fragments as they are produced, without first collecting them like ``b"".join()``.
+    """
+    buffer = io.BytesIO()
+    for chunk in chunks:
+        buffer.write(chunk)
+    # hands over the buffer without copying it
+    return buffer.getvalue()
+
+
+class BaseClient:
+    """
+    Request building shared by the blocking and the asyncio client.
+    """
+
+    sandbox_url = "https://uat.api.converge.eu.elavonaws.com"
+    production_url = "https://api.eu.elavonpayments.com"
+    _cached_headers = None
+    _cached_credentials = None
+
+    def __init__(
+        self,
+        merchant_alias_id: str,
+        secret_key: str,
+        sandbox: bool = True,
+        connect_timeout: Optional[float] = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: Optional[float] = DEFAULT_READ_TIMEOUT,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        max_retries: int = 0,
+        retry_backoff_factor: float = 0,
+        retry_status_forcelist: tuple = DEFAULT_RETRY_STATUS_FORCELIST,
+        async_pool_maxsize: int = DEFAULT_ASYNC_POOL_MAXSIZE,
+        circuit_breaker_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        circuit_breaker_recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+        adaptive_timeout: bool = False,
+        min_read_timeout: float = DEFAULT_MIN_READ_TIMEOUT,
+        base_url: Optional[str] = None,
+        stream_order_body: bool = False,
+    ):
         self.merchant_alias_id = merchant_alias_id
         self.secret_key = secret_key
         self.sandbox = sandbox
-        self.sandbox_url = "https://uat.api.converge.eu.elavonaws.com"
-        self.production_url = "https://api.eu.elavonpayments.com"
+        # overrides sandbox/production, e.g. to point at getpaid_elavon.fake_server
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.retry_backoff_factor = retry_backoff_factor
+        self.retry_status_forcelist = tuple(retry_status_forcelist)
+        self.async_pool_maxsize = async_pool_maxsize
+        self.circuit_breaker = (
+            CircuitBreaker(circuit_breaker_threshold, circuit_breaker_recovery_timeout)
+            if circuit_breaker_threshold
+            else None
+        )
+        self.adaptive_timeout = AdaptiveTimeout(read_timeout, min_read_timeout) if adaptive_timeout else None
+        self.stream_order_body = stream_order_body
 
     def get_baseurl(self) -> str:
+        if self.base_url:
+            return self.base_url
         return self.sandbox_url if self.sandbox else self.production_url
 
+    @staticmethod
+    def _order_request(
+        order_reference: str,
+        total_amount: str,
+        currency_code: str,
+        description: str,
+        items: Iterable,
+        custom_reference: uuid.UUID,
+    ) -> OrderRequest:
+        return OrderRequest(order_reference, total_amount, currency_code, description, items, custom_reference)
+
+    def _payment_session_payload(
+        self,
+        elavon_order_url: str,
+        return_url: str,
+        cancel_url: str,
+        custom_reference: uuid.UUID,
+        buyer_info: BuyerData,
+    ) -> dict:
+        return PaymentSessionRequest(
+            elavon_order_url,
+            return_url,
+            cancel_url,
+            custom_reference,
+            email=buyer_info.get("email"),
+            bill_to=self._transform_buyer_data(buyer_info),
+        ).to_dict()
+
+    @staticmethod
+    def _transform_buyer_data(
+        buyer_info: BuyerData,
+    ) -> Optional[BillingData]:
+        """
+        Transform buyer data
+        Args:
+            buyer_info: Buyer data with nested billing information
+        """
+        billing = buyer_info.get("billing")
+        return billing and {
+            "countryCode": billing.get("countryCode"),
+            "company": billing.get("company"),
+            "street1": billing.get("street1"),
+            "city": billing.get("city"),
+            "postalCode": billing.get("postalCode"),
+            "email": buyer_info.get("email", ""),
+            "primaryPhone": buyer_info.get("phone"),
+        }
+
+    def _headers(self) -> dict:
+        credentials = (self.merchant_alias_id, self.secret_key)
+        if self._cached_headers is None or self._cached_credentials != credentials:
+            auth_string = f"{self.merchant_alias_id}:{self.secret_key}"
+            encoded_auth = base64.b64encode(auth_string.encode()).decode()
+            self._cached_headers = {
+                "Authorization": f"Basic {encoded_auth}",
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+            }
+            self._cached_credentials = credentials
+        return self._cached_headers
+
+    def _before_request(self, endpoint: str) -> tuple:
+        """
+        Fail fast when the endpoint's circuit is open, otherwise return the ``(connect, read)`` timeout to use.
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call(endpoint)
+        if self.adaptive_timeout is None:
+            return self.timeout
+        return self.timeout[0], self.adaptive_timeout.get_timeout(endpoint)
+
+    def _record_request(self, method: str, endpoint: str, response, started: float) -> None:
+        """
+        Feed the outcome of an Elavon API call to the circuit breaker, the adaptive timeout and the metrics.
+
+        ``response`` is ``None`` when no response arrived (connection error, timeout).
+        """
+        elapsed = perf_counter() - started
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(endpoint, response is None or response.status_code >= 500)
+        if self.adaptive_timeout is not None and response is not None:
+            self.adaptive_timeout.observe(endpoint, elapsed)
+        metrics = get_metrics()
+        if metrics is None:
+            return
+        metrics.observe(
+            "elavon_api_request_duration_seconds",
+            elapsed,
+            endpoint=endpoint,
+            method=method,
+            status=str(response.status_code) if response is not None else "error",
+            merchant_alias=self.merchant_alias_id,
+        )
+
+
+class Client(BaseClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = get_session(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.max_retries,
+            retry_backoff_factor=self.retry_backoff_factor,
+            retry_status_forcelist=self.retry_status_forcelist,
+        )
+
     def create_order(
         self,
         order_reference: str,
         total_amount: str,
         currency_code: str,
         description: str,
-        items: list[dict],
+        items: Iterable,
         custom_reference: uuid.UUID,
     ) -> dict:
         """
@@ -35,27 +383,21 @@ class Client:
             total_amount: Total amount as string (e.g., "100.00")
             currency_code: Currency code (e.g., "USD", "EUR")
             description: Order description
-            items: List of items, each with 'total'
-            (dict with 'amount' and 'currencyCode') and 'description'
+            items: List of :class:`~getpaid_elavon.types.OrderItem` or dicts, each with 'total'
+            (dict with 'amount' and 'currencyCode') and 'description'. Any other iterable,
+            e.g. a generator, is encoded chunk by chunk while it is consumed, and with
+            ``stream_order_body`` sent as a chunked request body without buffering it
             custom_reference: Custom reference (payment id : uuid) for the order
 
         Returns:
             Dict containing order details including 'id' and 'url'
         """
-        payload = {
-            "orderReference": order_reference,
-            "total": {
-                "currencyCode": currency_code,
-                "amount": total_amount,
-            },
-            "description": description,
-            "items": items,
-            "customReference": str(custom_reference),
-        }
+        order = self._order_request(order_reference, total_amount, currency_code, description, items, custom_reference)
         url = f"{self.get_baseurl()}/orders"
-        response = requests.post(url, json=payload, headers=self._headers())
-        response.raise_for_status()
-        return response.json()
+        if isinstance(items, (list, tuple)):
+            return self._post(url, order.to_dict())
+        chunks = order.iter_encode()
+        return self._send("POST", url, data=chunks if self.stream_order_body else join_chunks(chunks))
 
     def create_payment_session(
         self,
@@ -79,49 +421,169 @@ class Client:
         Returns:
             Dict containing session details including 'href' URL for redirect
         """
-        payload = {
-            "order": elavon_order_url,
-            "returnUrl": return_url,
-            "cancelUrl": cancel_url,
-            "doCreateTransaction": True,
-            "hppType": "fullPageRedirect",
-            "customReference": str(custom_reference),
-            "shopperEmailAddress": buyer_info.get("email"),
-        }
+        payload = self._payment_session_payload(elavon_order_url, return_url, cancel_url, custom_reference, buyer_info)
+        url = f"{self.get_baseurl()}/payment-sessions"
+        return self._post(url, payload)
 
-        bill_to = self._transform_buyer_data(buyer_info)
+    def get_payment_session(self, payment_session_id: str) -> dict:
+        """
+        Fetch a payment session.
 
-        if bill_to:
-            payload["billTo"] = bill_to
-        url = f"{self.get_baseurl()}/payment-sessions"
-        response = requests.post(url, json=payload, headers=self._headers())
+        Args:
+            payment_session_id: Elavon payment session id (``Payment.external_id``)
+
+        Returns:
+            Dict with session details including 'transaction' URL once the shopper paid
+        """
+        return self.get_resource(f"{self.get_baseurl()}/payment-sessions/{payment_session_id}")
+
+    def get_resource(self, url: str) -> dict:
+        """
+        Fetch any Elavon API resource by its full URL, e.g. the 'transaction' of a payment session.
+        """
+        return self._send("GET", url)
+
+    def open_connections(self, count: int) -> int:
+        """
+        Open up to ``count`` keep-alive connections to the base URL and leave them in the pool.
+
+        Resolves the host and completes the TCP and TLS handshakes without
+        sending any request, so the first API calls of a new worker find a
+        warm connection. At most ``pool_maxsize`` connections are kept.
+        urllib3 has no public API for this, so nothing is opened on urllib3
+        versions before 2, whose pool internals were not verified.
+
+        Returns:
+            Number of warm connections
+        """
+        import requests
+        import urllib3
+
+        url = self.get_baseurl()
+        adapter = self.session.get_adapter(url)
+        environment = self.session.merge_environment_settings(url, {}, None, None, None)
+        if hasattr(adapter, "get_connection_with_tls_context"):
+            # the pool requests picks for this URL, its key includes the TLS settings
+            pool = adapter.get_connection_with_tls_context(
+                requests.Request("GET", url).prepare(),
+                verify=environment["verify"],
+                proxies=environment["proxies"],
+                cert=environment["cert"],
+            )
+        else:  # requests < 2.32.2
+            pool = adapter.get_connection(url, environment["proxies"])
+            adapter.cert_verify(pool, url, environment["verify"], environment["cert"])
+        if int(urllib3.__version__.split(".")[0]) < 2 or not hasattr(pool, "_get_conn"):
+            return 0
+        connections = []
+        try:
+            for _ in range(min(count, self.pool_maxsize)):
+                connection = pool._get_conn()
+                connections.append(connection)
+                if connection.sock is None:
+                    connection.timeout = self.timeout[0]
+                    connection.connect()
+        finally:
+            for connection in connections:
+                pool._put_conn(connection)
+        return len(connections)
+
+    def _post(self, url: str, payload: dict) -> dict:
+        return self._send("POST", url, data=codec.dumps(payload))
+
+    def _send(self, method: str, url: str, **kwargs) -> dict:
+        endpoint = get_endpoint(url)
+        timeout = self._before_request(endpoint)
+        response = None
+        started = perf_counter()
+        try:
+            response = self.session.request(method, url, headers=self._headers(), timeout=timeout, **kwargs)
+        finally:
+            self._record_request(method, endpoint, response, started)
         response.raise_for_status()
-        return response.json()
+        return codec.loads(response.content)
 
-    @staticmethod
-    def _transform_buyer_data(
+
+class AsyncClient(BaseClient):
+    """
+    Non-blocking counterpart of :class:`Client` for ASGI deployments, built on ``httpx``.
+
+    Only connect errors are retried, by the transport: a gateway error may
+    arrive after Elavon has created the order or session, so ``POST``
+    requests are never retried on status, like with :class:`Client`.
+    """
+
+    def __init__(self, *args, transport: "Optional[httpx.AsyncBaseTransport]" = None, **kwargs):
+        import_httpx()
+        super().__init__(*args, **kwargs)
+        self.transport = transport
+        self._session = None
+
+    def get_session(self) -> "httpx.AsyncClient":
+        if self.transport is None:
+            return get_async_session(pool_maxsize=self.async_pool_maxsize, max_retries=self.max_retries)
+        if self._session is None:
+            self._session = import_httpx().AsyncClient(transport=self.transport)
+        return self._session
+
+    async def aclose(self) -> None:
+        """
+        Close the dedicated session created for a custom ``transport``.
+
+        Shared pools are closed with :func:`aclose_sessions`.
+        """
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+
+    async def create_order(
+        self,
+        order_reference: str,
+        total_amount: str,
+        currency_code: str,
+        description: str,
+        items: Iterable,
+        custom_reference: uuid.UUID,
+    ) -> dict:
+        """
+        Create an order on Elavon Payment Gateway, see :meth:`Client.create_order`.
+
+        Item iterables are encoded chunk by chunk and joined into one body.
+        """
+        order = self._order_request(order_reference, total_amount, currency_code, description, items, custom_reference)
+        url = f"{self.get_baseurl()}/orders"
+        if isinstance(items, (list, tuple)):
+            return await self._post(url, order.to_dict())
+        return await self._post_body(url, join_chunks(order.iter_encode()))
+
+    async def create_payment_session(
+        self,
+        elavon_order_url: str,
+        return_url: str,
+        cancel_url: str,
+        custom_reference: uuid.UUID,
         buyer_info: BuyerData,
-    ) -> Optional[BillingData]:
+    ) -> dict:
         """
-        Transform buyer data
-        Args:
-            buyer_info: Buyer data with nested billing information
+        Create payment session for Hosted Payments Redirect, see :meth:`Client.create_payment_session`.
         """
-        billing = buyer_info.get("billing")
-        return billing and {
-            "countryCode": billing.get("countryCode"),
-            "company": billing.get("company"),
-            "street1": billing.get("street1"),
-            "city": billing.get("city"),
-            "postalCode": billing.get("postalCode"),
-            "email": buyer_info.get("email", ""),
-            "primaryPhone": buyer_info.get("phone"),
-        }
+        payload = self._payment_session_payload(elavon_order_url, return_url, cancel_url, custom_reference, buyer_info)
+        url = f"{self.get_baseurl()}/payment-sessions"
+        return await self._post(url, payload)
 
-    def _headers(self) -> dict:
-        auth_string = f"{self.merchant_alias_id}:{self.secret_key}"
-        encoded_auth = base64.b64encode(auth_string.encode()).decode()
-        return {
-            "Authorization": f"Basic {encoded_auth}",
-            "Accept": "application/json",
-        }
+    async def _post(self, url: str, payload: dict) -> dict:
+        return await self._post_body(url, codec.dumps(payload))
+
+    async def _post_body(self, url: str, body: bytes) -> dict:
+        httpx = import_httpx()
+        endpoint = get_endpoint(url)
+        connect_timeout, read_timeout = self._before_request(endpoint)
+        timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        response = None
+        started = perf_counter()
+        try:
+            response = await self.get_session().post(url, content=body, headers=self._headers(), timeout=timeout)
+        finally:
+            self._record_request("POST", endpoint, response, started)
+        response.raise_for_status()
+        return codec.loads(response.content)
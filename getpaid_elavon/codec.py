@@ -0,0 +1,98 @@
+import json
+import threading
+import uuid
+from decimal import Decimal
+from importlib import import_module
+from importlib.util import find_spec
+from typing import Any, Optional, Union
+
+from getpaid_elavon.utils import get_setting
+
+# orjson.JSONDecodeError subclasses it, so one except clause covers every codec
+JSONDecodeError = json.JSONDecodeError
+
+_codec = None
+_codec_lock = threading.Lock()
+
+
+def default(obj: Any) -> str:
+    """
+    Serialize values the JSON libraries do not handle natively, e.g. amounts and payment ids.
+    """
+    if isinstance(obj, (Decimal, uuid.UUID)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JSONCodec:
+    """
+    Interface of the JSON backends used for Elavon API bodies and webhooks, selected with ``json_codec``.
+
+    :meth:`dumps` returns compact UTF-8 ``bytes`` ready to be sent,
+    :meth:`loads` accepts ``bytes`` or ``str`` and raises ``json.JSONDecodeError``.
+    """
+
+    def dumps(self, obj: Any, sort_keys: bool = False) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        raise NotImplementedError
+
+
+class StdlibJSONCodec(JSONCodec):
+    def dumps(self, obj: Any, sort_keys: bool = False) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, sort_keys=sort_keys, default=default).encode()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise ImportError("OrjsonCodec requires orjson, install django-getpaid-elavon[orjson]") from None
+        self.orjson = orjson
+
+    def dumps(self, obj: Any, sort_keys: bool = False) -> bytes:
+        return self.orjson.dumps(obj, default=default, option=self.orjson.OPT_SORT_KEYS if sort_keys else 0)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self.orjson.loads(data)
+
+
+def get_codec() -> JSONCodec:
+    """
+    Return the codec configured with ``json_codec``, or orjson when installed, or the stdlib ``json``.
+    """
+    global _codec
+    if _codec is not None:
+        return _codec
+    with _codec_lock:
+        if _codec is None:
+            class_path: Optional[Union[str, type]] = get_setting("json_codec")
+            if class_path is None:
+                class_path = OrjsonCodec if find_spec("orjson") is not None else StdlibJSONCodec
+            if isinstance(class_path, str):
+                module_name, _, class_name = class_path.rpartition(".")
+                class_path = getattr(import_module(module_name), class_name)
+            _codec = class_path()
+    return _codec
+
+
+def reset_codec() -> None:
+    """
+    Drop the codec, so the next :func:`get_codec` call reads the settings again.
+    """
+    global _codec
+    with _codec_lock:
+        _codec = None
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    return get_codec().dumps(obj, sort_keys=sort_keys)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return get_codec().loads(data)
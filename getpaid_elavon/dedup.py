@@ -0,0 +1,97 @@
+import itertools
+from datetime import timedelta
+from typing import Optional
+
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+
+from getpaid_elavon.models import WebhookDelivery
+from getpaid_elavon.utils import get_setting
+from getpaid_elavon.webhooks import get_payment_session_id
+
+CACHE_KEY_PREFIX = "getpaid_elavon:webhook:"
+
+
+def get_event_key(data: dict) -> Optional[str]:
+    """
+    Identify a notification by its id, or by (payment session, event type) when it has none.
+    """
+    event_id = data.get("id")
+    if event_id:
+        return f"id:{event_id}"[:200]
+    payment_session_id = get_payment_session_id(data)
+    if payment_session_id is None:
+        return None
+    return f"session:{payment_session_id}:{data.get('eventType')}"[:200]
+
+
+class WebhookDeduplicator:
+    """
+    Two-tier store of handled notifications.
+
+    A cache entry answers redeliveries without any query. On a cache miss
+    the key is inserted into the ``WebhookDelivery`` table, whose unique
+    constraint decides races between concurrent deliveries; rows older than
+    ``ttl`` are evicted every ``evict_every`` claims. The cache entry is only
+    written once the claiming transaction commits.
+    """
+
+    _claims = itertools.count(1)
+
+    def __init__(self, cache_alias: str = "default", ttl: int = 86400, evict_every: int = 1000):
+        self.cache = caches[cache_alias]
+        self.ttl = ttl
+        self.evict_every = evict_every
+
+    @classmethod
+    def from_settings(cls) -> "WebhookDeduplicator":
+        return cls(
+            cache_alias=get_setting("webhook_dedup_cache", "default"),
+            ttl=get_setting("webhook_dedup_ttl", 86400),
+            evict_every=get_setting("webhook_dedup_evict_every", 1000),
+        )
+
+    def seen(self, data: dict) -> bool:
+        """
+        Whether the cache knows the notification as handled, without any query.
+        """
+        event_key = get_event_key(data)
+        return event_key is not None and self.cache.get(CACHE_KEY_PREFIX + event_key) is not None
+
+    def claim(self, data: dict) -> bool:
+        """
+        Record the notification as being handled. Returns False for a duplicate.
+
+        Claim inside the transaction that applies (or enqueues) the event:
+        when it rolls back, so does the claim, and a redelivery is processed.
+        """
+        event_key = get_event_key(data)
+        if event_key is None:
+            return True
+        cache_key = CACHE_KEY_PREFIX + event_key
+        if self.cache.get(cache_key) is not None:
+            return False
+        try:
+            with transaction.atomic():
+                WebhookDelivery.objects.create(event_key=event_key)
+        except IntegrityError:
+            return False
+        transaction.on_commit(lambda: self.cache.set(cache_key, 1, self.ttl))
+        if next(self._claims) % self.evict_every == 0:
+            self.evict()
+        return True
+
+    def release(self, data: dict) -> None:
+        """
+        Forget a claimed notification whose handling failed, so a redelivery is processed.
+        """
+        event_key = get_event_key(data)
+        if event_key is None:
+            return
+        self.cache.delete(CACHE_KEY_PREFIX + event_key)
+        WebhookDelivery.objects.filter(event_key=event_key).delete()
+
+    def evict(self) -> int:
+        deleted, _ = WebhookDelivery.objects.filter(created_on__lt=now() - timedelta(seconds=self.ttl)).delete()
+        return deleted
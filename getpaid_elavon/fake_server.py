@@ -0,0 +1,386 @@
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from getpaid_elavon.types import PaymentStatus, TransactionState
+from getpaid_elavon.webhooks import compute_signature, get_signature_header_name
+
+SESSION_LIFETIME = timedelta(minutes=15)
+DEFAULT_WEBHOOK_TIMEOUT = 10
+
+
+def format_datetime(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def error_payload(code: str, description: str) -> dict:
+    return {"failures": [{"code": code, "description": description}]}
+
+
+class FakeElavonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # send each response in one segment, avoiding delayed-ACK stalls on keep-alive connections
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method: str) -> None:
+        body = self.read_body()
+        base_url = f"http://{self.headers.get('Host') or self.server.fake.netloc}"
+        status, payload = self.server.fake.respond(method, self.path, self.headers, body, base_url)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = bytearray()
+        while True:
+            size = int(self.rfile.readline().split(b";", 1)[0], 16)
+            if not size:
+                # skip trailers up to the terminating blank line
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return bytes(body)
+            body += self.rfile.read(size)
+            self.rfile.readline()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeElavonServer:
+    """
+    In-process stand-in for the Elavon API, for load tests and offline development.
+
+    Answers the orders, payment sessions and transactions endpoints used by
+    :class:`~getpaid_elavon.client.Client` after ``latency`` seconds plus up
+    to ``jitter`` seconds, and fails a random ``error_rate`` share of the
+    requests with ``error_status``. Point the backend at it with the
+    ``base_url`` setting.
+
+    Every payment session is paid ``webhook_delay`` seconds after it was
+    created; ``decline_rate`` of the payments are declined. The session then
+    references its transaction, and when ``webhook_url`` is set the
+    ``saleAuthorizationPending`` and final notifications are POSTed there,
+    signed with ``webhook_shared_secret`` like Elavon does. Redelivery and
+    ordering scenarios:
+
+    - ``out_of_order``: the final notification is delivered before the pending one,
+    - ``redeliveries``: every notification is delivered that many more times,
+      ``redelivery_delay`` seconds later, with the same notification id,
+    - failed deliveries (non-2xx or connection errors) are retried up to
+      ``webhook_max_attempts`` times with exponential backoff.
+
+    Usage::
+
+        with FakeElavonServer(webhook_url="http://127.0.0.1:8000/elavon/callback/", ...) as server:
+            settings.GETPAID_BACKEND_SETTINGS["getpaid_elavon"]["base_url"] = server.url
+            ...
+            server.wait_idle()
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        webhook_url: Optional[str] = None,
+        webhook_shared_secret: Optional[str] = None,
+        webhook_signer_id: Optional[str] = None,
+        webhook_delay: float = 0.0,
+        decline_rate: float = 0.0,
+        out_of_order: bool = False,
+        redeliveries: int = 0,
+        redelivery_delay: float = 1.0,
+        webhook_max_attempts: int = 3,
+        webhook_retry_backoff: float = 0.5,
+        webhook_workers: int = 4,
+        auto_pay: bool = True,
+        seed: Optional[int] = None,
+    ):
+        if webhook_url and not (webhook_shared_secret and webhook_signer_id):
+            raise ValueError("webhook_url requires webhook_shared_secret and webhook_signer_id")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.webhook_url = webhook_url
+        self.webhook_shared_secret = webhook_shared_secret
+        self.webhook_header = get_signature_header_name(webhook_signer_id) if webhook_signer_id else None
+        self.webhook_delay = webhook_delay
+        self.decline_rate = decline_rate
+        self.out_of_order = out_of_order
+        self.redeliveries = redeliveries
+        self.redelivery_delay = redelivery_delay
+        self.webhook_max_attempts = webhook_max_attempts
+        self.webhook_retry_backoff = webhook_retry_backoff
+        self.auto_pay = auto_pay
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._resources: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._webhook_session = requests.Session()
+
+        # payments and webhook deliveries wait in a heap ordered by due time, then run on a small pool
+        self._scheduled: list = []
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=webhook_workers, thread_name_prefix="fake-elavon-webhook")
+        self._serving = False
+
+        self.httpd = ThreadingHTTPServer((host, port), FakeElavonHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+
+    @property
+    def netloc(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.netloc}"
+
+    def start(self) -> "FakeElavonServer":
+        """
+        Serve in background threads and return the server.
+        """
+        self._serving = True
+        threading.Thread(target=self._run_scheduler, name="fake-elavon-scheduler", daemon=True).start()
+        threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, name="fake-elavon-http", daemon=True
+        ).start()
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        Serve in the calling thread until interrupted, e.g. from a management command.
+        """
+        self._serving = True
+        threading.Thread(target=self._run_scheduler, name="fake-elavon-scheduler", daemon=True).start()
+        try:
+            self.httpd.serve_forever(poll_interval=0.05)
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._serving:
+            self._serving = False
+            self.httpd.shutdown()
+        self.httpd.server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._webhook_session.close()
+
+    def __enter__(self) -> "FakeElavonServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every scheduled payment and webhook delivery ran. Returns False on timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+
+    def get_resource(self, path: str) -> Optional[dict]:
+        """
+        Return a stored resource by its path, e.g. ``payment-sessions/<id>``.
+        """
+        return self._resources.get(path.strip("/"))
+
+    def respond(self, method: str, path: str, headers, body: bytes, base_url: str) -> tuple[int, dict]:
+        """
+        Answer one API request, returns ``(status, payload)``.
+        """
+        self._count("requests")
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if not (headers.get("Authorization") or "").startswith("Basic "):
+            return 401, error_payload("unauthorized", "Missing or invalid credentials")
+        if self.error_rate and self._random.random() < self.error_rate:
+            self._count("errors")
+            return self.error_status, error_payload("serviceUnavailable", "Injected error")
+
+        segments = urlsplit(path).path.strip("/").split("/")
+        if method == "POST" and len(segments) == 1 and segments[0] in ("orders", "payment-sessions"):
+            try:
+                data = json.loads(body)
+            except ValueError:
+                return 400, error_payload("invalidJson", "Request body is not valid JSON")
+            if segments[0] == "orders":
+                return 201, self.create_order(data, base_url)
+            return 201, self.create_payment_session(data, base_url)
+        if method == "GET" and len(segments) == 2:
+            resource = self.get_resource("/".join(segments))
+            if resource is not None:
+                return 200, resource
+        return 404, error_payload("notFound", "Resource not found")
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _new_id(self) -> str:
+        return f"{self._random.getrandbits(112):028x}"
+
+    def _store(self, kind: str, resource: dict, base_url: str) -> dict:
+        resource["href"] = f"{base_url}/{kind}/{resource['id']}"
+        with self._lock:
+            self._resources[f"{kind}/{resource['id']}"] = resource
+        return resource
+
+    def create_order(self, data: dict, base_url: str) -> dict:
+        created_at = format_datetime(datetime.now(timezone.utc))
+        order = {**data, "id": self._new_id(), "createdAt": created_at, "modifiedAt": created_at}
+        return self._store("orders", order, base_url)
+
+    def create_payment_session(self, data: dict, base_url: str) -> dict:
+        created_at = datetime.now(timezone.utc)
+        session_id = self._new_id()
+        session = {
+            **data,
+            "id": session_id,
+            "url": f"{base_url}/hpp/?sessionId={session_id}",
+            "createdAt": format_datetime(created_at),
+            "modifiedAt": format_datetime(created_at),
+            "expiresAt": format_datetime(created_at + SESSION_LIFETIME),
+            "hppType": "fullPageRedirect",
+            "transaction": None,
+        }
+        self._store("payment-sessions", session, base_url)
+        if self.auto_pay:
+            self.schedule(self.webhook_delay, self.pay, session_id)
+        return session
+
+    def pay(self, session_id: str, declined: Optional[bool] = None) -> None:
+        """
+        Complete a payment session as the shopper would and send its notifications.
+        """
+        session = self.get_resource(f"payment-sessions/{session_id}")
+        if declined is None:
+            declined = self._random.random() < self.decline_rate
+        base_url = session["href"].rsplit("/payment-sessions/", 1)[0]
+        transaction = {
+            "id": self._new_id(),
+            "type": "sale",
+            "state": (TransactionState.DECLINED if declined else TransactionState.AUTHORIZED).value,
+            "order": session.get("order"),
+            "customReference": session.get("customReference"),
+            "createdAt": format_datetime(datetime.now(timezone.utc)),
+        }
+        self._store("transactions", transaction, base_url)
+        session["transaction"] = transaction["href"]
+        self._count("declined" if declined else "authorized")
+
+        if not self.webhook_url:
+            return
+        events = [
+            PaymentStatus.SALE_AUTHORIZATION_PENDING,
+            PaymentStatus.SALE_DECLINED if declined else PaymentStatus.SALE_AUTHORIZED,
+        ]
+        if self.out_of_order:
+            events.reverse()
+        bodies = [self.build_notification(session, event_type) for event_type in events]
+        # in order within a sequence, so the receiver sees exactly the configured ordering
+        self.schedule(0, self._deliver_all, bodies)
+        for attempt in range(1, self.redeliveries + 1):
+            self.schedule(self.redelivery_delay * attempt, self._deliver_all, bodies)
+
+    def build_notification(self, session: dict, event_type: PaymentStatus) -> bytes:
+        notification_id = self._new_id()
+        base_url = session["href"].rsplit("/payment-sessions/", 1)[0]
+        notification = {
+            "id": notification_id,
+            "href": f"{base_url}/notifications/{notification_id}",
+            "createdAt": format_datetime(datetime.now(timezone.utc)),
+            "resourceType": "paymentSession",
+            "resource": session["href"],
+            "eventType": event_type.value,
+            "customReference": session.get("customReference"),
+        }
+        return json.dumps(notification).encode()
+
+    def schedule(self, delay: float, func, *args) -> None:
+        with self._condition:
+            heapq.heappush(self._scheduled, (time.monotonic() + delay, next(self._sequence), func, args))
+            self._pending += 1
+            self._condition.notify_all()
+
+    def _run_scheduler(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopping and (not self._scheduled or self._scheduled[0][0] > time.monotonic()):
+                    self._condition.wait(self._scheduled[0][0] - time.monotonic() if self._scheduled else None)
+                if self._stopping:
+                    return
+                _, _, func, args = heapq.heappop(self._scheduled)
+            self._executor.submit(self._run, func, args)
+
+    def _run(self, func, args) -> None:
+        try:
+            func(*args)
+        except Exception:
+            self._count("task_errors")
+        finally:
+            with self._condition:
+                self._pending -= 1
+                self._condition.notify_all()
+
+    def _deliver_all(self, bodies: list) -> None:
+        for body in bodies:
+            self.deliver(body)
+
+    def deliver(self, body: bytes) -> bool:
+        """
+        POST a signed notification to ``webhook_url``, retrying failed deliveries. Returns whether it was accepted.
+        """
+        headers = {
+            "Content-Type": "application/json",
+            self.webhook_header: compute_signature(body, self.webhook_shared_secret),
+        }
+        for attempt in range(self.webhook_max_attempts):
+            if attempt:
+                time.sleep(self.webhook_retry_backoff * 2 ** (attempt - 1))
+            try:
+                response = self._webhook_session.post(
+                    self.webhook_url, data=body, headers=headers, timeout=DEFAULT_WEBHOOK_TIMEOUT
+                )
+            except requests.RequestException:
+                continue
+            if response.ok:
+                self._count("webhooks_delivered")
+                return True
+        self._count("webhooks_failed")
+        return False
@@ -0,0 +1,34 @@
+import swapper
+from django.core.management.base import BaseCommand
+
+from getpaid_elavon.models import PaymentSession
+
+
+class Command(BaseCommand):
+    help = "Create PaymentSession mappings for Elavon payments created before the mapping table existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Mappings inserted per query.")
+
+    def handle(self, *args, batch_size, **options):
+        Payment = swapper.load_model("getpaid", "Payment")
+        payments = (
+            Payment.objects.filter(backend="getpaid_elavon", elavon_sessions__isnull=True)
+            .exclude(external_id="")
+            .order_by("pk")
+            .values_list("pk", "external_id")
+        )
+        created = 0
+        last_pk = None
+        while True:
+            batch = list((payments.filter(pk__gt=last_pk) if last_pk else payments)[:batch_size])
+            if not batch:
+                break
+            PaymentSession.objects.bulk_create(
+                [PaymentSession(session_id=external_id, payment_id=pk) for pk, external_id in batch],
+                ignore_conflicts=True,
+            )
+            created += len(batch)
+            last_pk = batch[-1][0]
+            self.stdout.write(f"{created} payment(s) mapped")
+        self.stdout.write(self.style.SUCCESS(f"Done: {created} payment(s) mapped."))
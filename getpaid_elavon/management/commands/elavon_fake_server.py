@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from getpaid_elavon.fake_server import FakeElavonServer
+from getpaid_elavon.utils import get_setting
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a fake Elavon API for load tests and offline development. "
+        "Point the backend at it with the base_url setting."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8089)
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+        parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many random extra seconds.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing (0-1).")
+        parser.add_argument("--error-status", type=int, default=503, help="Status code of injected errors.")
+        parser.add_argument("--webhook-url", default=None, help="Callback URL receiving signed notifications.")
+        parser.add_argument("--webhook-delay", type=float, default=1.0, help="Seconds until a session is paid.")
+        parser.add_argument("--decline-rate", type=float, default=0.0, help="Share of payments declined (0-1).")
+        parser.add_argument("--out-of-order", action="store_true", help="Deliver final events before pending ones.")
+        parser.add_argument("--redeliveries", type=int, default=0, help="Extra deliveries of every notification.")
+        parser.add_argument("--redelivery-delay", type=float, default=1.0, help="Seconds between redeliveries.")
+        parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible latencies and outcomes.")
+
+    def handle(self, *args, webhook_url, **options):
+        shared_secret = get_setting("webhook_shared_secret")
+        if shared_secret is not None and not isinstance(shared_secret, str):
+            # sign with the newest of the rotated secrets
+            shared_secret = shared_secret[0]
+        server = FakeElavonServer(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+            webhook_url=webhook_url,
+            webhook_shared_secret=shared_secret,
+            webhook_signer_id=get_setting("webhook_signer_id"),
+            webhook_delay=options["webhook_delay"],
+            decline_rate=options["decline_rate"],
+            out_of_order=options["out_of_order"],
+            redeliveries=options["redeliveries"],
+            redelivery_delay=options["redelivery_delay"],
+            seed=options["seed"],
+        )
+        self.stdout.write(f"Fake Elavon API listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(", ".join(f"{key}: {value}" for key, value in sorted(server.stats.items())) or "No requests.")
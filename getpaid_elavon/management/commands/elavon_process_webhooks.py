@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from getpaid_elavon.queues import get_webhook_queue
+
+
+class Command(BaseCommand):
+    help = "Apply queued Elavon webhook events (webhook_processing = 'queue')."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Events claimed per transaction.")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit.")
+
+    def handle(self, *args, batch_size, sleep, once, **options):
+        queue = get_webhook_queue()
+        total = 0
+        while True:
+            processed = queue.process(limit=batch_size)
+            total += processed
+            if processed:
+                continue
+            if once:
+                break
+            time.sleep(sleep)
+        self.stdout.write(f"Processed {total} webhook event(s).")
@@ -0,0 +1,102 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import swapper
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from getpaid.types import PaymentStatus as ps
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch payment session and transaction state from the Elavon API for unfinished payments "
+        "and apply the transitions missed webhooks would have triggered."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status",
+            action="append",
+            dest="statuses",
+            help=f"Payment status to reconcile, may be repeated (default: {ps.NEW}, {ps.PREPARED}, {ps.PRE_AUTH}).",
+        )
+        parser.add_argument("--batch-size", type=int, default=100, help="Payments fetched per batch.")
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent Elavon API requests.")
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many payments.")
+        parser.add_argument(
+            "--checkpoint",
+            default=None,
+            help="JSON file storing the last reconciled payment, used to resume an interrupted run.",
+        )
+
+    def handle(self, *args, statuses, batch_size, workers, limit, checkpoint, **options):
+        Payment = swapper.load_model("getpaid", "Payment")
+        queryset = (
+            Payment.objects.filter(
+                backend="getpaid_elavon",
+                status__in=statuses or [ps.NEW, ps.PREPARED, ps.PRE_AUTH],
+            )
+            .exclude(external_id="")
+            .order_by("pk")
+        )
+        last_pk = self.read_checkpoint(checkpoint)
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        total = queryset.count() if limit is None else min(queryset.count(), limit)
+        self.stdout.write(f"Reconciling {total} payment(s)" + (f" after {last_pk}" if last_pk else ""))
+
+        seen = updated = errors = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while seen < total:
+                batch = list(queryset[: min(batch_size, total - seen)])
+                if not batch:
+                    break
+                # API calls run concurrently, DB writes stay on this thread
+                results = executor.map(self.fetch_event, batch)
+                for payment, (event, error) in zip(batch, results):
+                    if error is not None:
+                        errors += 1
+                        self.stderr.write(f"{payment.pk}: {error}")
+                    elif event is not None:
+                        updated += self.apply_event(Payment, payment, event)
+                seen += len(batch)
+                last_pk = batch[-1].pk
+                queryset = queryset.filter(pk__gt=last_pk)
+                self.write_checkpoint(checkpoint, last_pk)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{seen}/{total} reconciled | {updated} updated | {errors} errors | {seen / elapsed:.1f} payments/s"
+                )
+        self.stdout.write(self.style.SUCCESS(f"Done: {seen} reconciled, {updated} updated, {errors} errors."))
+
+    @staticmethod
+    def fetch_event(payment):
+        try:
+            return payment.processor.fetch_webhook_event(), None
+        except Exception as e:
+            return None, e
+
+    @staticmethod
+    def apply_event(Payment, payment, event) -> int:
+        with transaction.atomic():
+            locked = Payment.objects.select_for_update().get(pk=payment.pk)
+            status = locked.status
+            locked.processor.apply_webhook_event(event)
+        return int(locked.status != status)
+
+    @staticmethod
+    def read_checkpoint(path):
+        if not path or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f).get("last_pk")
+
+    @staticmethod
+    def write_checkpoint(path, last_pk):
+        if not path:
+            return
+        with open(path, "w") as f:
+            json.dump({"last_pk": str(last_pk)}, f)
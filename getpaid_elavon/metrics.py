@@ -0,0 +1,150 @@
+import threading
+from bisect import bisect_left
+from importlib import import_module
+from typing import Optional
+from urllib.parse import urlsplit
+
+from getpaid_elavon.utils import get_setting
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_exporter = None
+_exporter_loaded = False
+_exporter_lock = threading.Lock()
+
+
+class BaseMetricsExporter:
+    """
+    Interface of metrics backends, enabled with the ``metrics_enabled`` setting.
+
+    Counters are incremented with :meth:`inc`, latencies recorded in
+    histograms with :meth:`observe`; labels are passed as keyword arguments.
+    :meth:`render` returns the Prometheus text exposition served by
+    ``MetricsView``, backends pushing the metrics elsewhere may return ``""``.
+    """
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        raise NotImplementedError
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        raise NotImplementedError
+
+
+class InMemoryMetricsExporter(BaseMetricsExporter):
+    """
+    Process-local counters and histograms rendered in the Prometheus text format.
+
+    Each process (e.g. gunicorn worker) keeps its own values, scrape every
+    worker or plug in an exporter with shared storage.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counters: dict[str, dict[tuple, float]] = {}
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self.histograms: dict[str, dict[tuple, list]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = tuple(labels.items())
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = tuple(labels.items())
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            counters = {name: dict(series) for name, series in self.counters.items()}
+            histograms = {
+                name: {key: (list(counts), total, count) for key, (counts, total, count) in series.items()}
+                for name, series in self.histograms.items()
+            }
+
+        lines = []
+        for name, series in sorted(counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for key, value in series.items():
+                lines.append(f"{name}{format_labels(key)} {format_value(value)}")
+        for name, series in sorted(histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for key, (counts, total, count) in series.items():
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    le = bound if isinstance(bound, str) else format_value(bound)
+                    lines.append(f"{name}_bucket{format_labels((*key, ('le', le)))} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(key)} {format_value(total)}")
+                lines.append(f"{name}_count{format_labels(key)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return f"{{{pairs}}}"
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def get_endpoint(url: str) -> str:
+    """
+    Turn an Elavon API URL into a low cardinality label, e.g. ``payment-sessions/{id}``.
+    """
+    segments = urlsplit(url).path.strip("/").split("/")
+    return "/".join(segment if index % 2 == 0 else "{id}" for index, segment in enumerate(segments))
+
+
+def get_metrics() -> Optional[BaseMetricsExporter]:
+    """
+    Return the process-wide exporter configured with ``metrics_exporter``, or ``None`` when metrics are disabled.
+    """
+    global _exporter, _exporter_loaded
+    if _exporter_loaded:
+        return _exporter
+    with _exporter_lock:
+        if not _exporter_loaded:
+            _exporter = None
+            if get_setting("metrics_enabled"):
+                class_path = get_setting("metrics_exporter") or InMemoryMetricsExporter
+                if isinstance(class_path, str):
+                    module_name, _, class_name = class_path.rpartition(".")
+                    class_path = getattr(import_module(module_name), class_name)
+                _exporter = class_path()
+            _exporter_loaded = True
+    return _exporter
+
+
+def reset_metrics() -> None:
+    """
+    Drop the exporter, so the next :func:`get_metrics` call reads the settings again.
+    """
+    global _exporter, _exporter_loaded
+    with _exporter_lock:
+        _exporter = None
+        _exporter_loaded = False
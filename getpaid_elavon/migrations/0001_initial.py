@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("payment_session_id", models.CharField(max_length=64, verbose_name="payment session id")),
+                ("event_type", models.CharField(blank=True, max_length=64, verbose_name="event type")),
+                ("payload", models.JSONField(verbose_name="payload")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "pending"), ("processed", "processed"), ("failed", "failed")],
+                        default="pending",
+                        max_length=16,
+                        verbose_name="status",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="attempts")),
+                ("last_error", models.TextField(blank=True, verbose_name="last error")),
+                ("created_on", models.DateTimeField(auto_now_add=True, verbose_name="created on")),
+                ("processed_on", models.DateTimeField(blank=True, null=True, verbose_name="processed on")),
+            ],
+            options={
+                "verbose_name": "Elavon webhook event",
+                "verbose_name_plural": "Elavon webhook events",
+                "ordering": ["created_on", "pk"],
+                "indexes": [models.Index(fields=["status", "created_on"], name="elavon_webhook_status_idx")],
+            },
+        ),
+    ]
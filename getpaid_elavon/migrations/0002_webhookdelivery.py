@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("getpaid_elavon", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookDelivery",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("event_key", models.CharField(max_length=200, unique=True, verbose_name="event key")),
+                ("created_on", models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="created on")),
+            ],
+            options={
+                "verbose_name": "Elavon webhook delivery",
+                "verbose_name_plural": "Elavon webhook deliveries",
+            },
+        ),
+    ]
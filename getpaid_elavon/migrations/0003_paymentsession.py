@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:23
+
+import django.db.models.deletion
+import swapper
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("getpaid_elavon", "0002_webhookdelivery"),
+        swapper.dependency("getpaid", "Payment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentSession",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("session_id", models.CharField(max_length=64, unique=True, verbose_name="payment session id")),
+                ("created_on", models.DateTimeField(auto_now_add=True, verbose_name="created on")),
+                (
+                    "payment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="elavon_sessions",
+                        to=swapper.get_model_name("getpaid", "Payment"),
+                        verbose_name="payment",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Elavon payment session",
+                "verbose_name_plural": "Elavon payment sessions",
+            },
+        ),
+    ]
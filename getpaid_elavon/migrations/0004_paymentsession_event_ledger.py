@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("getpaid_elavon", "0003_paymentsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="paymentsession",
+            name="event_rank",
+            field=models.PositiveSmallIntegerField(default=0, verbose_name="last event rank"),
+        ),
+        migrations.AddField(
+            model_name="paymentsession",
+            name="event_type",
+            field=models.CharField(blank=True, max_length=64, verbose_name="last event type"),
+        ),
+    ]
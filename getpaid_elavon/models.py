@@ -0,0 +1,75 @@
+import swapper
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class WebhookEvent(models.Model):
+    """
+    Verified Elavon notification waiting to be applied by a queue worker.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("pending")
+        PROCESSED = "processed", _("processed")
+        FAILED = "failed", _("failed")
+
+    payment_session_id = models.CharField(_("payment session id"), max_length=64)
+    event_type = models.CharField(_("event type"), max_length=64, blank=True)
+    payload = models.JSONField(_("payload"))
+    status = models.CharField(_("status"), max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(_("attempts"), default=0)
+    last_error = models.TextField(_("last error"), blank=True)
+    created_on = models.DateTimeField(_("created on"), auto_now_add=True)
+    processed_on = models.DateTimeField(_("processed on"), blank=True, null=True)
+
+    class Meta:
+        ordering = ["created_on", "pk"]
+        indexes = [models.Index(fields=["status", "created_on"], name="elavon_webhook_status_idx")]
+        verbose_name = _("Elavon webhook event")
+        verbose_name_plural = _("Elavon webhook events")
+
+    def __str__(self):
+        return f"{self.event_type} for {self.payment_session_id} ({self.status})"
+
+
+class WebhookDelivery(models.Model):
+    """
+    Keys of recently handled notifications, used to drop redeliveries.
+
+    Rows older than ``webhook_dedup_ttl`` are evicted by the deduplicator.
+    """
+
+    event_key = models.CharField(_("event key"), max_length=200, unique=True)
+    created_on = models.DateTimeField(_("created on"), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("Elavon webhook delivery")
+        verbose_name_plural = _("Elavon webhook deliveries")
+
+    def __str__(self):
+        return self.event_key
+
+
+class PaymentSession(models.Model):
+    """
+    Maps Elavon payment session ids to payments, so webhooks resolve with one indexed read.
+    """
+
+    session_id = models.CharField(_("payment session id"), max_length=64, unique=True)
+    payment = models.ForeignKey(
+        swapper.get_model_name("getpaid", "Payment"),
+        verbose_name=_("payment"),
+        on_delete=models.CASCADE,
+        related_name="elavon_sessions",
+    )
+    # latest event applied for the session, see getpaid_elavon.webhooks.advance_event_ledger
+    event_type = models.CharField(_("last event type"), max_length=64, blank=True)
+    event_rank = models.PositiveSmallIntegerField(_("last event rank"), default=0)
+    created_on = models.DateTimeField(_("created on"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Elavon payment session")
+        verbose_name_plural = _("Elavon payment sessions")
+
+    def __str__(self):
+        return self.session_id
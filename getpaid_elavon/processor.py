@@ -1,19 +1,52 @@
-import base64
 import hashlib
-import hmac
-import json
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
+from django.core.cache import caches
 from django.db.transaction import atomic
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
 from django.urls import reverse
+from django.utils.timezone import now
 from django_fsm import can_proceed
 from getpaid.processor import BaseProcessor
 
-from getpaid_elavon.client import Client
-from getpaid_elavon.types import PaymentStatus
-from getpaid_elavon.utils import get_logger
-
-logger = get_logger()
+from getpaid_elavon import codec
+from getpaid_elavon.breaker import (
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_MIN_READ_TIMEOUT,
+    DEFAULT_RECOVERY_TIMEOUT,
+    CircuitOpenError,
+)
+from getpaid_elavon.client import (
+    DEFAULT_ASYNC_POOL_MAXSIZE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRY_STATUS_FORCELIST,
+    AsyncClient,
+    Client,
+    get_client,
+)
+from getpaid_elavon.types import (
+    TRANSACTION_STATE_EVENTS,
+    CheckoutMode,
+    CheckoutResult,
+    OrderItem,
+    PaymentSessionResponse,
+    PaymentStatus,
+    WebhookNotification,
+)
+from getpaid_elavon.utils import get_setting, get_structured_logger
+from getpaid_elavon.webhooks import get_signature_header_name, verify_signature
+
+logger = get_structured_logger()
+
+# fallback lifetime of a reusable payment session when Elavon sends no ``expiresAt``
+DEFAULT_SESSION_REUSE_TTL = 15 * 60
+# stop reusing a session this many seconds before it expires, so the buyer never lands on a dead HPP
+SESSION_EXPIRY_MARGIN = 60
 
 
 class PaymentProcessor(BaseProcessor):
@@ -24,67 +57,356 @@ class PaymentProcessor(BaseProcessor):
     production_url = "https://api.eu.convergepay.com"
     sandbox_url = "https://uat.api.converge.eu.elavonaws.com"
     client_class = Client
+    async_client_class = AsyncClient
+    _async_client = None
     ok_statuses = [200, 201, 302]
 
-    def get_client_params(self):
+    def get_client(self) -> Client:
+        return get_client(self.get_client_class(), **self.get_client_params())
+
+    @classmethod
+    def get_client_params(cls) -> dict:
+        """
+        Client parameters from the backend settings, the same for every payment.
+        """
         return {
-            "merchant_alias_id": self.get_setting("merchant_alias_id"),
-            "secret_key": self.get_setting("secret_key"),
-            "sandbox": self.get_setting("sandbox", True),
+            "merchant_alias_id": get_setting("merchant_alias_id"),
+            "secret_key": get_setting("secret_key"),
+            "sandbox": get_setting("sandbox", True),
+            "base_url": get_setting("base_url"),
+            "connect_timeout": get_setting("connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+            "read_timeout": get_setting("read_timeout", DEFAULT_READ_TIMEOUT),
+            "pool_connections": get_setting("pool_connections", DEFAULT_POOL_CONNECTIONS),
+            "pool_maxsize": get_setting("pool_maxsize", DEFAULT_POOL_MAXSIZE),
+            "max_retries": get_setting("max_retries", 0),
+            "retry_backoff_factor": get_setting("retry_backoff_factor", 0),
+            "retry_status_forcelist": get_setting("retry_status_forcelist", DEFAULT_RETRY_STATUS_FORCELIST),
+            "async_pool_maxsize": get_setting("async_pool_maxsize", DEFAULT_ASYNC_POOL_MAXSIZE),
+            "circuit_breaker_threshold": get_setting("circuit_breaker_threshold", DEFAULT_FAILURE_THRESHOLD),
+            "circuit_breaker_recovery_timeout": get_setting(
+                "circuit_breaker_recovery_timeout", DEFAULT_RECOVERY_TIMEOUT
+            ),
+            "adaptive_timeout": get_setting("adaptive_timeout", False),
+            "min_read_timeout": get_setting("min_read_timeout", DEFAULT_MIN_READ_TIMEOUT),
+            "stream_order_body": get_setting("stream_order_body", False),
         }
 
     def get_paywall_context(self, request=None) -> dict:
         """
         Prepare context parameters for creating an order.
 
+        ``items`` is a generator of :class:`~getpaid_elavon.types.OrderItem`
+        over ``order.get_items()``, consumed once by ``client.create_order()``
+        while it encodes the request body. ``get_items()`` itself is called
+        here, so it may return a lazy iterable (e.g. ``QuerySet.iterator()``)
+        to keep large carts out of memory.
+
         Returns:
             Dict with order parameters ready for client.create_order()
         """
         order = self.payment.order
+        currency_code = order.get_currency()
 
-        items = [
-            {
-                "total": {
-                    "amount": item.get("quantity", 1),
-                    "currencyCode": order.get_currency(),
-                },
-                "description": item.get("name", ""),
-            }
-            for item in order.get_items()
-        ]
+        items = (OrderItem(item.get("name", ""), item.get("quantity", 1), currency_code) for item in order.get_items())
 
         return {
             "order_reference": str(order.pk),
             "total_amount": f"{order.get_total_amount()}",
-            "currency_code": order.get_currency(),
+            "currency_code": currency_code,
             "description": order.get_description(),
             "items": items,
             "custom_reference": self.payment.id,
         }
 
-    @atomic()
-    def prepare_transaction(self, request=None, view=None, **kwargs):
+    def get_payment_session_params(self, request=None, site_url: Optional[str] = None) -> dict:
+        """
+        Prepare parameters for creating a payment session, except for the Elavon order URL.
+
+        Absolute URLs are built from ``request``, or without one from
+        ``site_url`` (e.g. ``"https://shop.example.com"``, defaults to the
+        ``site_url`` setting).
+
+        Returns:
+            Dict with session parameters ready for client.create_payment_session()
+        """
         payment = self.payment
-        order = payment.order
+        failure_path = reverse("getpaid:payment-failure", kwargs={"pk": payment.pk})
+        if request is not None:
+            cancel_url = request.build_absolute_uri(failure_path)
+        else:
+            cancel_url = (site_url or self.get_setting("site_url") or "").rstrip("/") + failure_path
+        return {
+            "return_url": payment.order.get_success_url(request=request),
+            "cancel_url": cancel_url,
+            "custom_reference": payment.id,
+            "buyer_info": payment.get_buyer_info(),
+        }
+
+    def get_async_client(self) -> AsyncClient:
+        if self._async_client is None:
+            self._async_client = get_client(self.async_client_class, **self.get_client_params())
+        return self._async_client
+
+    def prepare_transaction(self, request=None, view=None, **kwargs):
+        cache_key, payment_hpp_url = self._get_reusable_session()
+        if payment_hpp_url:
+            return HttpResponseRedirect(payment_hpp_url)
+
+        try:
+            if self.get_setting("checkout_mode", CheckoutMode.ATOMIC) == CheckoutMode.PIPELINED:
+                session_resp = self._prepare_transaction_pipelined(request=request)
+            else:
+                session_resp = self._prepare_transaction_atomic(request=request)
+        except CircuitOpenError as e:
+            return self._circuit_open_redirect(e)
+
+        self._cache_session(cache_key, session_resp)
+        payment_hpp_url = session_resp.get("url")
+
+        return HttpResponseRedirect(payment_hpp_url)
+
+    def _circuit_open_redirect(self, error: CircuitOpenError) -> HttpResponseRedirect:
+        """
+        Send the buyer to the failure page right away while the Elavon API is unavailable.
+        """
+        logger.warning(
+            "Elavon API unavailable, checkout aborted",
+            endpoint=error.endpoint,
+            retry_after=round(error.retry_after, 1),
+            payment_id=self.payment.id,
+        )
+        return HttpResponseRedirect(reverse("getpaid:payment-failure", kwargs={"pk": self.payment.pk}))
 
+    @atomic()
+    def _prepare_transaction_atomic(self, request=None) -> dict:
+        """
+        Create the Elavon order and payment session inside one DB transaction, returns the session.
+        """
         params = self.get_paywall_context(request=request)
         order_resp = self.client.create_order(**params)
 
-        elavon_order_url = order_resp.get("href")
-        success_url = order.get_success_url(request=request)
-        fail_url = request.build_absolute_uri(reverse("getpaid:payment-failure", kwargs={"pk": payment.pk}))
-        buyer_info = payment.get_buyer_info()
+        session_resp = self.client.create_payment_session(
+            elavon_order_url=order_resp.get("href"),
+            **self.get_payment_session_params(request=request),
+        )
+
+        self._save_external_id(session_resp.get("id"))
+
+        return session_resp
+
+    def _prepare_transaction_pipelined(self, request=None) -> dict:
+        """
+        Create the Elavon order and payment session outside of any DB transaction.
+
+        Request parameters are built before the first gateway call, and a lazy
+        ``get_items()`` is consumed while the order body is encoded, so both
+        calls go out back to back on this thread. The only write is a
+        single-row UPDATE of ``external_id`` once the session exists. Returns
+        the session.
+        """
+        payment = self.payment
+
+        params, session_params = self._get_checkout_params(request=request)
+        order_resp = self.client.create_order(**params)
 
         session_resp = self.client.create_payment_session(
-            elavon_order_url=elavon_order_url,
-            return_url=success_url,
-            cancel_url=fail_url,
-            custom_reference=payment.id,
-            buyer_info=buyer_info,
+            elavon_order_url=order_resp.get("href"),
+            **session_params,
         )
 
         payment.external_id = session_resp.get("id")
-        payment.save(update_fields=["external_id"])
+        type(payment).objects.filter(pk=payment.pk).update(external_id=payment.external_id)
+        self._store_payment_session(payment.external_id)
+
+        return session_resp
+
+    def _save_external_id(self, session_id: str) -> None:
+        self.payment.external_id = session_id
+        self.payment.save(update_fields=["external_id"])
+        self._store_payment_session(session_id)
+
+    def _store_payment_session(self, session_id: str) -> None:
+        """
+        Record the session -> payment mapping used to resolve webhooks.
+        """
+        # imported here, as this module is loaded before the app registry is ready
+        from getpaid_elavon.models import PaymentSession
+
+        PaymentSession.objects.bulk_create(
+            [PaymentSession(session_id=session_id, payment_id=self.payment.pk)], ignore_conflicts=True
+        )
+
+    def _get_checkout_params(self, request=None, site_url: Optional[str] = None) -> tuple[dict, dict]:
+        return (
+            self.get_paywall_context(request=request),
+            self.get_payment_session_params(request=request, site_url=site_url),
+        )
+
+    @classmethod
+    def prepare_transactions(
+        cls,
+        payments: Iterable,
+        site_url: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        request: Optional[HttpRequest] = None,
+    ) -> list[CheckoutResult]:
+        """
+        Create Elavon orders and payment sessions for many payments at once, e.g. to send payment links.
+
+        Request parameters are built from the database first. Then up to
+        ``max_workers`` (default: the ``pool_maxsize`` setting) checkouts run
+        concurrently over the pooled connections, and finally all
+        ``external_id`` values are written with one ``bulk_update``. A failing
+        payment is reported in its result's ``error`` and does not stop the
+        others. Results are returned in the order of ``payments``.
+        """
+        results: list[CheckoutResult] = []
+        pending = []
+        for payment in payments:
+            result = CheckoutResult(payment_id=payment.id, session_id=None, url=None, error=None)
+            results.append(result)
+            processor = cls(payment)
+            try:
+                cache_key, result["url"] = processor._get_reusable_session()
+                if result["url"]:
+                    result["session_id"] = payment.external_id
+                    continue
+                params, session_params = processor._get_checkout_params(request=request, site_url=site_url)
+                # a lazy get_items() must not be consumed on the worker threads, outside this connection
+                params["items"] = list(params["items"])
+            except Exception as e:
+                result["error"] = e
+                logger.warning("Bulk checkout failed", payment_id=payment.id, error=str(e))
+                continue
+            pending.append((processor, cache_key, params, session_params, result))
+
+        if not pending:
+            return results
+
+        def create_session(item) -> dict:
+            processor, _, params, session_params, _ = item
+            client = processor.client
+            order_resp = client.create_order(**params)
+            return client.create_payment_session(elavon_order_url=order_resp.get("href"), **session_params)
+
+        if max_workers is None:
+            max_workers = get_setting("pool_maxsize", DEFAULT_POOL_MAXSIZE)
+        created = []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            futures = [executor.submit(create_session, item) for item in pending]
+            for item, future in zip(pending, futures):
+                processor, cache_key, _, _, result = item
+                try:
+                    session_resp = future.result()
+                except Exception as e:
+                    result["error"] = e
+                    logger.warning("Bulk checkout failed", payment_id=processor.payment.id, error=str(e))
+                    continue
+                processor.payment.external_id = result["session_id"] = session_resp.get("id")
+                result["url"] = session_resp.get("url")
+                created.append((processor, cache_key, session_resp))
+
+        if created:
+            # imported here, as this module is loaded before the app registry is ready
+            from getpaid_elavon.models import PaymentSession
+
+            payments = [processor.payment for processor, _, _ in created]
+            with atomic():
+                type(payments[0]).objects.bulk_update(payments, ["external_id"])
+                PaymentSession.objects.bulk_create(
+                    [PaymentSession(session_id=payment.external_id, payment_id=payment.pk) for payment in payments],
+                    ignore_conflicts=True,
+                )
+            for processor, cache_key, session_resp in created:
+                processor._cache_session(cache_key, session_resp)
+        return results
+
+    def get_session_cache_key(self) -> str:
+        """
+        Key of the reusable payment session: the payment, its status and everything the session was created with.
+        """
+        payment = self.payment
+        order = payment.order
+        buyer_info = codec.dumps(payment.get_buyer_info(), sort_keys=True)
+        buyer_hash = hashlib.sha256(buyer_info).hexdigest()
+        return (
+            f"getpaid_elavon:session:{payment.pk}:{payment.status}:"
+            f"{order.get_total_amount()}:{order.get_currency()}:{buyer_hash}"
+        )
+
+    def _get_reusable_session(self) -> tuple[Optional[str], Optional[str]]:
+        """
+        Return the session cache key and the cached HPP URL, both ``None`` unless ``session_reuse`` is on.
+        """
+        if not self.get_setting("session_reuse", False):
+            return None, None
+        cache_key = self.get_session_cache_key()
+        payment_hpp_url = caches[self.get_setting("session_reuse_cache", "default")].get(cache_key)
+        if payment_hpp_url:
+            logger.success("Payment session reused", payment_id=self.payment.id)
+        return cache_key, payment_hpp_url
+
+    def _cache_session(self, cache_key: Optional[str], session_resp: dict) -> None:
+        """
+        Remember the HPP URL of a new session until shortly before the session expires.
+        """
+        session = PaymentSessionResponse(session_resp)
+        if cache_key is None or not session.url:
+            return
+        timeout = self.get_setting("session_reuse_ttl", DEFAULT_SESSION_REUSE_TTL)
+        expires_at = session.expires_at
+        if expires_at is not None:
+            timeout = min(timeout, (expires_at - now()).total_seconds() - SESSION_EXPIRY_MARGIN)
+        if timeout > 0:
+            caches[self.get_setting("session_reuse_cache", "default")].set(cache_key, session.url, timeout)
+
+    def _load_checkout(self, request=None) -> tuple:
+        """
+        Database and cache reads of the async checkout, done in a single thread hop.
+
+        Returns ``(cache_key, payment_hpp_url, params, session_params)``,
+        the params are ``None`` when a session is reused.
+        """
+        cache_key, payment_hpp_url = self._get_reusable_session()
+        if payment_hpp_url:
+            return cache_key, payment_hpp_url, None, None
+        params, session_params = self._get_checkout_params(request=request)
+        # a lazy get_items() must not be consumed on the event loop
+        params["items"] = list(params["items"])
+        return cache_key, None, params, session_params
+
+    def _complete_checkout(self, cache_key: Optional[str], session_resp: dict) -> None:
+        with atomic():
+            self._save_external_id(session_resp.get("id"))
+        self._cache_session(cache_key, session_resp)
+
+    async def aprepare_transaction(self, request=None, view=None, **kwargs):
+        """
+        Async variant of :meth:`prepare_transaction` for ASGI views.
+
+        Database work runs in a thread via ``sync_to_async``, while both Elavon
+        calls are awaited on the event loop, so the worker is free to serve
+        other checkouts during the gateway round-trips.
+        """
+        from asgiref.sync import sync_to_async
+
+        client = self.get_async_client()
+
+        cache_key, payment_hpp_url, params, session_params = await sync_to_async(self._load_checkout)(request=request)
+        if payment_hpp_url:
+            return HttpResponseRedirect(payment_hpp_url)
+
+        try:
+            order_resp = await client.create_order(**params)
+
+            session_resp = await client.create_payment_session(
+                elavon_order_url=order_resp.get("href"),
+                **session_params,
+            )
+        except CircuitOpenError as e:
+            return self._circuit_open_redirect(e)
+
+        await sync_to_async(self._complete_checkout)(cache_key, session_resp)
 
         payment_hpp_url = session_resp.get("url")
 
@@ -101,38 +423,29 @@ class PaymentProcessor(BaseProcessor):
         Returns:
             True if signature is valid, False otherwise
         """
-        webhook_shared_secret = self.get_setting("webhook_shared_secret")
         webhook_signer_id = self.get_setting("webhook_signer_id")
+        header_name = get_signature_header_name(webhook_signer_id)
 
-        header_name = f"Signature-{webhook_signer_id}"
-        received_signature = request.headers.get(header_name)
-
-        if not received_signature:
-            logger.error(
-                f"Missing signature header: {header_name}",
-                extra={"payment_id": self.payment.id},
-            )
+        if not request.headers.get(header_name):
+            logger.error("Missing signature header", header=header_name, payment_id=self.payment.id)
             return False
 
-        shared_secret_bytes = base64.b64decode(webhook_shared_secret)
-
-        body_bytes = body
-
-        final_bytes = shared_secret_bytes + body_bytes
-
-        hash_result = hashlib.sha512(final_bytes).digest()
-
-        expected_signature = base64.b64encode(hash_result).decode("utf-8")
-
-        is_valid = hmac.compare_digest(received_signature.strip(), expected_signature)
-
-        return is_valid
+        return verify_signature(
+            request.headers,
+            body,
+            shared_secret=self.get_setting("webhook_shared_secret"),
+            signer_id=webhook_signer_id,
+        )
 
     @atomic()
-    def handle_paywall_callback(self, request, *args, **kwargs):
+    def handle_paywall_callback(self, request, *args, data=None, **kwargs):
         """
         Handle webhook notification and update payment status.
 
+        ``CallbackView`` verifies the signature and decodes the body itself and
+        passes the decoded payload as ``data``. Without it, the signature is
+        checked and the body decoded here.
+
         Processes eventType from webhook:
         - saleAuthorized: Payment successful
         - saleDeclined: Payment failed
@@ -146,68 +459,107 @@ class PaymentProcessor(BaseProcessor):
         payment = self.payment
 
         try:
-            if not self._validate_signature(request, request.body):
-                logger.error(
-                    "Webhook signature validation failed | payment_id: %s",
-                    payment.id,
-                )
-                return HttpResponse(status=403)
-
-            data = json.loads(request.body)
-            event_type = data.get("eventType")
-
-            if event_type == PaymentStatus.SALE_AUTHORIZED:
-                # for some payment methods:saleAuthorized is first status.
-                if can_proceed(payment.confirm_lock):
-                    payment.confirm_lock()
-                if can_proceed(payment.confirm_payment):
-                    payment.confirm_payment()
-                    if can_proceed(payment.mark_as_paid):
-                        payment.mark_as_paid()
-
-                        logger.info(
-                            "Payment authorized successfully | payment_id: %s | order_id: %s | amount: %s",
-                            payment.id,
-                            payment.order.pk,
-                            str(payment.amount_paid),
-                        )
-
-            elif event_type == PaymentStatus.SALE_DECLINED:
-                if can_proceed(payment.fail):
-                    payment.fail()
-                    logger.warning(
-                        "Payment declined | payment_id: %s | order_id: %s",
-                        payment.id,
-                        payment.order.pk,
-                    )
-
-            elif event_type == PaymentStatus.SALE_AUTHORIZATION_PENDING:
-                if can_proceed(payment.confirm_lock):
-                    payment.confirm_lock()
-                    logger.info(
-                        "Payment authorization pending | payment_id: %s | order_id: %s",
-                        payment.id,
-                        payment.order.pk,
-                    )
-            elif event_type == PaymentStatus.EXPIRED:
-                if can_proceed(payment.fail):
-                    payment.fail()
-                    logger.warning(
-                        "Payment session expired | payment_id: %s | order_id: %s",
-                        payment.id,
-                        payment.order.pk,
-                    )
+            if data is None:
+                if not self._validate_signature(request, request.body):
+                    logger.error("Webhook signature validation failed", payment_id=payment.id)
+                    return HttpResponse(status=403)
 
-            else:
-                logger.warning("Unknown event type received: %s | payment_id: %s", event_type, payment.id)
-            payment.save()
+                data = codec.loads(request.body)
+            self.apply_webhook_event(data)
             return HttpResponse(status=200)
 
-        except json.JSONDecodeError as e:
-            logger.error("Failed to parse webhook JSON: %s | payment_id: %s", str(e), payment.id)
+        except codec.JSONDecodeError as e:
+            logger.error("Failed to parse webhook JSON", error=str(e), payment_id=payment.id)
             return HttpResponse(status=400)
 
         except Exception as e:
-            logger.exception("Error handling webhook: %s | payment_id: %s", str(e), payment.id)
+            logger.exception("Error handling webhook", error=str(e), payment_id=payment.id)
             # Return 200 to prevent webhook retries for processing errors
             return HttpResponse(status=200)
+
+    def apply_webhook_event(self, data: dict) -> None:
+        """
+        Apply the FSM transitions of a verified and decoded webhook event and save the payment.
+
+        Used by :meth:`handle_paywall_callback` and by queued webhook processing,
+        callers are expected to provide the surrounding transaction (and row lock).
+        Only fields changed by the transitions are saved; when nothing changed,
+        e.g. for duplicate, out-of-order or unknown events, nothing is written.
+        """
+        payment = self.payment
+        initial_values = self._get_field_values()
+
+        event_type = WebhookNotification(data).event_type
+
+        if event_type == PaymentStatus.SALE_AUTHORIZED:
+            # for some payment methods:saleAuthorized is first status.
+            if can_proceed(payment.confirm_lock):
+                payment.confirm_lock()
+            if can_proceed(payment.confirm_payment):
+                payment.confirm_payment()
+                if can_proceed(payment.mark_as_paid):
+                    payment.mark_as_paid()
+
+                    logger.success(
+                        "Payment authorized successfully",
+                        payment_id=payment.id,
+                        order_id=payment.order_id,
+                        amount=payment.amount_paid,
+                    )
+
+        elif event_type == PaymentStatus.SALE_DECLINED:
+            if can_proceed(payment.fail):
+                payment.fail()
+                logger.warning("Payment declined", payment_id=payment.id, order_id=payment.order_id)
+
+        elif event_type == PaymentStatus.SALE_AUTHORIZATION_PENDING:
+            if can_proceed(payment.confirm_lock):
+                payment.confirm_lock()
+                logger.success("Payment authorization pending", payment_id=payment.id, order_id=payment.order_id)
+        elif event_type == PaymentStatus.EXPIRED:
+            if can_proceed(payment.fail):
+                payment.fail()
+                logger.warning("Payment session expired", payment_id=payment.id, order_id=payment.order_id)
+
+        else:
+            logger.warning("Unknown event type received", event_type=event_type, payment_id=payment.id)
+
+        # persist only what the transitions touched, skip the write for no-op events
+        changed_fields = [name for name, value in self._get_field_values().items() if initial_values[name] != value]
+        if changed_fields:
+            payment.save(update_fields=changed_fields)
+
+    def _get_field_values(self) -> dict:
+        payment = self.payment
+        return {field.name: getattr(payment, field.attname) for field in payment._meta.concrete_fields}
+
+    def fetch_webhook_event(self) -> Optional[dict]:
+        """
+        Rebuild the notification Elavon would have sent for the payment's session.
+
+        Fetches the payment session (and its transaction, if any) from the API
+        and maps the state onto a webhook event for :meth:`apply_webhook_event`.
+        Only talks to the API, so it is safe to call from worker threads.
+
+        Returns:
+            Webhook-like dict, or None while the session is still open
+        """
+        payment_session_id = self.payment.external_id
+        session = PaymentSessionResponse(self.client.get_payment_session(payment_session_id))
+        event_type = None
+
+        if session.transaction:
+            transaction = self.client.get_resource(session.transaction)
+            event_type = TRANSACTION_STATE_EVENTS.get(transaction.get("state"))
+        else:
+            expires_at = session.expires_at
+            if expires_at is not None and expires_at <= now():
+                event_type = PaymentStatus.EXPIRED
+
+        if event_type is None:
+            return None
+        return {
+            "resourceType": "paymentSession",
+            "resource": f"{self.client.get_baseurl()}/payment-sessions/{payment_session_id}",
+            "eventType": event_type.value,
+        }
@@ -0,0 +1,102 @@
+from importlib import import_module
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from getpaid_elavon.batching import apply_webhook_batch
+from getpaid_elavon.metrics import get_metrics
+from getpaid_elavon.models import WebhookEvent
+from getpaid_elavon.types import WebhookResult
+from getpaid_elavon.utils import get_setting, get_structured_logger
+from getpaid_elavon.webhooks import get_payment_session_id
+
+logger = get_structured_logger()
+
+
+class BaseWebhookQueue:
+    """
+    Interface of webhook queue backends used when ``webhook_processing`` is ``"queue"``.
+
+    ``CallbackView`` calls :meth:`enqueue` with a verified, decoded notification
+    and acknowledges it right away; a worker calls :meth:`process` to apply
+    the queued events.
+    """
+
+    def enqueue(self, data: dict) -> None:
+        raise NotImplementedError
+
+    def process(self, limit: int = 100) -> int:
+        """
+        Apply up to ``limit`` queued events. Returns the number of events handled.
+        """
+        raise NotImplementedError
+
+
+class DatabaseWebhookQueue(BaseWebhookQueue):
+    """
+    Queue stored in the :class:`~getpaid_elavon.models.WebhookEvent` table.
+
+    Workers claim pending rows with ``SELECT ... FOR UPDATE SKIP LOCKED``
+    (where supported), so several workers can run side by side. The claimed
+    events are applied together with
+    :func:`~getpaid_elavon.batching.apply_webhook_batch`; failed events are
+    retried up to ``webhook_max_attempts`` times.
+    """
+
+    def enqueue(self, data: dict) -> None:
+        WebhookEvent.objects.create(
+            payment_session_id=get_payment_session_id(data) or "",
+            event_type=data.get("eventType") or "",
+            payload=data,
+        )
+
+    def process(self, limit: int = 100) -> int:
+        max_attempts = get_setting("webhook_max_attempts", 5)
+        with transaction.atomic():
+            events = list(
+                WebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(status=WebhookEvent.Status.PENDING)
+                .order_by("created_on", "pk")[:limit]
+            )
+            if not events:
+                return 0
+            try:
+                results = apply_webhook_batch([event.payload for event in events])
+            except Exception as e:
+                logger.exception("Error processing queued webhook batch", error=str(e), batch_size=len(events))
+                results = [WebhookResult(outcome="failed", error=e) for _ in events]
+            processed_on = now()
+            for event, result in zip(events, results):
+                self.record_result(event, result, max_attempts=max_attempts, processed_on=processed_on)
+            WebhookEvent.objects.bulk_update(events, ["status", "attempts", "last_error", "processed_on"])
+        return len(events)
+
+    def record_result(self, event: WebhookEvent, result: WebhookResult, max_attempts: int, processed_on) -> None:
+        event.attempts += 1
+        event.processed_on = processed_on
+        if result["outcome"] == "failed":
+            event.last_error = str(result["error"])
+            if event.attempts >= max_attempts:
+                event.status = WebhookEvent.Status.FAILED
+        else:
+            if result["outcome"] == "payment_not_found":
+                logger.warning(
+                    "Payment not found for webhook", external_id=event.payment_session_id, event_type=event.event_type
+                )
+            event.status = WebhookEvent.Status.PROCESSED
+            event.last_error = ""
+        metrics = get_metrics()
+        if metrics is not None:
+            outcome = "processed" if event.status == WebhookEvent.Status.PROCESSED else "failed"
+            metrics.inc("elavon_queued_webhooks_total", event_type=event.event_type or "unknown", outcome=outcome)
+
+
+def get_webhook_queue() -> BaseWebhookQueue:
+    """
+    Instantiate the queue backend configured with ``webhook_queue_backend``.
+    """
+    class_path = get_setting("webhook_queue_backend") or DatabaseWebhookQueue
+    if isinstance(class_path, str):
+        module_name, _, class_name = class_path.rpartition(".")
+        class_path = getattr(import_module(module_name), class_name)
+    return class_path()
@@ -0,0 +1,14 @@
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from getpaid_elavon.client import clear_clients
+from getpaid_elavon.codec import reset_codec
+from getpaid_elavon.metrics import reset_metrics
+
+
+@receiver(setting_changed)
+def reset_clients(setting, **kwargs):
+    if setting in ("GETPAID_BACKEND_SETTINGS", "GETPAID"):
+        clear_clients()
+        reset_metrics()
+        reset_codec()
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import uuid
+
+import httpx
+import pytest
+
+from getpaid_elavon.client import DEFAULT_ASYNC_POOL_MAXSIZE, AsyncClient, aclose_sessions
+
+
+def make_client(handler, **kwargs):
+    return AsyncClient(
+        merchant_alias_id="test_merchant_alias",
+        secret_key="test_secret_key",
+        sandbox=True,
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+class TestAsyncClientElavon:
+    order_url = "https://uat.api.converge.eu.elavonaws.com/orders"
+    session_url = "https://uat.api.converge.eu.elavonaws.com/payment-sessions"
+
+    def test_create_order_success(self, expected_payload, mock_order_response):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(201, json=mock_order_response)
+
+        client = make_client(handler)
+        custom_ref = uuid.uuid4()
+
+        result = asyncio.run(
+            client.create_order(
+                order_reference="123",
+                total_amount="100.50",
+                currency_code="EUR",
+                description=expected_payload["description"],
+                items=expected_payload["items"],
+                custom_reference=custom_ref,
+            )
+        )
+
+        assert result == mock_order_response
+        assert len(requests) == 1
+        assert str(requests[0].url) == self.order_url
+        assert requests[0].headers["Authorization"].startswith("Basic ")
+        request_payload = json.loads(requests[0].content)
+        assert request_payload["total"] == expected_payload["total"]
+        assert request_payload["items"] == expected_payload["items"]
+        assert request_payload["customReference"] == str(custom_ref)
+
+    def test_create_payment_session_success(self):
+        def handler(request):
+            payload = json.loads(request.content)
+            assert str(request.url) == self.session_url
+            assert payload["billTo"]["city"] == "Warsaw"
+            return httpx.Response(201, json={"id": "test_session_123", "url": "https://hpp/pay"})
+
+        client = make_client(handler)
+
+        result = asyncio.run(
+            client.create_payment_session(
+                elavon_order_url=f"{self.order_url}/order_123",
+                return_url="https://example.com/success",
+                cancel_url="https://example.com/cancel",
+                custom_reference=uuid.uuid4(),
+                buyer_info={"email": "test@example.com", "billing": {"city": "Warsaw"}},
+            )
+        )
+
+        assert result["id"] == "test_session_123"
+
+    def test_post_is_not_retried_on_gateway_error_status(self):
+        statuses = [502, 201]
+
+        def handler(request):
+            return httpx.Response(statuses.pop(0), json={"id": "elavon_order_123"})
+
+        client = make_client(handler, max_retries=2)
+
+        with pytest.raises(httpx.HTTPStatusError) as exc_info:
+            asyncio.run(
+                client.create_order(
+                    order_reference="1",
+                    total_amount="1.00",
+                    currency_code="EUR",
+                    description="",
+                    items=[],
+                    custom_reference=uuid.uuid4(),
+                )
+            )
+
+        assert exc_info.value.response.status_code == 502
+        assert statuses == [201]
+
+    def test_create_order_handles_http_401_error(self):
+        client = make_client(lambda request: httpx.Response(401, json={"status": 401}))
+
+        with pytest.raises(httpx.HTTPStatusError) as exc_info:
+            asyncio.run(
+                client.create_order(
+                    order_reference="1",
+                    total_amount="1.00",
+                    currency_code="EUR",
+                    description="",
+                    items=[],
+                    custom_reference=uuid.uuid4(),
+                )
+            )
+
+        assert exc_info.value.response.status_code == 401
+
+    def test_shared_pool_allows_many_requests_in_flight(self):
+        async def run():
+            client = AsyncClient(merchant_alias_id="test_merchant_alias", secret_key="test_secret_key")
+            session = client.get_session()
+            assert client.get_session() is session
+            await aclose_sessions()
+            return session
+
+        session = asyncio.run(run())
+
+        assert session._transport._pool._max_connections == DEFAULT_ASYNC_POOL_MAXSIZE
+        assert session.is_closed
+
+    def test_aclose_closes_dedicated_session(self):
+        client = make_client(lambda request: httpx.Response(201, json={}))
+
+        async def run():
+            session = client.get_session()
+            await client.aclose()
+            return session
+
+        assert asyncio.run(run()).is_closed
+        assert client._session is None
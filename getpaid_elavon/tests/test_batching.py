@@ -0,0 +1,141 @@
+from concurrent.futures import Future
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from getpaid.types import PaymentStatus as ps
+
+from getpaid_elavon.batching import WebhookBatcher, apply_webhook_batch
+from getpaid_elavon.models import PaymentSession
+from getpaid_elavon.processor import PaymentProcessor
+
+
+class SyncBatcher(WebhookBatcher):
+    """Applies every submitted event right away, in the calling thread."""
+
+    def submit(self, data):
+        future = Future()
+        self.flush([(data, future)])
+        return future
+
+
+@pytest.fixture
+def payments(db):
+    from factories import PaymentFactory
+
+    mapped = PaymentFactory.create_batch(3)
+    for index, payment in enumerate(mapped):
+        PaymentSession.objects.create(session_id=f"session_{index}", payment=payment)
+    legacy = PaymentFactory(external_id="legacy_session")
+    return [*mapped, legacy]
+
+
+@pytest.mark.django_db
+class TestApplyWebhookBatch:
+    def test_outcomes_per_event(self, payments, webhook_payload, get_status):
+        events = [
+            webhook_payload("session_0"),
+            webhook_payload("session_0", "saleAuthorizationPending"),
+            webhook_payload("session_1", "saleAuthorizationPending"),
+            webhook_payload("session_1", "saleDeclined"),
+            webhook_payload("legacy_session"),
+            webhook_payload("missing"),
+            {"resourceType": "transaction", "resource": "https://api/transactions/1", "eventType": "saleAuthorized"},
+        ]
+
+        results = apply_webhook_batch(events)
+
+        assert [result["outcome"] for result in results] == [
+            "processed",
+            "stale",
+            "processed",
+            "processed",
+            "processed",
+            "payment_not_found",
+            "ignored",
+        ]
+        assert [get_status(payment) for payment in payments] == [ps.PAID, ps.FAILED, ps.NEW, ps.PAID]
+        assert dict(PaymentSession.objects.values_list("session_id", "event_type")) == {
+            "session_0": "saleAuthorized",
+            "session_1": "saleDeclined",
+            "session_2": "",
+        }
+
+    def test_failing_event_is_isolated(self, payments, webhook_payload, get_status):
+        apply = PaymentProcessor.apply_webhook_event
+
+        def fail_for_first_payment(processor, data):
+            apply(processor, data)
+            if processor.payment.pk == payments[0].pk:
+                raise ValueError("boom")
+
+        with mock.patch.object(PaymentProcessor, "apply_webhook_event", fail_for_first_payment):
+            results = apply_webhook_batch([webhook_payload("session_0"), webhook_payload("session_1")])
+
+        assert results[0]["outcome"] == "failed"
+        assert str(results[0]["error"]) == "boom"
+        assert results[1] == {"outcome": "processed", "error": None}
+        assert [get_status(payment) for payment in payments[:2]] == [ps.NEW, ps.PAID]
+        assert PaymentSession.objects.get(session_id="session_0").event_rank == 0
+
+    def test_payments_are_loaded_with_one_query(self, payments, webhook_payload):
+        events = [webhook_payload(f"session_{index}") for index in range(3)]
+
+        with CaptureQueriesContext(connection) as queries:
+            apply_webhook_batch(events)
+
+        selects = [query["sql"] for query in queries if query["sql"].startswith("SELECT")]
+        assert len([sql for sql in selects if 'FROM "getpaid_payment"' in sql]) == 1
+
+    def test_rows_are_locked_in_key_order(self, payments, webhook_payload):
+        events = [webhook_payload(session_id) for session_id in ("session_2", "legacy_session", "session_0")]
+
+        with CaptureQueriesContext(connection) as queries:
+            apply_webhook_batch(events)
+
+        selects = [query["sql"] for query in queries if query["sql"].startswith("SELECT")][:3]
+        assert 'ORDER BY "getpaid_elavon_paymentsession"."session_id" ASC' in selects[0]
+        assert all('ORDER BY "getpaid_payment"."id" ASC' in sql for sql in selects[1:])
+
+
+@pytest.mark.django_db
+class TestBatchedCallbackView:
+    @pytest.fixture
+    def batch_mode(self, backend_settings):
+        backend_settings(webhook_processing="batch")
+
+    def test_event_is_applied_in_batch(
+        self, batch_mode, payments, signed_webhook, webhook_payload, callback_view, get_status
+    ):
+        with mock.patch("getpaid_elavon.views.get_webhook_batcher", return_value=SyncBatcher()):
+            response = callback_view(signed_webhook(webhook_payload("session_0")))
+
+        assert response.status_code == 200
+        assert get_status(payments[0]) == ps.PAID
+
+    def test_batch_timeout_asks_for_redelivery(
+        self, batch_mode, backend_settings, payments, signed_webhook, webhook_payload, callback_view, get_status
+    ):
+        backend_settings(webhook_batch_timeout=0.01)
+        batcher = mock.Mock(**{"submit.return_value": Future()})
+
+        with mock.patch("getpaid_elavon.views.get_webhook_batcher", return_value=batcher):
+            response = callback_view(signed_webhook(webhook_payload("session_0")))
+
+        assert response.status_code == 503
+        assert get_status(payments[0]) == ps.NEW
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batcher_groups_concurrent_events(payments, webhook_payload, backend_settings, get_status):
+    backend_settings(webhook_batch_window=0.2)
+    batcher = WebhookBatcher()
+
+    with mock.patch("getpaid_elavon.batching.apply_webhook_batch", wraps=apply_webhook_batch) as apply:
+        futures = [batcher.submit(webhook_payload(f"session_{index}")) for index in range(3)]
+        results = [future.result(timeout=5) for future in futures]
+
+    assert [result["outcome"] for result in results] == ["processed"] * 3
+    assert apply.call_count == 1
+    assert [get_status(payment) for payment in payments[:3]] == [ps.PAID] * 3
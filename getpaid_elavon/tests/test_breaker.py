@@ -0,0 +1,127 @@
+import pytest
+import requests
+
+from getpaid_elavon.breaker import AdaptiveTimeout, CircuitBreaker, CircuitOpenError
+from getpaid_elavon.client import Client
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10, clock=Clock())
+
+        for failed in (True, True, False, True, True):
+            breaker.before_call("orders")
+            breaker.record("orders", failed)
+        assert breaker.get_state("orders") == CircuitBreaker.CLOSED
+
+        breaker.record("orders", True)
+        assert breaker.get_state("orders") == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.before_call("orders")
+        assert exc_info.value.retry_after == 10
+        # other endpoints are not affected
+        breaker.before_call("payment-sessions")
+
+    def test_half_open_probe(self):
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+        breaker.record("orders", True)
+
+        clock.now = 10
+        breaker.before_call("orders")
+        assert breaker.get_state("orders") == CircuitBreaker.HALF_OPEN
+        # only one probe at a time
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call("orders")
+
+        breaker.record("orders", True)
+        assert breaker.get_state("orders") == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call("orders")
+
+        clock.now = 20
+        breaker.before_call("orders")
+        breaker.record("orders", False)
+        assert breaker.get_state("orders") == CircuitBreaker.CLOSED
+        breaker.before_call("orders")
+
+
+def test_adaptive_timeout():
+    timeout = AdaptiveTimeout(max_timeout=30, min_timeout=1, min_samples=5)
+
+    for _ in range(4):
+        timeout.observe("orders", 0.2)
+    assert timeout.get_timeout("orders") == 30
+
+    for _ in range(50):
+        timeout.observe("orders", 0.2)
+    assert timeout.get_timeout("orders") == 1
+
+    for _ in range(50):
+        timeout.observe("orders", 2.0)
+    assert 2.0 <= timeout.get_timeout("orders") < 30
+    assert timeout.get_timeout("payment-sessions") == 30
+
+
+class TestClientCircuitBreaker:
+    order_url = "https://uat.api.converge.eu.elavonaws.com/orders"
+
+    def test_fails_fast_once_open(self, requests_mock):
+        client = Client("alias", "secret", circuit_breaker_threshold=2)
+        requests_mock.post(self.order_url, status_code=503)
+
+        for _ in range(2):
+            with pytest.raises(requests.HTTPError):
+                client._post(self.order_url, {})
+        with pytest.raises(CircuitOpenError):
+            client._post(self.order_url, {})
+
+        assert requests_mock.call_count == 2
+
+    def test_client_errors_do_not_open_the_circuit(self, requests_mock):
+        client = Client("alias", "secret", circuit_breaker_threshold=1)
+        requests_mock.post(self.order_url, status_code=400)
+
+        for _ in range(3):
+            with pytest.raises(requests.HTTPError):
+                client._post(self.order_url, {})
+
+    def test_disabled(self, requests_mock):
+        client = Client("alias", "secret", circuit_breaker_threshold=0)
+        requests_mock.post(self.order_url, exc=requests.ConnectionError)
+
+        for _ in range(10):
+            with pytest.raises(requests.ConnectionError):
+                client._post(self.order_url, {})
+
+    def test_adaptive_read_timeout(self, requests_mock):
+        client = Client("alias", "secret", read_timeout=30, adaptive_timeout=True, min_read_timeout=2)
+        requests_mock.post(self.order_url, json={})
+        client.adaptive_timeout.min_samples = 1
+
+        client._post(self.order_url, {})
+        client._post(self.order_url, {})
+
+        assert requests_mock.request_history[0].timeout == (client.timeout[0], 30)
+        assert requests_mock.request_history[1].timeout == (client.timeout[0], 2)
+
+
+def test_prepare_transaction_redirects_to_failure_when_open(payment, rf, requests_mock, backend_settings):
+    backend_settings(circuit_breaker_threshold=1)
+    requests_mock.post(TestClientCircuitBreaker.order_url, exc=requests.ConnectTimeout)
+
+    with pytest.raises(requests.ConnectTimeout):
+        payment.processor.prepare_transaction(request=rf.post("/"))
+    response = payment.processor.prepare_transaction(request=rf.post("/"))
+
+    assert response.status_code == 302
+    assert response.url == f"/payments/failure/{payment.pk}/"
+    assert requests_mock.call_count == 1
@@ -3,6 +3,8 @@ import uuid
 import pytest
 from requests.exceptions import HTTPError
 
+from getpaid_elavon.client import Client, get_client
+
 
 class TestClientElavon:
     session_url = "https://uat.api.converge.eu.elavonaws.com/payment-sessions"
@@ -34,6 +36,16 @@ class TestClientElavon:
         assert request_payload["items"] == expected_payload["items"]
         assert request_payload["customReference"] == str(custom_ref)
 
+    def test_create_order_encodes_item_generator(self, client, expected_payload, mock_order_response, requests_mock):
+        requests_mock.post(self.order_url, json=mock_order_response, status_code=201)
+
+        client.create_order("1", "10.00", "EUR", "Order 1", (item for item in expected_payload["items"]), uuid.uuid4())
+
+        request = requests_mock.last_request
+        assert isinstance(request.body, bytes)
+        assert request.headers["Content-Length"] == str(len(request.body))
+        assert request.json()["items"] == expected_payload["items"]
+
     def test_create_order_handles_http_401_error(self, client, order, requests_mock):
         error_response = {
             "status": 401,
@@ -129,3 +141,94 @@ class TestClientElavon:
             )
 
         assert exc_info.value.response.status_code == 401
+
+    def test_clients_share_pooled_session(self, client):
+        other = Client(merchant_alias_id="other_alias", secret_key="other_secret", sandbox=True)
+
+        assert other.session is client.session
+
+    def test_pool_configuration_is_applied(self):
+        client = Client(
+            merchant_alias_id="test_merchant_alias",
+            secret_key="test_secret_key",
+            pool_connections=2,
+            pool_maxsize=20,
+            max_retries=3,
+            retry_backoff_factor=0.5,
+        )
+
+        adapter = client.session.get_adapter(self.order_url)
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 20
+        assert adapter.max_retries.total == 3
+        assert adapter.max_retries.backoff_factor == 0.5
+        assert adapter.max_retries.read == 0
+        assert "POST" not in adapter.max_retries.allowed_methods
+
+    def test_post_is_not_retried_on_gateway_error_status(self):
+        client = Client(
+            merchant_alias_id="test_merchant_alias",
+            secret_key="test_secret_key",
+            max_retries=3,
+        )
+        adapter = client.session.get_adapter(self.order_url)
+
+        assert not adapter.max_retries.is_retry("POST", 502)
+        assert adapter.max_retries.is_retry("GET", 502)
+
+    def test_requests_are_sent_with_timeout(self, requests_mock):
+        client = Client(
+            merchant_alias_id="test_merchant_alias",
+            secret_key="test_secret_key",
+            connect_timeout=1.5,
+            read_timeout=7,
+        )
+        requests_mock.post(self.order_url, json={"id": "elavon_order_123"}, status_code=201)
+
+        client.create_order(
+            order_reference="1",
+            total_amount="1.00",
+            currency_code="EUR",
+            description="",
+            items=[],
+            custom_reference=uuid.uuid4(),
+        )
+
+        assert requests_mock.last_request.timeout == (1.5, 7)
+
+    def test_headers_are_memoized_until_credentials_change(self, client):
+        headers = client._headers()
+
+        assert client._headers() is headers
+
+        client.secret_key = "rotated_secret_key"
+
+        assert client._headers() is not headers
+        assert client._headers()["Authorization"] != headers["Authorization"]
+
+
+class TestClientRegistry:
+    params = {"merchant_alias_id": "merchant_a", "secret_key": "secret_a", "sandbox": True}
+
+    def test_client_is_reused_per_merchant_alias(self):
+        client = get_client(Client, **self.params)
+
+        assert get_client(Client, **self.params) is client
+        assert get_client(Client, **{**self.params, "merchant_alias_id": "merchant_b"}) is not client
+        assert get_client(Client, **{**self.params, "sandbox": False}) is not client
+
+    def test_client_is_rebuilt_when_credentials_rotate(self):
+        client = get_client(Client, **self.params)
+
+        rotated = get_client(Client, **{**self.params, "secret_key": "secret_b"})
+
+        assert rotated is not client
+        assert rotated.secret_key == "secret_b"
+        assert get_client(Client, **{**self.params, "secret_key": "secret_b"}) is rotated
+
+    def test_registry_is_cleared_when_settings_change(self, settings):
+        client = get_client(Client, **self.params)
+
+        settings.GETPAID_BACKEND_SETTINGS = {"getpaid_elavon": {}}
+
+        assert get_client(Client, **self.params) is not client
@@ -0,0 +1,49 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from getpaid_elavon import codec
+from getpaid_elavon.codec import JSONDecodeError, OrjsonCodec, StdlibJSONCodec, get_codec
+
+
+@pytest.mark.parametrize("json_codec", [StdlibJSONCodec(), OrjsonCodec()])
+class TestCodecs:
+    def test_round_trip(self, json_codec):
+        reference = uuid.uuid4()
+        body = json_codec.dumps({"amount": Decimal("10.50"), "customReference": reference, "name": "Zażółć"})
+
+        assert isinstance(body, bytes)
+        assert json_codec.loads(body) == {"amount": "10.50", "customReference": str(reference), "name": "Zażółć"}
+        assert json_codec.loads(body.decode()) == json_codec.loads(body)
+
+    def test_compact_sorted_output(self, json_codec):
+        assert json_codec.dumps({"b": 1, "a": [1, 2]}, sort_keys=True) == b'{"a":[1,2],"b":1}'
+
+    def test_decode_error(self, json_codec):
+        with pytest.raises(JSONDecodeError):
+            json_codec.loads(b"{invalid")
+
+    def test_unsupported_type(self, json_codec):
+        with pytest.raises(TypeError):
+            json_codec.dumps({"value": object()})
+
+
+def test_prefers_orjson():
+    assert isinstance(get_codec(), OrjsonCodec)
+
+
+def test_json_codec_setting(settings):
+    settings.GETPAID_BACKEND_SETTINGS = {"getpaid_elavon": {"json_codec": "getpaid_elavon.codec.StdlibJSONCodec"}}
+
+    assert isinstance(get_codec(), StdlibJSONCodec)
+
+
+def test_client_sends_encoded_body(client, requests_mock):
+    url = "https://uat.api.converge.eu.elavonaws.com/orders"
+    requests_mock.post(url, content=b'{"id":"order_1"}', status_code=201)
+
+    assert client._post(url, {"total": {"amount": "1.00"}}) == {"id": "order_1"}
+    request = requests_mock.last_request
+    assert request.body == codec.dumps({"total": {"amount": "1.00"}})
+    assert request.headers["Content-Type"] == "application/json"
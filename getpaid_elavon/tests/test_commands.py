@@ -0,0 +1,75 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from getpaid.types import PaymentStatus as ps
+
+API_URL = "https://uat.api.converge.eu.elavonaws.com"
+
+
+@pytest.mark.django_db
+class TestReconcileCommand:
+    @pytest.fixture
+    def payments(self):
+        from factories import PaymentFactory
+
+        return {
+            state: PaymentFactory(external_id=f"session_{state}")
+            for state in ["authorized", "declined", "open", "expired"]
+        }
+
+    @pytest.fixture
+    def elavon_api(self, requests_mock):
+        for state in ["authorized", "declined"]:
+            requests_mock.get(
+                f"{API_URL}/payment-sessions/session_{state}",
+                json={"id": f"session_{state}", "transaction": f"{API_URL}/transactions/tx_{state}"},
+            )
+            requests_mock.get(f"{API_URL}/transactions/tx_{state}", json={"state": state})
+        requests_mock.get(
+            f"{API_URL}/payment-sessions/session_open",
+            json={"id": "session_open", "transaction": None, "expiresAt": "2999-01-01T00:00:00Z"},
+        )
+        requests_mock.get(
+            f"{API_URL}/payment-sessions/session_expired",
+            json={"id": "session_expired", "transaction": None, "expiresAt": "2000-01-01T00:00:00Z"},
+        )
+        return requests_mock
+
+    def test_applies_missed_transitions(self, payments, elavon_api, get_status):
+        stdout = StringIO()
+
+        call_command("elavon_reconcile", workers=2, batch_size=3, stdout=stdout)
+
+        assert get_status(payments["authorized"]) == ps.PAID
+        assert get_status(payments["declined"]) == ps.FAILED
+        assert get_status(payments["open"]) == ps.NEW
+        assert get_status(payments["expired"]) == ps.FAILED
+        assert "4 reconciled, 3 updated, 0 errors" in stdout.getvalue()
+        assert "payments/s" in stdout.getvalue()
+
+    def test_resumes_from_checkpoint(self, payments, elavon_api, tmp_path, get_status):
+        checkpoint = tmp_path / "checkpoint.json"
+
+        call_command("elavon_reconcile", limit=2, checkpoint=str(checkpoint), stdout=StringIO())
+        first_pks = sorted(str(p.pk) for p in payments.values())[:2]
+        assert json.loads(checkpoint.read_text()) == {"last_pk": first_pks[-1]}
+        calls = elavon_api.call_count
+
+        stdout = StringIO()
+        call_command("elavon_reconcile", checkpoint=str(checkpoint), stdout=stdout)
+
+        assert "Reconciling 2 payment(s)" in stdout.getvalue()
+        assert elavon_api.call_count > calls
+        assert all(get_status(p) != ps.NEW for k, p in payments.items() if k != "open")
+
+    def test_reports_api_errors_without_aborting(self, payments, elavon_api, get_status):
+        elavon_api.get(f"{API_URL}/payment-sessions/session_declined", status_code=500)
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command("elavon_reconcile", stdout=stdout, stderr=stderr)
+
+        assert "1 errors" in stdout.getvalue()
+        assert str(payments["declined"].pk) in stderr.getvalue()
+        assert get_status(payments["authorized"]) == ps.PAID
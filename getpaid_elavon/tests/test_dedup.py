@@ -0,0 +1,128 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import OperationalError, transaction
+from django.utils.timezone import now
+from getpaid.types import PaymentStatus as ps
+
+from getpaid_elavon.dedup import WebhookDeduplicator, get_event_key
+from getpaid_elavon.models import WebhookDelivery, WebhookEvent
+from getpaid_elavon.queues import DatabaseWebhookQueue
+from getpaid_elavon.webhooks import get_payment_for_session
+
+
+def fail_once(func):
+    errors = [OperationalError("database is locked")]
+
+    def side_effect(*args, **kwargs):
+        if errors:
+            raise errors.pop()
+        return func(*args, **kwargs)
+
+    return side_effect
+
+
+@pytest.fixture
+def deduplication(backend_settings):
+    backend_settings(webhook_deduplication=True)
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestWebhookDeduplication:
+    def test_event_key(self, webhook_payload):
+        data = webhook_payload("session_1", "saleDeclined")
+
+        assert get_event_key(data) == "id:notification-session_1-saleDeclined"
+        assert get_event_key({**data, "id": None}) == "session:session_1:saleDeclined"
+        assert get_event_key({"resourceType": "transaction"}) is None
+
+    def test_redelivery_is_answered_without_queries(
+        self,
+        deduplication,
+        payment,
+        signed_webhook,
+        webhook_payload,
+        django_assert_num_queries,
+        django_capture_on_commit_callbacks,
+        callback_view,
+    ):
+        type(payment).objects.filter(pk=payment.pk).update(external_id="session_1")
+        data = webhook_payload("session_1")
+        with django_capture_on_commit_callbacks(execute=True):
+            assert callback_view(signed_webhook(data)).status_code == 200
+
+        with django_assert_num_queries(0):
+            response = callback_view(signed_webhook(data))
+
+        assert response.status_code == 200
+
+    def test_table_tier_catches_duplicates_missing_from_cache(self, deduplication, webhook_payload):
+        deduplicator = WebhookDeduplicator()
+        data = webhook_payload("session_1")
+
+        assert deduplicator.claim(data)
+        cache.clear()
+
+        assert not deduplicator.claim(data)
+
+    def test_claim_is_rolled_back_with_its_transaction(self, deduplication, webhook_payload):
+        deduplicator = WebhookDeduplicator()
+        data = webhook_payload("session_1")
+
+        with pytest.raises(OperationalError), transaction.atomic():
+            assert deduplicator.claim(data)
+            raise OperationalError("database is locked")
+
+        assert not WebhookDelivery.objects.exists()
+        assert deduplicator.claim(data)
+
+    def test_redelivery_is_processed_after_handling_error(
+        self, deduplication, payment, signed_webhook, webhook_payload, callback_view, get_status
+    ):
+        type(payment).objects.filter(pk=payment.pk).update(external_id="session_1")
+        data = webhook_payload("session_1")
+
+        with mock.patch("getpaid_elavon.views.get_payment_for_session", side_effect=fail_once(get_payment_for_session)):
+            with pytest.raises(OperationalError):
+                callback_view(signed_webhook(data))
+            response = callback_view(signed_webhook(data))
+
+        assert response.status_code == 200
+        assert get_status(payment) == ps.PAID
+
+    def test_redelivery_is_queued_after_enqueue_error(
+        self, backend_settings, deduplication, signed_webhook, webhook_payload, callback_view
+    ):
+        backend_settings(webhook_processing="queue")
+        data = webhook_payload("session_1")
+
+        with mock.patch.object(
+            DatabaseWebhookQueue, "enqueue", autospec=True, side_effect=fail_once(DatabaseWebhookQueue.enqueue)
+        ) as enqueue:
+            with pytest.raises(OperationalError):
+                callback_view(signed_webhook(data))
+            callback_view(signed_webhook(data))
+
+        assert enqueue.call_count == 2
+        assert WebhookEvent.objects.count() == 1
+
+    def test_unknown_payment_releases_claim(self, deduplication, signed_webhook, webhook_payload, callback_view):
+        data = webhook_payload("missing")
+
+        callback_view(signed_webhook(data))
+
+        assert not WebhookDelivery.objects.exists()
+        assert WebhookDeduplicator().claim(data)
+
+    def test_evicts_expired_rows(self, deduplication):
+        WebhookDelivery.objects.create(event_key="id:old")
+        WebhookDelivery.objects.filter(event_key="id:old").update(created_on=now() - timedelta(days=2))
+        WebhookDelivery.objects.create(event_key="id:recent")
+
+        assert WebhookDeduplicator(ttl=86400).evict() == 1
+        assert list(WebhookDelivery.objects.values_list("event_key", flat=True)) == ["id:recent"]
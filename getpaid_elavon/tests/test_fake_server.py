@@ -0,0 +1,174 @@
+import json
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+import requests
+from getpaid.types import PaymentStatus as ps
+
+from getpaid_elavon.client import Client
+from getpaid_elavon.fake_server import FakeElavonServer
+from getpaid_elavon.types import OrderItem
+from getpaid_elavon.webhooks import verify_signature
+
+SHARED_SECRET = "dGVzdC13ZWJob29rLXNoYXJlZC1zZWNyZXQ="
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append((self.headers, body))
+        self.send_response(self.server.statuses.pop(0) if self.server.statuses else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def receiver():
+    """Local webhook endpoint recording what it received; answers with queued ``statuses``, then 200."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReceiverHandler)
+    server.received = []
+    server.statuses = []
+    server.url = f"http://127.0.0.1:{server.server_port}/callback/"
+    Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fake_server(request):
+    options = getattr(request, "param", {})
+    with FakeElavonServer(auto_pay=False, seed=1, **options) as server:
+        yield server
+
+
+@pytest.fixture
+def fake_client(fake_server):
+    return Client(merchant_alias_id="alias", secret_key="secret", base_url=f"{fake_server.url}/")
+
+
+def create_session(client):
+    order = client.create_order("1", "10.00", "EUR", "Order 1", [], uuid.uuid4())
+    return client.create_payment_session(
+        order["href"], "https://shop/return/", "https://shop/cancel/", uuid.uuid4(), {}
+    )
+
+
+def test_base_url_overrides_environment(backend_settings):
+    backend_settings(base_url="http://fake:8089/")
+    from factories import PaymentFactory
+
+    client = PaymentFactory.build().processor.client
+
+    assert client.get_baseurl() == "http://fake:8089"
+    assert Client("alias", "secret", sandbox=False).get_baseurl() == Client.production_url
+
+
+def test_checkout_and_payment(fake_server, fake_client):
+    session = create_session(fake_client)
+
+    assert session["url"].startswith(f"{fake_server.url}/hpp/")
+    assert fake_client.get_payment_session(session["id"])["transaction"] is None
+
+    fake_server.pay(session["id"])
+
+    transaction_url = fake_client.get_payment_session(session["id"])["transaction"]
+    assert fake_client.get_resource(transaction_url)["state"] == "authorized"
+
+
+def test_streamed_order_body(fake_server):
+    client = Client(merchant_alias_id="alias", secret_key="secret", base_url=fake_server.url, stream_order_body=True)
+    items = (OrderItem(f"Item {index}", "1.00", "EUR") for index in range(1000))
+
+    order = client.create_order("1", "1000.00", "EUR", "Order 1", items, uuid.uuid4())
+
+    assert [item["description"] for item in client.get_resource(order["href"])["items"]] == [
+        f"Item {index}" for index in range(1000)
+    ]
+
+
+@pytest.mark.parametrize("fake_server", [{"error_rate": 1.0, "error_status": 502}], indirect=True)
+def test_injected_errors(fake_server, fake_client):
+    with pytest.raises(requests.HTTPError) as excinfo:
+        fake_client.create_order("1", "10.00", "EUR", "Order 1", [], uuid.uuid4())
+
+    assert excinfo.value.response.status_code == 502
+    assert fake_server.stats["errors"] == 1
+
+
+def test_requires_credentials(fake_server):
+    assert requests.post(f"{fake_server.url}/orders", json={}).status_code == 401
+
+
+def test_signed_webhooks_out_of_order_with_redelivery(receiver):
+    with FakeElavonServer(
+        webhook_url=receiver.url,
+        webhook_shared_secret=SHARED_SECRET,
+        webhook_signer_id="test",
+        out_of_order=True,
+        redeliveries=1,
+        redelivery_delay=0,
+        webhook_workers=1,
+        auto_pay=False,
+    ) as server:
+        client = Client(merchant_alias_id="alias", secret_key="secret", base_url=server.url)
+        session = create_session(client)
+        server.pay(session["id"], declined=True)
+        assert server.wait_idle(timeout=5)
+
+    notifications = [json.loads(body) for _, body in receiver.received]
+    assert [notification["eventType"] for notification in notifications] == [
+        "saleDeclined",
+        "saleAuthorizationPending",
+        "saleDeclined",
+        "saleAuthorizationPending",
+    ]
+    assert notifications[0]["id"] == notifications[2]["id"]
+    assert {notification["resource"] for notification in notifications} == {session["href"]}
+    assert all(verify_signature(headers, body, SHARED_SECRET, "test") for headers, body in receiver.received)
+
+
+def test_failed_delivery_is_retried(receiver):
+    receiver.statuses = [500]
+    with FakeElavonServer(
+        webhook_url=receiver.url,
+        webhook_shared_secret=SHARED_SECRET,
+        webhook_signer_id="test",
+        webhook_retry_backoff=0,
+        webhook_workers=1,
+    ) as server:
+        create_session(Client(merchant_alias_id="alias", secret_key="secret", base_url=server.url))
+        assert server.wait_idle(timeout=5)
+
+    assert len(receiver.received) == 3
+    assert receiver.received[0][1] == receiver.received[1][1]
+    assert server.stats["webhooks_delivered"] == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_end_to_end_checkout_and_webhooks(live_server, rf, webhook_secret, backend_settings, get_status):
+    from factories import PaymentFactory
+
+    with FakeElavonServer(
+        webhook_url=f"{live_server.url}/callback/",
+        webhook_shared_secret=webhook_secret,
+        webhook_signer_id="test",
+        redeliveries=1,
+        redelivery_delay=0,
+        auto_pay=False,
+    ) as server:
+        backend_settings(base_url=server.url)
+        payment = PaymentFactory()
+
+        response = payment.processor.prepare_transaction(request=rf.post("/"))
+        server.pay(type(payment).objects.get(pk=payment.pk).external_id)
+        assert server.wait_idle(timeout=10)
+
+    assert response.url.startswith(f"{server.url}/hpp/")
+    assert server.stats["webhooks_delivered"] == 4
+    assert get_status(payment) == ps.PAID
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+
+import getpaid_elavon
+from getpaid_elavon.processor import PaymentProcessor
+
+# getpaid_elavon imports during django.setup() with cached bytecode take ~6ms, ~115ms when they loaded the HTTP stack
+IMPORT_TIME_BUDGET_US = 50_000
+DEFERRED_MODULES = ("requests", "urllib3", "httpx", "orjson")
+
+
+def run_python(code: str, *options: str, settings_module: str = "tests.settings") -> subprocess.CompletedProcess:
+    env = {name: value for name, value in os.environ.items() if name != "PYTHONDONTWRITEBYTECODE"}
+    env["DJANGO_SETTINGS_MODULE"] = settings_module
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=settings.BASE_DIR,
+        env=env,
+        check=True,
+    )
+
+
+def loaded_modules(code: str, packages: tuple = DEFERRED_MODULES, **kwargs) -> set:
+    report = f"import sys; print(' '.join(m for m in sys.modules if m.split('.')[0] in {packages!r}))"
+    return set(run_python(f"{code}; {report}", **kwargs).stdout.split())
+
+
+def package_import_time(importtime: str) -> int:
+    """
+    Microseconds of the imports started by getpaid_elavon modules, from ``python -X importtime`` output.
+    """
+    lines = [line for line in importtime.splitlines() if line.startswith("import time:") and "[us]" not in line]
+    total = 0
+    stack = []
+    # children are printed before their parent, walk backwards to see the parents first
+    for line in reversed(lines):
+        _, cumulative, name_field = line[len("import time:") :].split("|")
+        depth = (len(name_field) - len(name_field.lstrip()) - 1) // 2
+        name = name_field.strip()
+        del stack[depth:]
+        if name.startswith("getpaid_elavon") and not any(parent.startswith("getpaid_elavon") for parent in stack):
+            total += int(cumulative)
+        stack.append(name)
+    return total
+
+
+def test_package_import_needs_no_settings():
+    packages = (*DEFERRED_MODULES, "django", "swapper", "getpaid")
+
+    assert loaded_modules("import getpaid_elavon", packages, settings_module="missing.settings") == set()
+
+
+def test_django_setup_defers_http_stack():
+    assert loaded_modules("import django; django.setup()") == set()
+
+
+def test_processor_is_loaded_on_first_access():
+    assert getpaid_elavon.PaymentProcessor is PaymentProcessor
+    with pytest.raises(AttributeError):
+        getpaid_elavon.__getattr__("Missing")
+
+
+def test_import_time_budget():
+    run_python("import django; django.setup()")  # writes the bytecode caches
+    timings = [
+        package_import_time(run_python("import django; django.setup()", "-X", "importtime").stderr) for _ in range(3)
+    ]
+
+    assert min(timings) < IMPORT_TIME_BUDGET_US
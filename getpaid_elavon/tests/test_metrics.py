@@ -0,0 +1,103 @@
+import pytest
+import requests
+from django.http import Http404
+
+from getpaid_elavon.metrics import InMemoryMetricsExporter, get_endpoint, get_metrics
+from getpaid_elavon.views import MetricsView
+
+metrics_view = MetricsView.as_view()
+
+
+@pytest.fixture
+def metrics(backend_settings):
+    backend_settings(metrics_enabled=True)
+    return get_metrics()
+
+
+def test_get_endpoint():
+    assert get_endpoint("https://uat.api.converge.eu.elavonaws.com/orders") == "orders"
+    assert get_endpoint("https://uat.api.converge.eu.elavonaws.com/payment-sessions/abc/") == "payment-sessions/{id}"
+
+
+def test_render_prometheus_text():
+    exporter = InMemoryMetricsExporter(buckets=(0.1, 1.0))
+    exporter.inc("elavon_webhooks_total", event_type="saleAuthorized", outcome="processed")
+    exporter.inc("elavon_webhooks_total", event_type="saleAuthorized", outcome="processed")
+    exporter.observe("elavon_webhook_duration_seconds", 0.1, event_type='"quoted"')
+    exporter.observe("elavon_webhook_duration_seconds", 2.0, event_type='"quoted"')
+
+    assert exporter.render() == (
+        "# TYPE elavon_webhooks_total counter\n"
+        'elavon_webhooks_total{event_type="saleAuthorized",outcome="processed"} 2\n'
+        "# TYPE elavon_webhook_duration_seconds histogram\n"
+        'elavon_webhook_duration_seconds_bucket{event_type="\\"quoted\\"",le="0.1"} 1\n'
+        'elavon_webhook_duration_seconds_bucket{event_type="\\"quoted\\"",le="1.0"} 1\n'
+        'elavon_webhook_duration_seconds_bucket{event_type="\\"quoted\\"",le="+Inf"} 2\n'
+        'elavon_webhook_duration_seconds_sum{event_type="\\"quoted\\""} 2.1\n'
+        'elavon_webhook_duration_seconds_count{event_type="\\"quoted\\""} 2\n'
+    )
+
+
+def test_metrics_are_disabled_by_default(rf, client, requests_mock):
+    requests_mock.get("https://uat.api.converge.eu.elavonaws.com/payment-sessions/abc", json={})
+    client.get_payment_session("abc")
+
+    assert get_metrics() is None
+    with pytest.raises(Http404):
+        metrics_view(rf.get("/metrics/"))
+
+
+class TestInstrumentation:
+    def test_client_requests(self, metrics, client, requests_mock):
+        requests_mock.get("https://uat.api.converge.eu.elavonaws.com/payment-sessions/abc", json={})
+        requests_mock.post("https://uat.api.converge.eu.elavonaws.com/orders", exc=requests.ConnectionError)
+
+        client.get_payment_session("abc")
+        with pytest.raises(requests.ConnectionError):
+            client._post("https://uat.api.converge.eu.elavonaws.com/orders", {})
+
+        series = metrics.histograms["elavon_api_request_duration_seconds"]
+        assert set(series) == {
+            (
+                ("endpoint", "payment-sessions/{id}"),
+                ("method", "GET"),
+                ("status", "200"),
+                ("merchant_alias", "test_merchant_alias"),
+            ),
+            (
+                ("endpoint", "orders"),
+                ("method", "POST"),
+                ("status", "error"),
+                ("merchant_alias", "test_merchant_alias"),
+            ),
+        }
+
+    @pytest.mark.django_db
+    def test_webhook_outcomes(self, webhook_secret, metrics, payment, signed_webhook, webhook_payload, callback_view):
+        type(payment).objects.filter(pk=payment.pk).update(external_id="session_1")
+
+        callback_view(signed_webhook(webhook_payload("session_1", "saleDeclined")))
+        callback_view(signed_webhook(webhook_payload("unknown_session", "saleDeclined")))
+        callback_view(signed_webhook(webhook_payload("session_1"), signed=False))
+
+        assert metrics.counters["elavon_webhooks_total"] == {
+            (("event_type", "saleDeclined"), ("outcome", "processed")): 1,
+            (("event_type", "saleDeclined"), ("outcome", "payment_not_found")): 1,
+            (("event_type", "unknown"), ("outcome", "invalid_signature")): 1,
+        }
+        assert sum(h[2] for h in metrics.histograms["elavon_webhook_duration_seconds"].values()) == 3
+
+    def test_metrics_view(self, metrics, rf):
+        metrics.inc("elavon_webhooks_total", event_type="expired", outcome="processed")
+
+        response = metrics_view(rf.get("/metrics/"))
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert b'elavon_webhooks_total{event_type="expired",outcome="processed"} 1' in response.content
+
+    def test_metrics_view_token(self, settings, rf):
+        settings.GETPAID_BACKEND_SETTINGS = {"getpaid_elavon": {"metrics_enabled": True, "metrics_token": "s3cret"}}
+
+        assert metrics_view(rf.get("/metrics/")).status_code == 401
+        assert metrics_view(rf.get("/metrics/", HTTP_AUTHORIZATION="Bearer s3cret")).status_code == 200
@@ -1,4 +1,18 @@
+import asyncio
+import threading
+from datetime import timedelta
+from unittest import mock
+
+import httpx
+import pytest
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from getpaid_elavon.client import AsyncClient
+from getpaid_elavon.models import PaymentSession
 
 
 class TestGetpaid_elavon(TestCase):
@@ -10,3 +24,283 @@ class TestGetpaid_elavon(TestCase):
 
     def tearDown(self):
         pass
+
+
+class TestPrepareTransaction:
+    order_url = "https://uat.api.converge.eu.elavonaws.com/orders"
+    session_url = "https://uat.api.converge.eu.elavonaws.com/payment-sessions"
+    session_response = {
+        "id": "test_session_123",
+        "url": "https://uat.hpp.converge.eu.elavonaws.com/pay/test_session_123",
+    }
+
+    def test_prepare_transaction_redirects_to_hpp(self, payment, mock_order_response, rf, requests_mock):
+        requests_mock.post(self.order_url, json=mock_order_response, status_code=201)
+        requests_mock.post(self.session_url, json=self.session_response, status_code=201)
+
+        response = payment.processor.prepare_transaction(request=rf.post("/"))
+
+        assert response.status_code == 302
+        assert response.url == self.session_response["url"]
+        session_payload = requests_mock.last_request.json()
+        assert session_payload["order"] == mock_order_response["href"]
+        assert session_payload["cancelUrl"] == f"http://testserver/payments/failure/{payment.pk}/"
+        assert type(payment).objects.get(pk=payment.pk).external_id == "test_session_123"
+        assert PaymentSession.objects.get(session_id="test_session_123").payment_id == payment.pk
+
+    def test_order_items_are_encoded_lazily(self, payment, mock_order_response, rf, requests_mock):
+        requests_mock.post(self.order_url, json=mock_order_response, status_code=201)
+        requests_mock.post(self.session_url, json=self.session_response, status_code=201)
+        lines = ({"name": f"Line {index}", "quantity": index} for index in range(3))
+
+        with mock.patch.object(type(payment.order), "get_items", return_value=lines):
+            context = payment.processor.get_paywall_context()
+            assert next(lines)["name"] == "Line 0"
+            payment.processor.client.create_order(**context)
+
+        items = requests_mock.request_history[0].json()["items"]
+        assert items == [
+            {"total": {"amount": index, "currencyCode": payment.order.get_currency()}, "description": f"Line {index}"}
+            for index in (1, 2)
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_aprepare_transaction_redirects_to_hpp(self, mock_order_response, rf):
+        from factories import PaymentFactory
+
+        payment = PaymentFactory()
+
+        def handler(request):
+            if request.url.path == "/orders":
+                return httpx.Response(201, json=mock_order_response)
+            return httpx.Response(201, json=self.session_response)
+
+        processor = payment.processor
+        processor._async_client = AsyncClient(
+            **processor.get_client_params(),
+            transport=httpx.MockTransport(handler),
+        )
+
+        response = asyncio.run(processor.aprepare_transaction(request=rf.post("/")))
+
+        assert response.status_code == 302
+        assert response.url == self.session_response["url"]
+        assert type(payment).objects.get(pk=payment.pk).external_id == "test_session_123"
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize("checkout_mode, in_transaction", [("atomic", True), ("pipelined", False)])
+    def test_checkout_mode_controls_transaction_scope(
+        self, checkout_mode, in_transaction, mock_order_response, rf, requests_mock, backend_settings
+    ):
+        from factories import PaymentFactory
+
+        backend_settings(checkout_mode=checkout_mode)
+        payment = PaymentFactory()
+        caller = threading.current_thread()
+        seen = []
+
+        def record_state():
+            # the connection is thread-local, so its state is only meaningful on the caller's thread
+            assert threading.current_thread() is caller
+            seen.append(connection.in_atomic_block)
+
+        def order_callback(request, context):
+            record_state()
+            context.status_code = 201
+            return mock_order_response
+
+        def session_callback(request, context):
+            record_state()
+            context.status_code = 201
+            return self.session_response
+
+        requests_mock.post(self.order_url, json=order_callback)
+        requests_mock.post(self.session_url, json=session_callback)
+
+        response = payment.processor.prepare_transaction(request=rf.post("/"))
+
+        assert response.url == self.session_response["url"]
+        assert seen == [in_transaction, in_transaction]
+        assert type(payment).objects.get(pk=payment.pk).external_id == "test_session_123"
+        assert PaymentSession.objects.filter(session_id="test_session_123", payment=payment).exists()
+
+
+class TestSessionReuse:
+    order_url = TestPrepareTransaction.order_url
+    session_url = TestPrepareTransaction.session_url
+
+    @pytest.fixture(autouse=True)
+    def session_reuse(self, backend_settings):
+        backend_settings(session_reuse=True)
+        cache.clear()
+        yield
+        cache.clear()
+
+    def mock_gateway(self, requests_mock, mock_order_response, **session_response):
+        requests_mock.post(self.order_url, json=mock_order_response, status_code=201)
+        requests_mock.post(
+            self.session_url, json={**TestPrepareTransaction.session_response, **session_response}, status_code=201
+        )
+
+    def test_repeat_checkout_reuses_session(self, payment, mock_order_response, rf, requests_mock):
+        self.mock_gateway(requests_mock, mock_order_response)
+
+        first = payment.processor.prepare_transaction(request=rf.post("/"))
+        second = payment.processor.prepare_transaction(request=rf.post("/"))
+
+        assert first.url == second.url == TestPrepareTransaction.session_response["url"]
+        assert requests_mock.call_count == 2
+
+    def test_changed_amount_creates_new_session(self, payment, mock_order_response, rf, requests_mock):
+        self.mock_gateway(requests_mock, mock_order_response)
+        payment.processor.prepare_transaction(request=rf.post("/"))
+
+        payment.order.total += 1
+        payment.order.save()
+        payment.processor.prepare_transaction(request=rf.post("/"))
+
+        assert requests_mock.call_count == 4
+
+    def test_session_close_to_expiry_is_not_reused(self, payment, mock_order_response, rf, requests_mock):
+        expires_at = (now() + timedelta(seconds=30)).isoformat()
+        self.mock_gateway(requests_mock, mock_order_response, expiresAt=expires_at)
+
+        payment.processor.prepare_transaction(request=rf.post("/"))
+        payment.processor.prepare_transaction(request=rf.post("/"))
+
+        assert requests_mock.call_count == 4
+
+    @pytest.mark.django_db(transaction=True)
+    def test_async_checkout_reuses_session(self, mock_order_response, rf):
+        from factories import PaymentFactory
+
+        payment = PaymentFactory()
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            if request.url.path == "/orders":
+                return httpx.Response(201, json=mock_order_response)
+            return httpx.Response(201, json=TestPrepareTransaction.session_response)
+
+        processor = payment.processor
+        processor._async_client = AsyncClient(
+            **processor.get_client_params(),
+            transport=httpx.MockTransport(handler),
+        )
+
+        asyncio.run(processor.aprepare_transaction(request=rf.post("/")))
+        response = asyncio.run(processor.aprepare_transaction(request=rf.post("/")))
+
+        assert response.url == TestPrepareTransaction.session_response["url"]
+        assert calls == ["/orders", "/payment-sessions"]
+
+
+@pytest.mark.django_db
+class TestBulkCheckout:
+    order_url = TestPrepareTransaction.order_url
+    session_url = TestPrepareTransaction.session_url
+
+    def test_prepare_transactions(self, requests_mock):
+        from factories import PaymentFactory
+        from getpaid_elavon.processor import PaymentProcessor
+
+        payments = PaymentFactory.create_batch(3)
+        failing_reference = str(payments[1].order.pk)
+
+        def order_callback(request, context):
+            reference = request.json()["orderReference"]
+            context.status_code = 500 if reference == failing_reference else 201
+            return {"id": f"order_{reference}", "href": f"{self.order_url}/order_{reference}"}
+
+        def session_callback(request, context):
+            order_id = request.json()["order"].rsplit("/", 1)[-1]
+            context.status_code = 201
+            return {"id": f"session_{order_id}", "url": f"https://hpp.example.com/{order_id}"}
+
+        requests_mock.post(self.order_url, json=order_callback)
+        requests_mock.post(self.session_url, json=session_callback)
+
+        with CaptureQueriesContext(connection) as queries:
+            results = PaymentProcessor.prepare_transactions(
+                payments, site_url="https://shop.example.com/", max_workers=2
+            )
+
+        assert [result["payment_id"] for result in results] == [payment.id for payment in payments]
+        assert results[1]["url"] is None and results[1]["session_id"] is None
+        assert "500 Server Error" in str(results[1]["error"])
+        for payment, result in zip(payments[::2], results[::2]):
+            assert result["error"] is None
+            assert result["url"] == f"https://hpp.example.com/order_{payment.order.pk}"
+            assert type(payment).objects.get(pk=payment.pk).external_id == result["session_id"]
+            assert PaymentSession.objects.filter(session_id=result["session_id"], payment=payment).exists()
+        assert type(payments[1]).objects.get(pk=payments[1].pk).external_id == payments[1].external_id
+        assert len([q for q in queries if q["sql"].startswith("UPDATE")]) == 1
+
+        session_payloads = [r.json() for r in requests_mock.request_history if r.url == self.session_url]
+        assert session_payloads[0]["cancelUrl"].startswith("https://shop.example.com/payments/failure/")
+
+    def test_prepare_transactions_reads_items_on_calling_thread(self, requests_mock, mock_order_response):
+        from factories import PaymentFactory
+        from getpaid_elavon.processor import PaymentProcessor
+
+        requests_mock.post(self.order_url, json=mock_order_response, status_code=201)
+        requests_mock.post(self.session_url, json={"id": "session_1", "url": "https://hpp/pay"}, status_code=201)
+        payments = PaymentFactory.create_batch(2)
+        threads = []
+
+        def get_items():
+            threads.append(threading.current_thread())
+            yield {"name": "Line", "quantity": 1}
+
+        with mock.patch.object(type(payments[0].order), "get_items", side_effect=get_items):
+            results = PaymentProcessor.prepare_transactions(payments, max_workers=2)
+
+        assert [result["error"] for result in results] == [None, None]
+        assert threads == [threading.current_thread()] * 2
+
+
+class TestClientParams:
+    def test_processors_share_client(self, db):
+        from factories import PaymentFactory
+
+        first, second = PaymentFactory(), PaymentFactory()
+
+        assert first.processor.client is second.processor.client
+
+
+@pytest.mark.django_db
+class TestApplyWebhookEvent:
+    def get_updates(self, queries):
+        return [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+
+    def test_saves_only_changed_fields(self, payment, webhook_payload):
+        with CaptureQueriesContext(connection) as queries:
+            payment.processor.apply_webhook_event(webhook_payload("session_1", "saleAuthorizationPending"))
+
+        (update,) = self.get_updates(queries)
+        set_clause = update.split(" SET ")[1].split(" WHERE ")[0]
+        assert sorted(column.split(" = ")[0].strip('"') for column in set_clause.split(", ")) == [
+            "amount_locked",
+            "status",
+        ]
+
+    @pytest.mark.parametrize("event_type", ["unknownEvent", "saleAuthorizationPending"])
+    def test_skips_write_when_nothing_changed(self, payment, webhook_payload, event_type):
+        payment.processor.apply_webhook_event(webhook_payload("session_1", "saleAuthorizationPending"))
+
+        with CaptureQueriesContext(connection) as queries:
+            payment.processor.apply_webhook_event(webhook_payload("session_1", event_type))
+
+        assert self.get_updates(queries) == []
+
+    def test_callback_view_locks_payment_row(self, payment, signed_webhook, webhook_payload, callback_view):
+        from django.db.models.query import QuerySet
+
+        type(payment).objects.filter(pk=payment.pk).update(external_id="session_1")
+        select_for_update = QuerySet.select_for_update
+
+        with mock.patch.object(QuerySet, "select_for_update", autospec=True, side_effect=select_for_update) as lock:
+            callback_view(signed_webhook(webhook_payload("session_1")))
+
+        assert lock.call_args.args[0].model is type(payment)
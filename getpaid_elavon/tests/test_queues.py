@@ -0,0 +1,68 @@
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from getpaid.types import PaymentStatus as ps
+
+from getpaid_elavon.models import PaymentSession, WebhookEvent
+from getpaid_elavon.queues import DatabaseWebhookQueue
+
+
+@pytest.fixture
+def queue_mode(backend_settings):
+    backend_settings(webhook_processing="queue", webhook_max_attempts=2)
+
+
+@pytest.mark.django_db
+class TestWebhookQueue:
+    def test_view_enqueues_and_acknowledges(
+        self, queue_mode, payment, signed_webhook, webhook_payload, callback_view, get_status
+    ):
+        type(payment).objects.filter(pk=payment.pk).update(external_id="session_1")
+
+        response = callback_view(signed_webhook(webhook_payload("session_1")))
+
+        assert response.status_code == 200
+        event = WebhookEvent.objects.get()
+        assert event.payment_session_id == "session_1"
+        assert event.event_type == "saleAuthorized"
+        assert event.status == WebhookEvent.Status.PENDING
+        assert get_status(payment) == ps.NEW
+
+    def test_worker_command_applies_events(
+        self, queue_mode, payment, signed_webhook, webhook_payload, callback_view, get_status
+    ):
+        type(payment).objects.filter(pk=payment.pk).update(external_id="session_1")
+        callback_view(signed_webhook(webhook_payload("session_1")))
+
+        call_command("elavon_process_webhooks", once=True, stdout=mock.Mock())
+
+        assert get_status(payment) == ps.PAID
+        assert WebhookEvent.objects.get().status == WebhookEvent.Status.PROCESSED
+
+    def test_failing_event_is_retried_then_marked_failed(self, queue_mode, payment, webhook_payload, get_status):
+        type(payment).objects.filter(pk=payment.pk).update(external_id="session_1")
+        queue = DatabaseWebhookQueue()
+        queue.enqueue(webhook_payload("session_1"))
+
+        with mock.patch("getpaid_elavon.processor.PaymentProcessor.apply_webhook_event", side_effect=ValueError):
+            assert queue.process() == 1
+            assert WebhookEvent.objects.get().status == WebhookEvent.Status.PENDING
+            queue.process()
+
+        event = WebhookEvent.objects.get()
+        assert event.status == WebhookEvent.Status.FAILED
+        assert event.attempts == 2
+        assert get_status(payment) == ps.NEW
+
+    def test_failed_event_does_not_advance_ledger(self, queue_mode, payment, webhook_payload, get_status):
+        PaymentSession.objects.create(session_id="session_1", payment=payment)
+        queue = DatabaseWebhookQueue()
+        queue.enqueue(webhook_payload("session_1"))
+
+        with mock.patch("getpaid_elavon.processor.PaymentProcessor.apply_webhook_event", side_effect=ValueError):
+            queue.process()
+        queue.process()
+
+        assert get_status(payment) == ps.PAID
+        assert PaymentSession.objects.get().event_type == "saleAuthorized"
@@ -0,0 +1,73 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from getpaid_elavon.types import (
+    OrderItem,
+    OrderRequest,
+    PaymentSessionRequest,
+    PaymentSessionResponse,
+    WebhookNotification,
+)
+
+
+def test_order_request_to_dict():
+    reference = uuid.uuid4()
+    item = {"total": {"amount": "1.00", "currencyCode": "EUR"}, "description": "Ready made"}
+    order = OrderRequest("1", "3.00", "EUR", "Order 1", [OrderItem("Item", "2.00", "EUR"), item], reference)
+
+    assert order.to_dict() == {
+        "orderReference": "1",
+        "total": {"currencyCode": "EUR", "amount": "3.00"},
+        "description": "Order 1",
+        "items": [{"total": {"amount": "2.00", "currencyCode": "EUR"}, "description": "Item"}, item],
+        "customReference": str(reference),
+    }
+
+
+@pytest.mark.parametrize("count", [0, 4, 5])
+def test_order_request_iter_encode_matches_to_dict(count):
+    reference = uuid.uuid4()
+    items = [OrderItem(f"Item {index}", "1.00", "EUR") for index in range(count)]
+    order = OrderRequest("1", "3.00", "EUR", "Order 1", iter(items), reference)
+
+    chunks = list(order.iter_encode(items_per_chunk=2))
+
+    assert len(chunks) == 2 + (count + 1) // 2
+    assert json.loads(b"".join(chunks)) == OrderRequest("1", "3.00", "EUR", "Order 1", items, reference).to_dict()
+
+
+def test_payment_session_request_omits_empty_bill_to():
+    request = PaymentSessionRequest("order-url", "return-url", "cancel-url", uuid.uuid4())
+
+    assert "billTo" not in request.to_dict()
+    assert request.to_dict()["shopperEmailAddress"] is None
+
+
+def test_models_are_slotted():
+    with pytest.raises(AttributeError):
+        OrderItem("Item", "2.00", "EUR").extra = 1
+
+
+def test_response_is_decoded_on_first_access():
+    session = PaymentSessionResponse(b'{"id": "s1", "url": "https://hpp", "expiresAt": "2026-01-01T12:15:00Z"}')
+
+    assert session._data is None
+    assert session.url == "https://hpp"
+    assert session.expires_at == datetime(2026, 1, 1, 12, 15, tzinfo=timezone.utc)
+    assert session.transaction is None
+    assert session.id == "s1"
+
+
+@pytest.mark.parametrize(
+    "data, session_id",
+    [
+        ({"resourceType": "paymentSession", "resource": "https://api/payment-sessions/abc/"}, "abc"),
+        ({"resourceType": "paymentSession", "resource": None}, None),
+        ({"resourceType": "transaction", "resource": "https://api/transactions/abc"}, None),
+    ],
+)
+def test_webhook_notification_payment_session_id(data, session_id):
+    assert WebhookNotification(data).payment_session_id == session_id
@@ -0,0 +1,84 @@
+import logging
+
+import pytest
+
+from getpaid_elavon.utils import REDACTED, LazyFields, StructuredLogger, redact, redact_headers
+
+
+class Unrenderable:
+    def __str__(self):
+        raise AssertionError("rendered a disabled record")
+
+    __repr__ = __str__
+
+
+def test_redact_headers():
+    headers = {"Authorization": "Basic abc", "Signature-test": "sig", "Content-Type": "application/json"}
+
+    assert redact_headers(headers) == {
+        "Authorization": REDACTED,
+        "Signature-test": REDACTED,
+        "Content-Type": "application/json",
+    }
+
+
+def test_redact_nested_pii():
+    data = {"id": "1", "billTo": {"city": "Warsaw"}, "items": [{"email": "a@b.c", "total": "1.00"}]}
+
+    assert redact(data) == {"id": "1", "billTo": REDACTED, "items": [{"email": REDACTED, "total": "1.00"}]}
+
+
+def test_lazy_fields():
+    fields = LazyFields({"headers": {"Authorization": "x"}, "email": "a@b.c", "event_type": "saleDeclined"})
+
+    assert str(fields) == "headers={'Authorization': '***'} | email=*** | event_type=saleDeclined"
+
+
+class TestStructuredLogger:
+    def test_fields_are_not_rendered_when_level_is_disabled(self, caplog):
+        log = StructuredLogger(logging.getLogger("getpaid_elavon.test"))
+
+        with caplog.at_level(logging.WARNING, logger="getpaid_elavon.test"):
+            log.info("skipped", value=Unrenderable())
+            log.success("skipped", value=Unrenderable())
+
+        assert caplog.records == []
+
+    def test_record_is_redacted(self, caplog):
+        log = StructuredLogger(logging.getLogger("getpaid_elavon.test"))
+
+        with caplog.at_level(logging.INFO, logger="getpaid_elavon.test"):
+            log.info("Webhook received", event_type="saleAuthorized", email="a@b.c")
+
+        (record,) = caplog.records
+        assert record.getMessage() == "Webhook received | event_type=saleAuthorized | email=***"
+        assert record.fields.as_dict() == {"event_type": "saleAuthorized", "email": REDACTED}
+
+    def test_success_is_sampled_and_errors_are_not(self, caplog):
+        log = StructuredLogger(logging.getLogger("getpaid_elavon.test"), sample_rate=0)
+
+        with caplog.at_level(logging.INFO, logger="getpaid_elavon.test"):
+            log.success("sampled out")
+            log.error("kept")
+
+        assert [record.getMessage() for record in caplog.records] == ["kept"]
+
+    def test_sample_rate_setting(self, settings):
+        settings.GETPAID_BACKEND_SETTINGS = {"getpaid_elavon": {"log_sample_rate": 0.25}}
+
+        assert StructuredLogger(logging.getLogger("getpaid_elavon.test")).sample_rate == 0.25
+
+
+@pytest.mark.django_db
+def test_callback_view_does_not_log_secrets(caplog, webhook_secret, signed_webhook, webhook_payload, callback_view):
+    data = {**webhook_payload("session_1"), "email": "a@b.c"}
+
+    with caplog.at_level(logging.DEBUG, logger="getpaid_elavon"):
+        callback_view(signed_webhook(data))
+        callback_view(signed_webhook(data, secret="d3Jvbmc="))
+
+    logged = caplog.text
+    assert "Webhook received" in logged
+    assert "Webhook signature validation failed" in logged
+    assert "a@b.c" not in logged
+    assert signed_webhook(data).headers["Signature-test"] not in logged
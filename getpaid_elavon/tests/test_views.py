@@ -0,0 +1,60 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from getpaid.types import PaymentStatus as ps
+
+from getpaid_elavon import codec
+from getpaid_elavon.models import PaymentSession
+
+
+@pytest.mark.django_db
+class TestCallbackView:
+    def test_signed_webhook_updates_payment(self, payment, signed_webhook, webhook_payload, callback_view, get_status):
+        type(payment).objects.filter(pk=payment.pk).update(external_id="session_1")
+
+        response = callback_view(signed_webhook(webhook_payload("session_1")))
+
+        assert response.status_code == 200
+        assert get_status(payment) == ps.PAID
+
+    def test_body_is_decoded_once(self, payment, signed_webhook, webhook_payload, callback_view):
+        type(payment).objects.filter(pk=payment.pk).update(external_id="session_1")
+        request = signed_webhook(webhook_payload("session_1"))
+
+        with mock.patch("getpaid_elavon.codec.loads", wraps=codec.loads) as loads:
+            callback_view(request)
+
+        assert loads.call_count == 1
+
+    @pytest.mark.parametrize("signed", [True, False])
+    def test_unverified_webhook_is_rejected_before_parsing(
+        self, signed, signed_webhook, django_assert_num_queries, webhook_payload, callback_view
+    ):
+        request = signed_webhook(webhook_payload("session_1"), secret="Zm9yZ2Vk", signed=signed)
+
+        with mock.patch("getpaid_elavon.codec.loads") as loads, django_assert_num_queries(0):
+            response = callback_view(request)
+
+        assert response.status_code == 403
+        loads.assert_not_called()
+
+    def test_stale_event_does_not_touch_payment(
+        self, payment, signed_webhook, webhook_payload, callback_view, get_status
+    ):
+        PaymentSession.objects.create(session_id="session_1", payment=payment)
+        callback_view(signed_webhook(webhook_payload("session_1")))
+        request = signed_webhook(webhook_payload("session_1", "saleAuthorizationPending"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = callback_view(request)
+
+        assert response.status_code == 200
+        assert not [query for query in queries if "getpaid_payment" in query["sql"]]
+        assert get_status(payment) == ps.PAID
+
+    def test_unknown_session_is_acknowledged(self, signed_webhook, webhook_payload, callback_view):
+        response = callback_view(signed_webhook(webhook_payload("missing")))
+
+        assert response.status_code == 200
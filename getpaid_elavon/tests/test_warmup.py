@@ -0,0 +1,88 @@
+import os
+import uuid
+from unittest import mock
+
+import pytest
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from urllib3.connection import HTTPConnection
+
+from getpaid_elavon import client as client_module
+from getpaid_elavon.fake_server import FakeElavonServer
+from getpaid_elavon.warmup import validate_settings, warm_up
+
+
+def test_valid_settings(webhook_secret):
+    validate_settings()
+
+
+def test_all_problems_are_reported(backend_settings):
+    backend_settings(
+        secret_key="", checkout_mode="eager", webhook_processing="celery", pool_maxsize=0, webhook_shared_secret="a"
+    )
+
+    with pytest.raises(ImproperlyConfigured) as excinfo:
+        validate_settings()
+
+    message = str(excinfo.value)
+    for name in ("secret_key", "checkout_mode", "webhook_processing", "pool_maxsize", "webhook_shared_secret"):
+        assert name in message
+
+
+def test_warm_up_opens_pooled_connections(db, backend_settings):
+    from factories import PaymentFactory
+
+    with FakeElavonServer(auto_pay=False) as server:
+        backend_settings(base_url=server.url, warmup_connections=3)
+
+        with mock.patch.object(HTTPConnection, "connect", autospec=True, side_effect=HTTPConnection.connect) as connect:
+            warm_up()
+            assert connect.call_count == 3
+
+            client = PaymentFactory().processor.client
+            client.create_order("1", "10.00", "EUR", "Order 1", [], uuid.uuid4())
+
+        assert connect.call_count == 3
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="needs os.fork")
+def test_forked_worker_does_not_share_warm_connections(db, backend_settings):
+    from factories import PaymentFactory
+
+    with FakeElavonServer(auto_pay=False) as server:
+        backend_settings(base_url=server.url)
+        warm_up()
+        client = PaymentFactory().processor.client
+        pools = client.session.get_adapter(server.url).poolmanager.pools
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            os.write(write_fd, f"{len(client_module._sessions)} {len(pools)}".encode())
+            os._exit(0)
+        os.waitpid(pid, 0)
+        os.close(write_fd)
+
+        assert os.read(read_fd, 64) == b"0 0"
+        assert len(pools)
+        os.close(read_fd)
+
+
+def test_warm_up_survives_unreachable_gateway(backend_settings, caplog):
+    with FakeElavonServer() as server:
+        url = server.url
+    backend_settings(base_url=url)
+
+    warm_up()
+
+    assert "Elavon connection warm-up failed" in caplog.text
+
+
+def test_ready_warms_up_only_when_enabled(backend_settings):
+    app_config = apps.get_app_config("getpaid_elavon")
+
+    with mock.patch("getpaid_elavon.warmup.warm_up") as warm_up_mock:
+        app_config.ready()
+        backend_settings(warmup=True)
+        app_config.ready()
+
+    assert warm_up_mock.call_count == 1
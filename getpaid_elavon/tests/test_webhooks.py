@@ -0,0 +1,133 @@
+import base64
+import hashlib
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+
+from getpaid_elavon.models import PaymentSession
+from getpaid_elavon.webhooks import (
+    SignatureVerifier,
+    advance_event_ledger,
+    get_payment_for_session,
+    get_verifier,
+    verify_signature,
+)
+
+OLD_SECRET = base64.b64encode(b"old-shared-secret").decode()
+NEW_SECRET = base64.b64encode(b"new-shared-secret").decode()
+BODY = b'{"eventType": "saleAuthorized"}'
+
+
+def sign(secret, body=BODY):
+    return base64.b64encode(hashlib.sha512(base64.b64decode(secret) + body).digest()).decode()
+
+
+class TestSignatureVerifier:
+    def test_valid_signature(self):
+        verifier = SignatureVerifier([NEW_SECRET], "test")
+
+        assert verifier.verify({"Signature-test": sign(NEW_SECRET)}, BODY)
+        assert verifier.verify({"Signature-test": f" {sign(NEW_SECRET)}\n"}, BODY)
+
+    @pytest.mark.parametrize(
+        "headers",
+        [
+            {},
+            {"Signature-test": ""},
+            {"Signature-test": "not base64!"},
+            {"Signature-test": sign(NEW_SECRET, b"tampered")},
+            {"Signature-other": sign(NEW_SECRET)},
+        ],
+    )
+    def test_invalid_signature(self, headers):
+        assert not SignatureVerifier([NEW_SECRET], "test").verify(headers, BODY)
+
+    def test_accepts_all_active_secrets_during_rotation(self):
+        verifier = SignatureVerifier([NEW_SECRET, OLD_SECRET], "test")
+
+        assert verifier.verify({"Signature-test": sign(NEW_SECRET)}, BODY)
+        assert verifier.verify({"Signature-test": sign(OLD_SECRET)}, BODY)
+        assert not SignatureVerifier([NEW_SECRET], "test").verify({"Signature-test": sign(OLD_SECRET)}, BODY)
+
+    def test_verifier_is_cached_per_configuration(self, settings):
+        settings.GETPAID_BACKEND_SETTINGS = {
+            "getpaid_elavon": {"webhook_shared_secret": [NEW_SECRET, OLD_SECRET], "webhook_signer_id": "test"}
+        }
+
+        verifier = get_verifier()
+
+        assert get_verifier() is verifier
+        assert get_verifier(NEW_SECRET, "test") is not verifier
+        assert verify_signature({"Signature-test": sign(OLD_SECRET)}, BODY)
+
+
+@pytest.mark.django_db
+class TestGetPaymentForSession:
+    def test_resolves_through_mapping_with_single_query(self, payment, django_assert_num_queries):
+        PaymentSession.objects.create(session_id="session_1", payment=payment)
+
+        with django_assert_num_queries(1):
+            assert get_payment_for_session("session_1", lock=True) == payment
+
+    def test_falls_back_to_external_id(self, payment):
+        type(payment).objects.filter(pk=payment.pk).update(external_id="legacy_session")
+
+        assert get_payment_for_session("legacy_session") == payment
+        assert get_payment_for_session("missing") is None
+
+    @pytest.mark.parametrize("supported, of", [(True, ("self",)), (False, ())])
+    def test_lock_is_limited_to_payment_row_where_supported(self, payment, supported, of):
+        select_for_update = mock.patch.object(
+            QuerySet, "select_for_update", autospec=True, side_effect=QuerySet.select_for_update
+        )
+        with mock.patch.object(connection.features, "has_select_for_update_of", supported), select_for_update as lock:
+            get_payment_for_session("session_1", lock=True)
+
+        lock.assert_called_once_with(mock.ANY, of=of)
+
+    def test_backfill_command_maps_existing_payments(self, payment):
+        from factories import PaymentFactory
+
+        type(payment).objects.filter(pk=payment.pk).update(external_id="legacy_session")
+        mapped = PaymentFactory(external_id="mapped_session")
+        PaymentSession.objects.create(session_id="mapped_session", payment=mapped)
+        PaymentFactory(external_id="")
+
+        call_command("elavon_backfill_sessions", batch_size=1, stdout=StringIO())
+
+        assert dict(PaymentSession.objects.values_list("session_id", "payment_id")) == {
+            "legacy_session": payment.pk,
+            "mapped_session": mapped.pk,
+        }
+
+
+@pytest.mark.django_db
+class TestEventLedger:
+    def test_only_later_events_advance(self, payment):
+        PaymentSession.objects.create(session_id="session_1", payment=payment)
+
+        assert advance_event_ledger("session_1", "saleAuthorizationPending")
+        assert advance_event_ledger("session_1", "saleAuthorized")
+        assert not advance_event_ledger("session_1", "saleAuthorizationPending")
+        assert not advance_event_ledger("session_1", "saleDeclined")
+        assert not advance_event_ledger("session_1", "saleAuthorized")
+        session = PaymentSession.objects.get(session_id="session_1")
+        assert (session.event_type, session.event_rank) == ("saleAuthorized", 3)
+
+    def test_authorization_may_follow_decline(self, payment):
+        PaymentSession.objects.create(session_id="session_1", payment=payment)
+
+        assert advance_event_ledger("session_1", "saleDeclined")
+        assert not advance_event_ledger("session_1", "expired")
+        assert advance_event_ledger("session_1", "saleAuthorized")
+
+    def test_unsequenced_events_pass(self, payment, django_assert_num_queries):
+        PaymentSession.objects.create(session_id="session_1", payment=payment)
+
+        with django_assert_num_queries(0):
+            assert advance_event_ledger("session_1", "somethingNew")
+        assert advance_event_ledger("legacy_session", "saleAuthorized")
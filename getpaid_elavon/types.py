@@ -1,5 +1,12 @@
+import uuid
+from collections.abc import Iterable, Iterator
+from datetime import datetime
 from enum import Enum
-from typing import Optional, TypedDict
+from typing import Optional, TypedDict, Union
+
+from django.utils.dateparse import parse_datetime
+
+from getpaid_elavon import codec
 
 
 class PaymentStatus(str, Enum):
@@ -9,6 +16,33 @@ class PaymentStatus(str, Enum):
     EXPIRED = "expired"
 
 
+class TransactionState(str, Enum):
+    AUTHORIZED = "authorized"
+    CAPTURED = "captured"
+    SETTLED = "settled"
+    SETTLEMENT_DELAYED = "settlementDelayed"
+    DECLINED = "declined"
+    REJECTED = "rejected"
+    HELD = "held"
+    VOIDED = "voided"
+
+
+TRANSACTION_STATE_EVENTS = {
+    TransactionState.AUTHORIZED: PaymentStatus.SALE_AUTHORIZED,
+    TransactionState.CAPTURED: PaymentStatus.SALE_AUTHORIZED,
+    TransactionState.SETTLED: PaymentStatus.SALE_AUTHORIZED,
+    TransactionState.SETTLEMENT_DELAYED: PaymentStatus.SALE_AUTHORIZED,
+    TransactionState.DECLINED: PaymentStatus.SALE_DECLINED,
+    TransactionState.REJECTED: PaymentStatus.SALE_DECLINED,
+    TransactionState.HELD: PaymentStatus.SALE_AUTHORIZATION_PENDING,
+}
+
+
+class CheckoutMode(str, Enum):
+    ATOMIC = "atomic"
+    PIPELINED = "pipelined"
+
+
 class BillingData(TypedDict):
     countryCode: Optional[str]
     company: Optional[str]
@@ -23,3 +57,210 @@ class BuyerData(TypedDict):
     firstName: Optional[str]
     lastName: Optional[str]
     billing: Optional[BillingData]
+
+
+class CheckoutResult(TypedDict):
+    payment_id: str
+    session_id: Optional[str]
+    url: Optional[str]
+    error: Optional[Exception]
+
+
+class WebhookResult(TypedDict):
+    outcome: str
+    error: Optional[Exception]
+
+
+# items encoded per codec call when streaming an order body
+ITEMS_PER_CHUNK = 256
+
+
+class OrderItem:
+    """
+    Line of an Elavon order.
+    """
+
+    __slots__ = ("description", "amount", "currency_code")
+
+    def __init__(self, description: str, amount: str, currency_code: str):
+        self.description = description
+        self.amount = amount
+        self.currency_code = currency_code
+
+    def to_dict(self) -> dict:
+        return {"total": {"amount": self.amount, "currencyCode": self.currency_code}, "description": self.description}
+
+
+class OrderRequest:
+    """
+    Body of ``POST /orders``; ``items`` may mix :class:`OrderItem` and ready item dicts.
+
+    ``items`` may also be a generator, which :meth:`iter_encode` consumes
+    while encoding, for carts too large to be held in memory twice.
+    """
+
+    __slots__ = ("order_reference", "total_amount", "currency_code", "description", "items", "custom_reference")
+
+    def __init__(
+        self,
+        order_reference: str,
+        total_amount: str,
+        currency_code: str,
+        description: str,
+        items: Iterable,
+        custom_reference: uuid.UUID,
+    ):
+        self.order_reference = order_reference
+        self.total_amount = total_amount
+        self.currency_code = currency_code
+        self.description = description
+        self.items = items
+        self.custom_reference = custom_reference
+
+    def to_dict(self) -> dict:
+        return {
+            "orderReference": self.order_reference,
+            "total": {"currencyCode": self.currency_code, "amount": self.total_amount},
+            "description": self.description,
+            "items": [item.to_dict() if type(item) is OrderItem else item for item in self.items],
+            "customReference": str(self.custom_reference),
+        }
+
+    def iter_encode(self, items_per_chunk: int = ITEMS_PER_CHUNK) -> Iterator[bytes]:
+        """
+        Encode the body as consecutive JSON fragments of ``items_per_chunk`` items each.
+
+        Only one chunk of items exists as dicts at any time, so neither the
+        items nor the body need to be materialized as a whole; the fragments
+        can be written straight into a request body.
+        """
+        head = codec.dumps(
+            {
+                "orderReference": self.order_reference,
+                "total": {"currencyCode": self.currency_code, "amount": self.total_amount},
+                "description": self.description,
+                "customReference": str(self.custom_reference),
+            }
+        )
+        yield head[:-1] + b',"items":['
+        separator = b""
+        chunk = []
+        for item in self.items:
+            chunk.append(item.to_dict() if type(item) is OrderItem else item)
+            if len(chunk) == items_per_chunk:
+                # encode the chunk as one list and strip its brackets, one codec call per chunk
+                yield separator + codec.dumps(chunk)[1:-1]
+                separator = b","
+                chunk = []
+        if chunk:
+            yield separator + codec.dumps(chunk)[1:-1]
+        yield b"]}"
+
+
+class PaymentSessionRequest:
+    """
+    Body of ``POST /payment-sessions`` for a full page HPP redirect.
+    """
+
+    __slots__ = ("order_url", "return_url", "cancel_url", "custom_reference", "email", "bill_to")
+
+    def __init__(
+        self,
+        order_url: str,
+        return_url: str,
+        cancel_url: str,
+        custom_reference: uuid.UUID,
+        email: Optional[str] = None,
+        bill_to: Optional[dict] = None,
+    ):
+        self.order_url = order_url
+        self.return_url = return_url
+        self.cancel_url = cancel_url
+        self.custom_reference = custom_reference
+        self.email = email
+        self.bill_to = bill_to
+
+    def to_dict(self) -> dict:
+        payload = {
+            "order": self.order_url,
+            "returnUrl": self.return_url,
+            "cancelUrl": self.cancel_url,
+            "doCreateTransaction": True,
+            "hppType": "fullPageRedirect",
+            "customReference": str(self.custom_reference),
+            "shopperEmailAddress": self.email,
+        }
+        if self.bill_to:
+            payload["billTo"] = self.bill_to
+        return payload
+
+
+class Resource:
+    """
+    Read-only view of an Elavon API response or notification.
+
+    Wraps either the decoded dict or the raw JSON body, which is only decoded
+    on first field access, and exposes the fields the plugin reads as
+    attributes instead of ``.get()`` chains.
+    """
+
+    __slots__ = ("_raw", "_data")
+
+    def __init__(self, data: Union[dict, bytes, str]):
+        if isinstance(data, (bytes, str)):
+            self._raw, self._data = data, None
+        else:
+            self._raw, self._data = None, data
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._data = codec.loads(self._raw)
+            self._raw = None
+        return self._data
+
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+
+    @property
+    def id(self) -> Optional[str]:
+        return self.data.get("id")
+
+
+class PaymentSessionResponse(Resource):
+    __slots__ = ()
+
+    @property
+    def url(self) -> Optional[str]:
+        return self.data.get("url")
+
+    @property
+    def transaction(self) -> Optional[str]:
+        return self.data.get("transaction")
+
+    @property
+    def expires_at(self) -> Optional[datetime]:
+        return parse_datetime(self.data.get("expiresAt") or "")
+
+
+class WebhookNotification(Resource):
+    __slots__ = ()
+
+    @property
+    def event_type(self) -> Optional[str]:
+        return self.data.get("eventType")
+
+    @property
+    def resource_type(self) -> Optional[str]:
+        return self.data.get("resourceType")
+
+    @property
+    def payment_session_id(self) -> Optional[str]:
+        """
+        Id of the notification's payment session, None for other resource types.
+        """
+        data = self.data
+        if data.get("resourceType") != "paymentSession":
+            return None
+        # Example: "https://uat.api.converge.eu.elavonaws.com/payment-sessions/7p7rmqwgrcyytp7jdy4tgtfbfcpy"
+        return (data.get("resource") or "").rstrip("/").split("/")[-1] or None
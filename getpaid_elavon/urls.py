@@ -10,4 +10,9 @@ urlpatterns = [
         views.CallbackView.as_view(),
         name="callback",
     ),
+    path(
+        "metrics/",
+        views.MetricsView.as_view(),
+        name="metrics",
+    ),
 ]
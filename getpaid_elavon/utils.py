@@ -1,12 +1,171 @@
 import logging
+import random
+from collections.abc import Mapping
+from typing import Any, Optional
 
 from django.conf import settings
 
+REDACTED = "***"
+SENSITIVE_HEADER_PREFIXES = ("authorization", "cookie", "signature-", "x-api-key")
+PII_FIELDS = frozenset(
+    {
+        "email",
+        "shopperEmailAddress",
+        "phone",
+        "primaryPhone",
+        "firstName",
+        "lastName",
+        "fullName",
+        "company",
+        "street1",
+        "street2",
+        "city",
+        "postalCode",
+        "billTo",
+        "shipTo",
+    }
+)
+
+
+def get_backend_settings() -> dict:
+    """
+    Get the ``getpaid_elavon`` entry of ``GETPAID_BACKEND_SETTINGS``.
+    """
+    return getattr(settings, "GETPAID_BACKEND_SETTINGS", {}).get("getpaid_elavon", {})
+
+
+def get_setting(name: str, default: Optional[Any] = None) -> Any:
+    """
+    Read a backend setting the way ``BaseProcessor.get_setting`` does, without a payment at hand.
+    """
+    value = get_backend_settings().get(name, default)
+    if value is None:
+        value = getattr(settings, "GETPAID", {}).get(name, None)
+    return value
+
 
 def get_logger() -> logging.Logger:
     """
     Get logger with name from settings or default to 'getpaid_elavon'.
     """
-    elavon_settings = getattr(settings, "GETPAID_BACKEND_SETTINGS", {}).get("getpaid_elavon", {})
-    logger_name = elavon_settings.get("logger_name", "getpaid_elavon")
+    logger_name = get_backend_settings().get("logger_name", "getpaid_elavon")
     return logging.getLogger(logger_name)
+
+
+def redact_headers(headers: Mapping) -> dict:
+    """
+    Copy request headers with credentials and webhook signatures masked.
+    """
+    return {
+        name: REDACTED if name.lower().startswith(SENSITIVE_HEADER_PREFIXES) else value
+        for name, value in headers.items()
+    }
+
+
+def redact(data: Any) -> Any:
+    """
+    Copy a decoded payload with personal data (e-mail, phone, address...) masked, at any depth.
+    """
+    if isinstance(data, Mapping):
+        return {key: REDACTED if key in PII_FIELDS else redact(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [redact(value) for value in data]
+    return data
+
+
+class LazyFields:
+    """
+    Log record argument rendering ``key=value`` pairs only when a handler formats the record.
+    """
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: dict):
+        self.fields = fields
+
+    def as_dict(self) -> dict:
+        return {
+            key: redact_headers(value) if key == "headers" else REDACTED if key in PII_FIELDS else redact(value)
+            for key, value in self.fields.items()
+        }
+
+    def __str__(self) -> str:
+        return " | ".join(f"{key}={value}" for key, value in self.as_dict().items())
+
+
+class StructuredLogger:
+    """
+    Thin wrapper logging a message with keyword fields, e.g. ``log.info("Webhook received", event_type=...)``.
+
+    Fields are redacted and rendered lazily (a ``headers`` field is treated
+    as request headers), and nothing is built when the level is disabled.
+    :meth:`success` is meant for the high volume success path and keeps only
+    a ``sample_rate`` fraction of records (the ``log_sample_rate`` setting by
+    default); warnings and errors are never sampled. Handlers get the fields
+    as ``record.fields``, ``record.fields.as_dict()`` returns them redacted.
+    Without a ``logger``, :func:`get_logger` is called on first use, so
+    module level instances do not read the settings at import time.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, sample_rate: Optional[float] = None):
+        self._logger = logger
+        self._sample_rate = sample_rate
+
+    @property
+    def logger(self) -> logging.Logger:
+        if self._logger is None:
+            self._logger = get_logger()
+        return self._logger
+
+    @property
+    def sample_rate(self) -> float:
+        if self._sample_rate is not None:
+            return self._sample_rate
+        return get_setting("log_sample_rate", 1.0)
+
+    def log(self, level: int, message: str, exc_info: bool = False, **fields) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        if not fields:
+            self.logger.log(level, message, exc_info=exc_info, stacklevel=3)
+            return
+        lazy_fields = LazyFields(fields)
+        self.logger.log(
+            level,
+            "%s | %s",
+            message,
+            lazy_fields,
+            exc_info=exc_info,
+            extra={"fields": lazy_fields},
+            stacklevel=3,
+        )
+
+    def debug(self, message: str, **fields) -> None:
+        self.log(logging.DEBUG, message, **fields)
+
+    def info(self, message: str, **fields) -> None:
+        self.log(logging.INFO, message, **fields)
+
+    def success(self, message: str, **fields) -> None:
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        sample_rate = self.sample_rate
+        if sample_rate < 1 and random.random() >= sample_rate:
+            return
+        self.log(logging.INFO, message, **fields)
+
+    def warning(self, message: str, **fields) -> None:
+        self.log(logging.WARNING, message, **fields)
+
+    def error(self, message: str, **fields) -> None:
+        self.log(logging.ERROR, message, **fields)
+
+    def exception(self, message: str, **fields) -> None:
+        self.log(logging.ERROR, message, exc_info=True, **fields)
+
+
+def get_structured_logger() -> StructuredLogger:
+    """
+    Get :class:`StructuredLogger` wrapping :func:`get_logger`, resolved on first use.
+    """
+    return StructuredLogger()
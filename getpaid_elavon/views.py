@@ -1,59 +1,177 @@
-import json
+from hmac import compare_digest
+from time import perf_counter
 
-import swapper
-from django.http import HttpResponse
+from django.db import transaction
+from django.http import Http404, HttpResponse
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 
-from getpaid_elavon import PaymentProcessor
-from getpaid_elavon.utils import get_logger
+from getpaid_elavon import codec
+from getpaid_elavon.batching import DEFAULT_BATCH_TIMEOUT, get_webhook_batcher
+from getpaid_elavon.dedup import WebhookDeduplicator
+from getpaid_elavon.metrics import CONTENT_TYPE, get_metrics
+from getpaid_elavon.queues import get_webhook_queue
+from getpaid_elavon.types import WebhookResult
+from getpaid_elavon.utils import get_setting, get_structured_logger
+from getpaid_elavon.webhooks import (
+    advance_event_ledger,
+    get_payment_for_session,
+    get_payment_session_id,
+    verify_signature,
+)
 
-Payment = swapper.load_model("getpaid", "Payment")
-
-logger = get_logger()
+logger = get_structured_logger()
 
 
 @method_decorator(csrf_exempt, name="dispatch")
 class CallbackView(View):
     """Handle Elavon webhook notifications."""
 
+    event_type = ""
+    outcome = "error"
+
     def post(self, request, *args, **kwargs):
+        started = perf_counter()
+        try:
+            return self.handle_webhook(request, *args, **kwargs)
+        finally:
+            metrics = get_metrics()
+            if metrics is not None:
+                event_type = self.event_type or "unknown"
+                metrics.inc("elavon_webhooks_total", event_type=event_type, outcome=self.outcome)
+                metrics.observe("elavon_webhook_duration_seconds", perf_counter() - started, event_type=event_type)
+
+    def handle_webhook(self, request, *args, **kwargs):
+        """
+        Verify, decode and apply a notification, setting ``event_type`` and ``outcome`` for the metrics.
+        """
+        # Verify against the raw body first, so unsigned or forged requests
+        # never reach JSON decoding or the database.
+        body = request.body
+        if not verify_signature(request.headers, body):
+            logger.warning("Webhook signature validation failed", headers=request.headers, body_size=len(body))
+            self.outcome = "invalid_signature"
+            return HttpResponse(status=403)
+
         try:
-            data = json.loads(request.body)
-        except json.JSONDecodeError:
-            logger.error("Invalid JSON in webhook request body: %s", request.body)
+            data = codec.loads(body)
+        except codec.JSONDecodeError:
+            logger.error("Invalid JSON in webhook request body", body_size=len(body))
+            self.outcome = "invalid_json"
             return HttpResponse(status=200)
 
-        logger.info(
-            "Sandbox webhook received | headers=%s | body=%s",
-            str(dict(request.headers)),
-            str(data),
-        )
+        self.event_type = data.get("eventType")
+        logger.success("Webhook received", resource_type=data.get("resourceType"), event_type=data.get("eventType"))
+        logger.debug("Webhook payload", headers=request.headers, body=data)
 
-        # Example: "https://uat.api.converge.eu.elavonaws.com/payment-sessions/7p7rmqwgrcyytp7jdy4tgtfbfcpy"
-        resource_url = data.get("resource")
-        resource_type = data.get("resourceType")
+        payment_session_id = get_payment_session_id(data)
+        if payment_session_id is None:
+            logger.warning("Received webhook for non-paymentSession resource", resource_type=data.get("resourceType"))
+            self.outcome = "ignored"
+            return HttpResponse(status=200)
 
-        if resource_type != "paymentSession":
-            logger.warning(
-                "Received webhook for non-paymentSession resource: %s",
-                resource_type,
-            )
+        deduplicator = WebhookDeduplicator.from_settings() if get_setting("webhook_deduplication") else None
+        if deduplicator is not None and deduplicator.seen(data):
+            return self.ignore_duplicate(data)
+
+        webhook_processing = get_setting("webhook_processing")
+        if webhook_processing == "batch":
+            # the batch is applied on another thread, so the claim is released when handling fails
+            if deduplicator is not None and not deduplicator.claim(data):
+                return self.ignore_duplicate(data)
+            try:
+                return self.handle_batched(data, deduplicator)
+            except BaseException:
+                if deduplicator is not None:
+                    deduplicator.release(data)
+                raise
+
+        # claim in the transaction that applies or enqueues the event, an error rolls both back
+        with transaction.atomic():
+            if deduplicator is not None and not deduplicator.claim(data):
+                return self.ignore_duplicate(data)
+            if webhook_processing == "queue":
+                get_webhook_queue().enqueue(data)
+                self.outcome = "queued"
+                return HttpResponse(status=200)
+            # settle the event order on the session row first, stale events never load or lock the payment
+            if get_setting("webhook_sequencing", True) and not advance_event_ledger(
+                payment_session_id, data.get("eventType")
+            ):
+                logger.debug("Stale webhook ignored", external_id=payment_session_id, event_type=data.get("eventType"))
+                self.outcome = "stale"
+                return HttpResponse(status=200)
+            # lock the row, so concurrent deliveries for one payment are applied one after another
+            payment = get_payment_for_session(payment_session_id, lock=True)
+            if payment is None:
+                logger.warning(
+                    "Payment not found for webhook",
+                    external_id=payment_session_id,
+                    event_type=data.get("eventType"),
+                )
+            else:
+                response = payment.handle_paywall_callback(request, *args, data=data, **kwargs)
+
+        if payment is None:
+            # the session may not be stored yet, let a redelivery try again
+            if deduplicator is not None:
+                deduplicator.release(data)
+            self.outcome = "payment_not_found"
             return HttpResponse(status=200)
-        payment_session_id = resource_url.rstrip("/").split("/")[-1]
+        if deduplicator is not None and response.status_code != 200:
+            deduplicator.release(data)
+        self.outcome = "processed" if response.status_code == 200 else "failed"
+        return response
+
+    def ignore_duplicate(self, data: dict) -> HttpResponse:
+        logger.success("Duplicate webhook ignored", event_type=data.get("eventType"))
+        self.outcome = "duplicate"
+        return HttpResponse(status=200)
+
+    def handle_batched(self, data: dict, deduplicator=None) -> HttpResponse:
+        """
+        Apply the notification in the next batch window and answer with its outcome.
 
+        Processing errors of the event itself are acknowledged like inline
+        processing does; when the batch could not be applied in time, 503
+        makes Elavon redeliver the notification.
+        """
         try:
-            payment = Payment.objects.get(
-                external_id=payment_session_id,
-                backend=f"getpaid_{PaymentProcessor.slug}",
+            result = (
+                get_webhook_batcher().submit(data).result(get_setting("webhook_batch_timeout", DEFAULT_BATCH_TIMEOUT))
             )
-        except Payment.DoesNotExist:
+        except Exception as e:
+            logger.error("Webhook batch not applied", error=str(e), event_type=data.get("eventType"))
+            result = WebhookResult(outcome="failed", error=e)
+            status = 503
+        else:
+            status = 200
+        self.outcome = result["outcome"]
+        if self.outcome == "payment_not_found":
             logger.warning(
-                "Payment not found for webhook external_id: %s event_type: %s",
-                payment_session_id,
-                data.get("eventType"),
+                "Payment not found for webhook",
+                external_id=get_payment_session_id(data),
+                event_type=data.get("eventType"),
             )
-            return HttpResponse(status=200)
+        if deduplicator is not None and self.outcome in ("payment_not_found", "failed"):
+            deduplicator.release(data)
+        return HttpResponse(status=status)
+
+
+class MetricsView(View):
+    """
+    Expose the metrics in the Prometheus text format.
+
+    Answers 404 unless ``metrics_enabled`` is set. With ``metrics_token`` set,
+    scrapers have to send ``Authorization: Bearer <metrics_token>``.
+    """
 
-        return payment.handle_paywall_callback(request, *args, **kwargs)
+    def get(self, request, *args, **kwargs):
+        metrics = get_metrics()
+        if metrics is None:
+            raise Http404
+        token = get_setting("metrics_token")
+        if token and not compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+            return HttpResponse(status=401)
+        return HttpResponse(metrics.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,87 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from getpaid_elavon.types import CheckoutMode
+from getpaid_elavon.utils import get_setting, get_structured_logger
+
+logger = get_structured_logger()
+
+DEFAULT_WARMUP_CONNECTIONS = 2
+WEBHOOK_PROCESSING_MODES = (None, "inline", "queue", "batch")
+POSITIVE_INT_SETTINGS = ("pool_connections", "pool_maxsize", "async_pool_maxsize")
+
+
+def validate_settings() -> None:
+    """
+    Check the backend settings a checkout or webhook would otherwise trip over on first use.
+
+    Raises:
+        ImproperlyConfigured: listing every problem found
+    """
+    from getpaid_elavon.codec import get_codec
+    from getpaid_elavon.webhooks import get_verifier
+
+    problems = [f"{name} is required" for name in ("merchant_alias_id", "secret_key") if not get_setting(name)]
+    base_url = get_setting("base_url")
+    if base_url and not base_url.startswith(("http://", "https://")):
+        problems.append(f"base_url must be an http(s) URL, got {base_url!r}")
+    checkout_mode = get_setting("checkout_mode", CheckoutMode.ATOMIC)
+    if checkout_mode not in {mode.value for mode in CheckoutMode}:
+        problems.append(f"checkout_mode must be one of {[mode.value for mode in CheckoutMode]}, got {checkout_mode!r}")
+    webhook_processing = get_setting("webhook_processing")
+    if webhook_processing not in WEBHOOK_PROCESSING_MODES:
+        problems.append(f"webhook_processing must be one of {WEBHOOK_PROCESSING_MODES}, got {webhook_processing!r}")
+    for name in POSITIVE_INT_SETTINGS:
+        value = get_setting(name)
+        if value is not None and (not isinstance(value, int) or value < 1):
+            problems.append(f"{name} must be a positive integer, got {value!r}")
+    if get_setting("webhook_shared_secret"):
+        if not get_setting("webhook_signer_id"):
+            problems.append("webhook_signer_id is required with webhook_shared_secret")
+        else:
+            try:
+                get_verifier()
+            except ValueError as e:
+                problems.append(f"webhook_shared_secret is not valid base64: {e}")
+    try:
+        get_codec()
+    except (ImportError, AttributeError) as e:
+        problems.append(f"json_codec cannot be loaded: {e}")
+    if problems:
+        raise ImproperlyConfigured("Invalid getpaid_elavon settings: " + "; ".join(problems))
+
+
+def warm_up() -> None:
+    """
+    Prepare a new worker for its first checkout, called from ``AppConfig.ready()`` with the ``warmup`` setting.
+
+    Validates the settings, builds the configured blocking and async clients
+    into the process-wide cache and opens ``warmup_connections`` pooled
+    connections to the Elavon base URL. Invalid settings raise
+    ``ImproperlyConfigured``; connection failures are only logged, the
+    worker then connects on first use as usual.
+    """
+    from getpaid_elavon.client import get_client
+    from getpaid_elavon.processor import PaymentProcessor
+
+    validate_settings()
+    params = PaymentProcessor.get_client_params()
+    client_class = get_setting("CLIENT_CLASS") or PaymentProcessor.client_class
+    if isinstance(client_class, str):
+        client_class = import_string(client_class)
+    client = get_client(client_class, **params)
+    try:
+        # its connections belong to an event loop, so only the client itself can be built here
+        get_client(PaymentProcessor.async_client_class, **params)
+    except ImportError:  # pragma: no cover
+        pass
+
+    count = get_setting("warmup_connections", DEFAULT_WARMUP_CONNECTIONS)
+    if not count or not hasattr(client, "open_connections"):
+        return
+    try:
+        opened = client.open_connections(count)
+    except Exception as e:
+        logger.warning("Elavon connection warm-up failed", base_url=client.get_baseurl(), error=str(e))
+    else:
+        logger.info("Elavon connections warmed up", base_url=client.get_baseurl(), connections=opened)
@@ -0,0 +1,183 @@
+import base64
+import binascii
+import hashlib
+import hmac
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from typing import Optional, Union
+
+from django.db import connection
+
+from getpaid_elavon.types import PaymentStatus, WebhookNotification
+from getpaid_elavon.utils import get_setting
+
+
+def get_payment_session_id(data: dict) -> Optional[str]:
+    """
+    Extract the payment session id from a decoded notification.
+
+    Returns None for notifications about resources other than payment sessions.
+    """
+    return WebhookNotification(data).payment_session_id
+
+
+# events of a payment session only move forward: later ranks supersede earlier ones,
+# declines and expiry may still be followed by an authorization on retry
+EVENT_PRECEDENCE = {
+    PaymentStatus.SALE_AUTHORIZATION_PENDING: 1,
+    PaymentStatus.SALE_DECLINED: 2,
+    PaymentStatus.EXPIRED: 2,
+    PaymentStatus.SALE_AUTHORIZED: 3,
+}
+
+
+def get_event_rank(event_type: Optional[str]) -> Optional[int]:
+    try:
+        return EVENT_PRECEDENCE[PaymentStatus(event_type)]
+    except ValueError:
+        return None
+
+
+def advance_event_ledger(payment_session_id: str, event_type: Optional[str]) -> bool:
+    """
+    Record ``event_type`` as the latest event of the payment session, unless an equal or later one was recorded.
+
+    One conditional ``UPDATE`` on the indexed session row, so stale and
+    duplicate events are dropped without loading or locking the payment. Call
+    it inside the transaction applying the event, so the ledger rolls back
+    with it; concurrent deliveries for one session queue on the session row.
+
+    Returns:
+        False for stale events; True otherwise, including unknown event types
+        and sessions without a ``PaymentSession`` row, which are not sequenced
+    """
+    from getpaid_elavon.models import PaymentSession
+
+    rank = get_event_rank(event_type)
+    if rank is None:
+        return True
+    sessions = PaymentSession.objects.filter(session_id=payment_session_id)
+    if sessions.filter(event_rank__lt=rank).update(event_rank=rank, event_type=event_type):
+        return True
+    return not sessions.exists()
+
+
+def get_payment_for_session(payment_session_id: str, lock: bool = False):
+    """
+    Resolve the payment of a payment session through the indexed ``PaymentSession`` mapping.
+
+    Falls back to ``Payment.external_id`` for sessions created before the
+    mapping existed (see the ``elavon_backfill_sessions`` command).
+
+    Args:
+        payment_session_id: Elavon payment session id
+        lock: Lock the payment row with ``SELECT ... FOR UPDATE``
+
+    Returns:
+        Payment instance, or None if there is none for the session
+    """
+    import swapper
+
+    Payment = swapper.load_model("getpaid", "Payment")
+    queryset = Payment.objects.filter(backend="getpaid_elavon")
+    if lock:
+        # lock only the payment row, not the joined session mapping, where the backend can tell them apart
+        of = ("self",) if connection.features.has_select_for_update_of else ()
+        queryset = queryset.select_for_update(of=of)
+    for lookup in ("elavon_sessions__session_id", "external_id"):
+        try:
+            return queryset.get(**{lookup: payment_session_id})
+        except Payment.DoesNotExist:
+            continue
+    return None
+
+
+def get_signature_header_name(signer_id: Optional[str] = None) -> str:
+    if signer_id is None:
+        signer_id = get_setting("webhook_signer_id")
+    return f"Signature-{signer_id}"
+
+
+def compute_signature(body: bytes, shared_secret: str) -> str:
+    """
+    Sign a webhook body the way Elavon does, i.e. the value of the ``Signature-<signer_id>`` header.
+    """
+    return base64.b64encode(hashlib.sha512(base64.b64decode(shared_secret) + body).digest()).decode()
+
+
+class SignatureVerifier:
+    """
+    Elavon SHA-512 webhook signature check with precomputed key material.
+
+    The signature is ``base64(sha512(secret + body))``. Each secret is decoded
+    once and fed into a hasher that is ``copy()``-ed per request, so the body
+    is hashed in place instead of being concatenated with the secret. Several
+    secrets may be active at once to rotate them without downtime.
+    """
+
+    __slots__ = ("header_name", "_seeded_hashers")
+
+    def __init__(self, shared_secrets: Sequence[str], signer_id: str):
+        self.header_name = get_signature_header_name(signer_id)
+        self._seeded_hashers = tuple(hashlib.sha512(base64.b64decode(secret)) for secret in shared_secrets)
+
+    def verify(self, headers: Mapping, body: bytes) -> bool:
+        received_signature = headers.get(self.header_name)
+        if not received_signature:
+            return False
+        try:
+            received_digest = base64.b64decode(received_signature.strip(), validate=True)
+        except (binascii.Error, ValueError):
+            return False
+
+        is_valid = False
+        for seeded in self._seeded_hashers:
+            hasher = seeded.copy()
+            hasher.update(body)
+            # no early exit, so timing does not reveal which secret matched
+            is_valid |= hmac.compare_digest(received_digest, hasher.digest())
+        return is_valid
+
+
+@lru_cache(maxsize=16)
+def _get_verifier(shared_secrets: tuple, signer_id: str) -> SignatureVerifier:
+    return SignatureVerifier(shared_secrets, signer_id)
+
+
+def get_verifier(
+    shared_secret: Optional[Union[str, Sequence[str]]] = None,
+    signer_id: Optional[str] = None,
+) -> SignatureVerifier:
+    """
+    Get the cached verifier for the given (or configured) secrets and signer id.
+
+    ``webhook_shared_secret`` may be a single secret or a list of secrets that
+    are all accepted, e.g. the new and the old one during rotation.
+    """
+    if shared_secret is None:
+        shared_secret = get_setting("webhook_shared_secret")
+    if signer_id is None:
+        signer_id = get_setting("webhook_signer_id")
+    shared_secrets = (shared_secret,) if isinstance(shared_secret, str) else tuple(shared_secret)
+    return _get_verifier(shared_secrets, signer_id)
+
+
+def verify_signature(
+    headers: Mapping,
+    body: bytes,
+    shared_secret: Optional[Union[str, Sequence[str]]] = None,
+    signer_id: Optional[str] = None,
+) -> bool:
+    """
+    Check the Elavon SHA-512 webhook signature against the raw request body.
+
+    Args:
+        headers: Request headers (case-insensitive mapping, e.g. ``request.headers``)
+        body: Raw request body bytes, before any JSON decoding
+        shared_secret: Base64 encoded webhook shared secret(s), defaults to the backend setting
+        signer_id: Webhook signer id, defaults to the backend setting
+
+    Returns:
+        True if signature is valid, False otherwise
+    """
+    return get_verifier(shared_secret, signer_id).verify(headers, body)
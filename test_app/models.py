@@ -31,3 +31,12 @@ class Order(AbstractOrder):
                 "unit_price": self.get_total_amount(),
             }
         ]
+
+    def get_buyer_info(self):
+        return {
+            "email": "buyer@example.com",
+            "phone": "+48123456789",
+        }
+
+    def get_success_url(self, request=None):
+        return "https://example.com/payment/success/"
@@ -3,5 +3,6 @@ from django.urls import include, path
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("payments/", include("getpaid.urls")),
     path("", include("getpaid_elavon.urls", namespace="getpaid_elavon")),
 ]